@@ -0,0 +1,4 @@
+from app.config import load_environment
+
+# Cargar .env/.env.local antes de que cualquier módulo lea variables de entorno
+load_environment()
@@ -0,0 +1,94 @@
+import os
+from functools import lru_cache
+from typing import List
+
+from dotenv import load_dotenv
+
+_environment_loaded = False
+
+DEFAULT_SECRET_KEY = "default-secret-key-change-this"
+
+
+def load_environment() -> str:
+    """
+    Cargar las variables de entorno según el entorno (una sola vez).
+
+    - Contenedor / PaaS (Railway, Docker, PORT definido): variables del sistema
+    - ENVIRONMENT=development: .env.local y, como respaldo, .env
+    - Otro caso: .env
+
+    Las variables ya definidas no se sobrescriben, así que .env.local
+    manda sobre .env y el sistema sobre ambos. Se llama antes de leer
+    cualquier otra variable (logging, SQL, trabajos) para que los archivos
+    .env apliquen a todas.
+
+    Returns:
+        Origen de la configuración: "system", los archivos cargados (".env", ".env.local+.env"...)
+        o "defaults" si no hay ninguno
+    """
+    global _environment_loaded
+    environment = os.getenv("ENVIRONMENT", "development")
+
+    if (
+        environment == "production"
+        or os.getenv("RAILWAY_ENVIRONMENT")
+        or os.getenv("DOCKER_CONTAINER")
+        or os.getenv("PORT")
+    ):
+        # PORT: compatibilidad con despliegues que solo inyectan PORT (p. ej. PaaS)
+        return "system"
+
+    candidates = [".env.local", ".env"] if environment == "development" else [".env"]
+    files = [path for path in candidates if os.path.exists(path)]
+    if not _environment_loaded:
+        for path in files:
+            load_dotenv(path)
+    _environment_loaded = True
+    return "+".join(files) or "defaults"
+
+
+class Settings:
+    """Configuración de la aplicación, leída del entorno una sola vez."""
+
+    def __init__(self):
+        self.config_source = load_environment()
+        self.environment = "production" if self.config_source == "system" else os.getenv("ENVIRONMENT", "development")
+
+        # URL de conexión - Prioridad: variables de entorno > SQLite local
+        database_url = (
+            os.getenv("MYSQL_DATABASE") or
+            os.getenv("DATABASE_URL") or
+            os.getenv("MYSQL_URL") or
+            os.getenv("MYSQL_DATABASE_URL") or
+            "sqlite:///./pokemon_local.db"  # Fallback: Base de datos local SQLite
+        ).strip()
+        # Convertir mysql:// a mysql+pymysql:// automáticamente
+        if database_url.startswith("mysql://"):
+            database_url = database_url.replace("mysql://", "mysql+pymysql://", 1)
+        self.database_url = database_url
+
+        self.secret_key = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
+        if self.secret_key == DEFAULT_SECRET_KEY and self.environment != "development":
+            # Con la clave por defecto cualquiera puede firmar tokens válidos
+            raise RuntimeError(
+                f"SECRET_KEY no está configurada (entorno {self.environment}, configuración: {self.config_source})"
+            )
+        self.jwt_algorithm = "HS256"
+
+        # Orígenes permitidos por CORS
+        self.allowed_origins: List[str] = [
+            o.strip()
+            for o in os.getenv("ALLOWED_ORIGINS", "http://localhost:4200").split(",")
+            if o.strip()
+        ]
+
+        self.port = int(os.getenv("PORT", "3000"))
+        self.deploy_environment = os.getenv("RAILWAY_ENVIRONMENT", "development")
+
+        # Crear las tablas al arrancar (desactivar si se gestionan con migraciones)
+        self.create_tables = os.getenv("DB_CREATE_TABLES", "true").lower() in ("1", "true", "yes")
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
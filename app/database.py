@@ -1,54 +1,68 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+from functools import lru_cache
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import get_settings
 from app.models.database import Base
-import os
-from dotenv import load_dotenv
-
-# Cargar variables de entorno según el entorno
-environment = os.getenv("ENVIRONMENT", "development")
-
-# Producción: contenedor Docker, Railway, Coolify, etc. (sin .env.local)
-if (
-    environment == "production"
-    or os.getenv("RAILWAY_ENVIRONMENT")
-    or os.getenv("DOCKER_CONTAINER")
-    or os.getenv("PORT")
-):
-    # PORT: compatibilidad con despliegues que solo inyectan PORT (p. ej. PaaS)
-    environment = "production"
-    print("☁️ Producción: variables desde el sistema / contenedor")
-elif environment == "development":
-    # Desarrollo local - cargar desde .env.local
-    load_dotenv(".env.local")
-    print("🏠 Modo desarrollo local - usando .env.local")
-else:
-    # Producción local - cargar desde variables de entorno
-    load_dotenv()
-    print("☁️ Modo producción local - usando variables de entorno")
-
-# URL de conexión - Prioridad: variables de entorno > SQLite local
-DATABASE_URL = (
-    os.getenv("MYSQL_DATABASE") or 
-    os.getenv("DATABASE_URL") or 
-    os.getenv("MYSQL_URL") or 
-    os.getenv("MYSQL_DATABASE_URL") or
-    "sqlite:///./pokemon_local.db"  # Fallback: Base de datos local SQLite
-)
-
-# Limpiar espacios en blanco
-if DATABASE_URL:
-    DATABASE_URL = DATABASE_URL.strip()
-
-# Convertir mysql:// a mysql+pymysql:// automáticamente
-if DATABASE_URL.startswith("mysql://"):
-    DATABASE_URL = DATABASE_URL.replace("mysql://", "mysql+pymysql://", 1)
-
-try:
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-except Exception as e:
-    raise
+from app.utils.query_stats import install_query_instrumentation
+import logging
+from app.utils.log import get_logger, log_event
+
+logger = get_logger("database")
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+_tables_created = False
+
+
+@lru_cache
+def get_engine() -> Engine:
+    """
+    Engine de la aplicación, creado la primera vez que se necesita.
+
+    Importar este módulo no carga el driver de la base de datos ni abre
+    conexiones: eso ocurre en el arranque (lifespan) o en la primera sesión.
+    """
+    settings = get_settings()
+    engine = create_engine(settings.database_url)
+    # Número de consultas y tiempo en BD por petición (Server-Timing y logs)
+    install_query_instrumentation(engine)
+    log_event(logger, logging.INFO, "engine_created", dialect=engine.dialect.name,
+              environment=settings.environment, config_source=settings.config_source)
+    return engine
+
+
+def dispose_engine(close: bool = True):
+    """Cerrar las conexiones del pool si el engine ya se creó."""
+    if get_engine.cache_info().currsize:
+        get_engine().dispose(close=close)
+
+
+def init_db():
+    """
+    Crear las tablas que falten (una vez por proceso).
+
+    Con gunicorn se ejecuta en el master antes de lanzar los workers, que
+    heredan la marca y no repiten el create_all a la vez.
+    """
+    global _tables_created
+    if _tables_created or not get_settings().create_tables:
+        return
+    Base.metadata.create_all(bind=get_engine())
+    _tables_created = True
+
+
+def SessionLocal() -> Session:
+    """Nueva sesión ligada al engine de la aplicación (lo crea si hace falta)."""
+    return _session_factory(bind=get_engine())
+
+
+def __getattr__(name: str):
+    # Compatibilidad: `from app.database import engine` sigue funcionando
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Función para obtener la sesión de la base de datos
 def get_db():
@@ -56,4 +70,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,55 +1,135 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy import text
-from sqlalchemy.orm import Session
-from app.routes import auth, pokemon
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.config import get_settings
+from app.utils.log import setup_logging, get_logger, log_event, RequestIdMiddleware
+
+# Configurar el logging antes de importar módulos que registran eventos al cargar
+setup_logging()
+
+from app.routes import auth, pokemon, jobs
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import get_db, engine, Base
-import os
-from dotenv import load_dotenv
+from app.database import get_engine, init_db, dispose_engine
+from app.service.jobs import job_runner
+from app.service.health import health_monitor
+from app.service.retention import retention_scheduler
+from app.service.catalog import species_catalog
+from app.service.autocomplete import autocomplete_index
+from app.service.recommender import team_recommender
+from app.service.team_stats import team_stats
+from app.service.similar_users import similar_users_scheduler
+from app.utils.query_stats import QueryStatsMiddleware
+from app.utils.metrics import MetricsMiddleware, registry, register_callback_gauge
+from app.utils.rate_limit import RateLimitMiddleware
 
-load_dotenv()
+logger = get_logger("main")
+settings = get_settings()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # La conexión a la BD y el create_all se hacen al arrancar, no al importar
+    started = time.perf_counter()
+    get_engine()
+    init_db()
+    # Sprite y tipos de cada especie en memoria antes de servir la primera petición
+    await species_catalog.start()
+    await job_runner.start()
+    await health_monitor.start()
+    await retention_scheduler.start()
+    await similar_users_scheduler.start()
+    # Autocompletado, índice de co-ocurrencias y estadísticas de equipos: se
+    # construyen en segundo plano sin retrasar el arranque
+    await autocomplete_index.start()
+    await team_recommender.start()
+    await team_stats.start()
+    log_event(logger, logging.INFO, "startup_complete",
+              environment=settings.environment, duration_ms=round((time.perf_counter() - started) * 1000, 2))
+    try:
+        yield
+    finally:
+        await team_stats.stop()
+        await team_recommender.stop()
+        await similar_users_scheduler.stop()
+        await retention_scheduler.stop()
+        await health_monitor.stop()
+        await job_runner.stop()
+        await autocomplete_index.stop()
+        await species_catalog.stop()
+        dispose_engine()
+
 
-# Obtener los orígenes permitidos desde variable de entorno
-allowed_origins = [
-    o.strip()
-    for o in os.getenv("ALLOWED_ORIGINS", "http://localhost:4200").split(",")
-    if o.strip()
-]
+app = FastAPI(lifespan=lifespan)
+
+# Token buckets por usuario/IP (RATE_LIMITS); dentro de CORS para que el 429
+# llegue al navegador con sus cabeceras
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=allowed_origins,  # URLs permitidas desde .env
+    allow_origins=settings.allowed_origins,  # URLs permitidas desde .env
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing", "X-Request-ID", "Retry-After"],  # Cursor de paginación y métricas de BD
 )
 
+# Consultas SQL por petición -> cabecera Server-Timing
+app.add_middleware(QueryStatsMiddleware)
+
+# Latencia por ruta y peticiones en curso -> /metrics
+app.add_middleware(MetricsMiddleware)
+
+# X-Request-ID en cada respuesta y en todos los logs de la petición (el más externo)
+app.add_middleware(RequestIdMiddleware)
+
+# Gauges calculados en cada scrape
+register_callback_gauge("db_pool_size", "Conexiones permanentes del pool", lambda: get_engine().pool.size())
+register_callback_gauge("db_pool_checked_out", "Conexiones del pool en uso", lambda: get_engine().pool.checkedout())
+register_callback_gauge("db_pool_overflow", "Conexiones abiertas por encima del tamaño del pool", lambda: max(0, get_engine().pool.overflow()))
+register_callback_gauge("job_queue_depth", "Trabajos en segundo plano esperando worker", lambda: job_runner.queue_depth)
+
 app.include_router(auth.router, prefix="/api")
 app.include_router(pokemon.router, prefix="/api/pokemon", tags=["Pokemon"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
 @app.get("/")
 def home():
     return {"message": "¡Bienvenido al backend de Pokemon"}
 
 @app.get("/health")
-def health_check(db: Session = Depends(get_db)):
-    try:
-        # Probar conexión a la BD
-        db.execute(text("SELECT 1"))
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "environment": os.getenv("RAILWAY_ENVIRONMENT", "development")
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+def health_check():
+    # Último resultado del HealthMonitor: no abre sesiones en cada probe
+    database = (health_monitor.status or {}).get("checks", {}).get("database", {})
+    if database.get("status") != "up":
+        raise HTTPException(status_code=500, detail=f"Database error: {database.get('error', 'sin comprobar')}")
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "environment": settings.deploy_environment
+    }
+
+@app.get("/livez", include_in_schema=False)
+def liveness():
+    # Sin I/O: solo indica que el proceso responde
+    return {"status": "alive"}
+
+@app.get("/readyz", include_in_schema=False)
+def readiness():
+    # O(1): devuelve la última comprobación hecha en segundo plano
+    status = health_monitor.status
+    if status is None:
+        return JSONResponse(status_code=503, content={"ready": False, "detail": "Comprobación inicial en curso"})
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    # Formato de exposición de texto de Prometheus
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Para desarrollo local
 if __name__ == "__main__":
     import uvicorn
-    port = int(os.getenv("PORT", 3000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=settings.port)
\ No newline at end of file
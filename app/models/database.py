@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, Float
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Boolean, JSON, Float, Index, Text, UniqueConstraint, LargeBinary
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
@@ -63,12 +65,19 @@ class TrainingSession(Base):
     completed_at = Column(DateTime)
     
     # Fechas
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())  # Clave de paginación
     updated_at = Column(DateTime, onupdate=func.now())
     
     # Relación con usuario
     user = relationship("User", back_populates="training_sessions")
 
+    # Índice para la paginación por keyset del listado de sesiones; una sola sesión por Pokémon y usuario
+    # (índice único y no UniqueConstraint para poder crearlo en bases existentes: dedupe_training_sessions.py)
+    __table_args__ = (
+        Index("ix_training_sessions_user_created", "user_id", "created_at", "id"),
+        Index("uq_training_sessions_user_pokemon", "user_id", "pokemon_id", unique=True),
+    )
+
 class FavoritePokemon(Base):
     __tablename__ = "favorite_pokemon"
 
@@ -108,12 +117,58 @@ class SearchHistory(Base):
     pokemon_sprite = Column(String(500))
     pokemon_types = Column(JSON)
     search_count = Column(Integer, default=1)
-    last_searched = Column(DateTime, server_default=func.now())
+    last_searched = Column(DateTime, default=datetime.utcnow, server_default=func.now())  # Clave de paginación
     created_at = Column(DateTime, server_default=func.now())
     
     # Relación con usuario
     user = relationship("User", back_populates="search_history")
 
+    # Índice para la paginación por keyset del historial; una sola fila por Pokémon y usuario
+    # (la acumula el upsert de track_pokemon_searches; en bases existentes: dedupe_search_history.py)
+    __table_args__ = (
+        Index("ix_search_history_user_rank", "user_id", "search_count", "last_searched", "id"),
+        Index("uq_search_history_user_pokemon", "user_id", "pokemon_id", unique=True),
+    )
+
+
+class SearchHistoryDaily(Base):
+    """Agregado diario por Pokémon de las búsquedas eliminadas por la retención."""
+    __tablename__ = "search_history_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)  # Día de la última búsqueda de las filas agregadas
+    pokemon_id = Column(Integer, nullable=False)
+    pokemon_name = Column(String(100), nullable=False)
+    pokemon_sprite = Column(String(500))
+    pokemon_types = Column(JSON)
+    search_count = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "pokemon_id", name="uq_search_history_daily_day_pokemon"),
+    )
+
+
+class PokemonSpecies(Base):
+    """Catálogo compartido por pokemon_id: sprite y tipos guardados una sola vez."""
+    __tablename__ = "pokemon_species"
+
+    pokemon_id = Column(Integer, primary_key=True, autoincrement=False)  # ID del pokémon de la API
+    pokemon_name = Column(String(100), nullable=False)
+    pokemon_sprite = Column(String(500))
+    pokemon_types = Column(JSON)  # ["grass", "poison"]
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class SimilarUserSuggestion(Base):
+    """Sugerencias precalculadas por usuario a partir del historial de sus vecinos más parecidos."""
+    __tablename__ = "similar_user_suggestions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, autoincrement=False)
+    suggestions = Column(JSON, nullable=False)  # [[pokemon_id, score], ...] de mayor a menor
+    neighbors = Column(Integer, nullable=False)  # Vecinos usados en el cálculo
+    built_at = Column(DateTime, nullable=False)
+
 
 class PokemonTeam(Base):
     __tablename__ = "pokemon_teams"
@@ -123,13 +178,18 @@ class PokemonTeam(Base):
     team_name = Column(String(100), nullable=False)
     description = Column(String(500))
     is_favorite = Column(Boolean, default=False)
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now())  # Clave de paginación
     updated_at = Column(DateTime, onupdate=func.now())
     
     # Relaciones
     user = relationship("User", back_populates="pokemon_teams")
     team_members = relationship("PokemonTeamMember", back_populates="team", cascade="all, delete-orphan")
 
+    # Índice para la paginación por keyset del listado de equipos
+    __table_args__ = (
+        Index("ix_pokemon_teams_user_order", "user_id", "is_favorite", "created_at", "id"),
+    )
+
 
 class PokemonTeamMember(Base):
     __tablename__ = "pokemon_team_members"
@@ -156,3 +216,47 @@ class PokemonTeamMember(Base):
     
     # Relación
     team = relationship("PokemonTeam", back_populates="team_members")
+
+
+class TeamSnapshot(Base):
+    """Copia inmutable de un equipo para compartir; el id se deriva del contenido."""
+    __tablename__ = "team_snapshots"
+
+    id = Column(String(16), primary_key=True)  # sha256 truncado en base64 URL
+    payload = Column(LargeBinary, nullable=False)  # Equipo codificado (team_snapshots.encode_team)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    """Respuesta de un POST enviado con cabecera Idempotency-Key, para devolverla igual en los reintentos."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    endpoint = Column(String(100), nullable=False)  # "POST /training", ...
+    request_hash = Column(String(64), nullable=False)  # sha256 del cuerpo de la petición
+    status_code = Column(Integer)  # NULL mientras la petición original está en curso
+    response_body = Column(JSON)
+    created_at = Column(DateTime, nullable=False)  # Reserva de la clave; la renueva quien retoma una abandonada
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id = Column(String(36), primary_key=True)  # UUID del trabajo
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String(50), nullable=False)  # "load_team_for_training", "import_teams", ...
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, retrying, completed, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Optional, Any
+from datetime import datetime
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
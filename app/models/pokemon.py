@@ -88,6 +88,40 @@ class TrainingSessionResponse(BaseModel):
                 "back_shiny": self.pokemon_sprite
             }
 
+# Modelos para el simulador de repartos de EVs (POST /training/{session_id}/simulate)
+class EVSimulationTarget(BaseModel):
+    stat: str = "speed"
+    value: Optional[int] = None  # Valor a alcanzar (>=)
+    outspeed_base: Optional[int] = Field(None, ge=1, le=255, description="Base del rival a superar en `stat`")
+    rival_evs: int = Field(252, ge=0, le=252)
+    rival_ivs: int = Field(31, ge=0, le=31)
+    rival_nature: str = Field("neutral", pattern="^(plus|neutral|minus)$")
+
+class EVSimulationRequest(BaseModel):
+    spreads: List[Dict[str, int]] = Field(..., min_length=1, max_length=10000, description="Repartos candidatos de EVs")
+    level: int = Field(50, ge=1, le=100)
+    nature: Optional[str] = None  # None = neutra
+    ivs: Optional[Dict[str, int]] = None  # Por defecto 31 en todas
+    target: Optional[EVSimulationTarget] = None
+    limit: int = Field(20, ge=1, le=100)  # Repartos devueltos tras ordenar
+
+class EVSpreadResult(BaseModel):
+    index: int  # Posición en `spreads`
+    evs: Dict[str, int]
+    stats: Dict[str, int]
+    meets_target: Optional[bool] = None
+    margin: Optional[int] = None  # stats[target.stat] - umbral
+
+class EVSimulationResponse(BaseModel):
+    session_id: int
+    level: int
+    nature: Optional[str]
+    threshold: Optional[int]  # Valor que hay que alcanzar en target.stat
+    evaluated: int
+    meeting_target: Optional[int]
+    invalid_indexes: List[int]  # Repartos descartados (> 252 en una estadística, > 510 en total...)
+    results: List[EVSpreadResult]
+
 # Modelos para Favorite Pokemon
 class FavoritePokemonCreate(BaseModel):
     pokemon_id: int
@@ -116,6 +150,14 @@ class SearchHistoryCreate(BaseModel):
     pokemon_sprite: Optional[str] = None
     pokemon_types: Optional[List[str]] = None
 
+# Resultado de GET /search/autocomplete; se puede enviar tal cual a POST /search/track
+class PokemonCompletion(BaseModel):
+    pokemon_id: int
+    pokemon_name: str
+    pokemon_sprite: Optional[str]
+    pokemon_types: Optional[List[str]]
+    popularity: int  # Búsquedas globales de la especie
+
 class SearchHistoryResponse(BaseModel):
     id: int
     user_id: int
@@ -130,13 +172,26 @@ class SearchHistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Modelos para registrar búsquedas en lote (POST /search/track/batch)
+class SearchHistoryBatchItem(SearchHistoryCreate):
+    searched_at: Optional[datetime] = None  # Momento de la búsqueda en el cliente
+
+class SearchHistoryBatchRequest(BaseModel):
+    items: List[SearchHistoryBatchItem] = Field(..., min_length=1, max_length=500)
+
+class SearchHistoryBatchResponse(BaseModel):
+    received: int  # Búsquedas enviadas
+    tracked: int   # Pokémon distintos tras agrupar duplicados
+    created: int
+    updated: int
+
 class SmartFavoriteResponse(BaseModel):
     pokemon_id: int
     pokemon_name: str
     pokemon_sprite: Optional[str]
     pokemon_types: Optional[List[str]]
     relevance_score: float
-    source: str  # "search_history", "global_popular", "team_usage"
+    source: str  # "search_history", "global_popular", "team_usage", "similar_users"
 
     class Config:
         from_attributes = True
@@ -209,6 +264,19 @@ class PokemonTeamUpdate(BaseModel):
     is_favorite: Optional[bool] = None
     team_members: Optional[List[PokemonTeamMemberCreate]] = None
 
+# Snapshots para compartir equipos (POST /teams/{team_id}/share, GET /snapshots/{snapshot_id})
+class TeamShareResponse(BaseModel):
+    snapshot_id: str
+    url: str
+    size_bytes: int  # Tamaño del equipo codificado
+
+class TeamSnapshotResponse(BaseModel):
+    snapshot_id: str
+    team_name: str
+    description: Optional[str]
+    team_members: List[PokemonTeamMemberCreate]
+    created_at: Optional[datetime]
+
 class PokemonTeamResponse(BaseModel):
     id: int
     user_id: int
@@ -222,6 +290,88 @@ class PokemonTeamResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Modelos para importación masiva de equipos
+class BulkTeamImportRequest(BaseModel):
+    teams: List[PokemonTeamCreate] = Field(..., min_length=1, max_length=5000)
+
+class BulkTeamImportError(BaseModel):
+    index: int  # Posición del equipo en la lista enviada
+    team_name: str
+    error: str
+
+class BulkTeamImportResponse(BaseModel):
+    created_count: int
+    failed_count: int
+    team_ids: List[int]
+    errors: List[BulkTeamImportError]
+
+# Proyección ligera para el listado de equipos (GET /teams?view=summary)
+class PokemonTeamMemberSummary(BaseModel):
+    pokemon_id: int
+    pokemon_name: str
+    pokemon_sprite: Optional[str]
+    position: int
+
+    class Config:
+        from_attributes = True
+
+class PokemonTeamSummaryResponse(BaseModel):
+    id: int
+    team_name: str
+    is_favorite: bool
+    team_members: List[PokemonTeamMemberSummary]
+
+    class Config:
+        from_attributes = True
+
+# Análisis de tipos de un equipo (GET /teams/{team_id}/analysis)
+class TeamTypeMatchup(BaseModel):
+    type: str  # Tipo atacante
+    weak: int  # Miembros que reciben x2 o más
+    resist: int  # Miembros que reciben x0.5 o menos
+    immune: int  # Miembros que reciben x0
+
+class TeamAnalysisResponse(BaseModel):
+    team_id: int
+    analyzed_members: int
+    unknown_type_positions: List[int]  # Miembros sin tipos conocidos (no cuentan)
+    defensive: List[TeamTypeMatchup]
+    weaknesses: List[str]  # Tipos con más miembros débiles que resistentes, los peores primero
+    resistances: List[str]
+    offensive_coverage: List[str]  # Tipos a los que algún miembro pega x2 con su STAB
+    coverage_gaps: List[str]
+
+# Sugerencias para completar un equipo (GET /teams/suggestions)
+class TeamSuggestion(BaseModel):
+    pokemon_id: int
+    pokemon_name: Optional[str]
+    pokemon_sprite: Optional[str]
+    pokemon_types: Optional[List[str]]
+    score: float
+    teams_together: int  # Equipos guardados donde aparece junto a los miembros dados
+
+# Estadísticas agregadas de los equipos de todos los usuarios (GET /stats/teams)
+class PokemonUsageStat(BaseModel):
+    pokemon_id: int
+    pokemon_name: Optional[str]
+    pokemon_sprite: Optional[str]
+    teams: int  # Equipos que lo incluyen
+    usage_pct: float  # % de equipos
+    average_evs: Optional[Dict[str, float]]  # Media de los miembros con EVs guardados
+
+class UsageCount(BaseModel):
+    name: str
+    count: int  # Miembros de equipo
+    usage_pct: float  # % de todos los miembros
+
+class TeamStatsResponse(BaseModel):
+    teams: int
+    members: int
+    pokemon: List[PokemonUsageStat]
+    held_items: List[UsageCount]
+    natures: List[UsageCount]
+    rebuilt_at: Optional[datetime]  # Último recálculo completo (None = aún no)
+
 # Modelos para actualización de miembros de equipo
 class UpdateNicknameRequest(BaseModel):
     nickname: Optional[str] = Field(None, max_length=20, description="Nickname del Pokémon (máx 20 caracteres)")
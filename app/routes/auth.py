@@ -6,6 +6,10 @@ from app.models.database import User
 from app.service.auth import create_user, authenticate_user, create_access_token, get_current_user
 from app.database import get_db
 from datetime import timedelta
+import logging
+from app.utils.log import get_logger, log_event
+
+logger = get_logger("auth")
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
@@ -52,13 +56,9 @@ async def login_json(credentials: UserLogin, db: Session = Depends(get_db)):
     """
     Endpoint de login que acepta JSON (para aplicaciones SPA como Angular).
     """
-    # Log temporal para debug
-    print(f"🔵 LOGIN JSON - Email: {credentials.email}, Password length: {len(credentials.password)}")
-    
     try:
         user = authenticate_user(credentials.email, credentials.password, db)
         if not user:
-            print(f"❌ Login fallido para: {credentials.email}")
             raise HTTPException(
                 status_code=401, 
                 detail="Credenciales incorrectas"
@@ -70,8 +70,6 @@ async def login_json(credentials: UserLogin, db: Session = Depends(get_db)):
             expires_delta=access_token_expires
         )
         
-        print(f"✅ Login exitoso: {user.email}")
-        
         return {
             "access_token": access_token,
             "token_type": "bearer",
@@ -80,7 +78,7 @@ async def login_json(credentials: UserLogin, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Exception: {type(e).__name__}: {str(e)}")
+        log_event(logger, logging.ERROR, "login_error", error_type=type(e).__name__, error=str(e))
         raise HTTPException(
             status_code=401, 
             detail="Credenciales incorrectas"
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from app.models.database import User
+from app.models.job import JobResponse
+from app.service.auth import get_current_user
+from app.service.jobs import get_user_job
+from app.database import get_db
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Consultar el estado de un trabajo en segundo plano.
+    
+    Estados: queued, running, retrying, completed, failed. Cuando termina,
+    "result" contiene la misma respuesta que daría el endpoint síncrono.
+    """
+    try:
+        return get_user_job(current_user.id, job_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.pokemon import (
     UserPokemonCreate, UserPokemonResponse,
     TrainingSessionCreate, TrainingSessionUpdate, TrainingSessionResponse,
+    EVSimulationRequest, EVSimulationResponse,
     FavoritePokemonCreate, FavoritePokemonResponse,
     SearchHistoryCreate, SearchHistoryResponse, SmartFavoriteResponse,
+    SearchHistoryBatchRequest, SearchHistoryBatchResponse,
     PokemonTeamCreate, PokemonTeamUpdate, PokemonTeamResponse,
     PokemonTeamMemberResponse, UpdateNicknameRequest, UpdateLevelRequest,
-    UpdateMovesRequest
+    UpdateMovesRequest, PokemonTeamSummaryResponse,
+    BulkTeamImportRequest, BulkTeamImportResponse, TeamAnalysisResponse, TeamSuggestion,
+    PokemonCompletion, TeamStatsResponse, TeamShareResponse, TeamSnapshotResponse
 )
 from app.utils.validators import validate_nickname
 from app.models.database import User, UserPokemon, TrainingSession, PokemonTeam, PokemonTeamMember
@@ -16,16 +21,46 @@ from app.service.pokemon import (
     add_pokemon_to_team, get_user_team, remove_pokemon_from_team,
     create_training_session, update_training_session, get_user_training_sessions, delete_training_session,
     add_favorite_pokemon, get_user_favorites, increment_pokemon_usage, remove_favorite_pokemon,
-    track_pokemon_search, get_user_search_history, get_smart_favorites,
+    track_pokemon_search, track_pokemon_searches, get_user_search_history, get_smart_favorites,
     create_pokemon_team, get_user_teams, get_team_by_id, 
-    update_pokemon_team, delete_pokemon_team, toggle_favorite_team
+    update_pokemon_team, delete_pokemon_team, toggle_favorite_team,
+    load_team_for_training
 )
 from app.service.auth import get_current_user
+from app.service.export import stream_user_export
+from app.service.team_import import import_teams
+from app.service.team_analysis import get_team_analysis
+from app.service.ev_simulator import simulate_training_session
+from app.service.team_snapshots import (
+    create_team_snapshot, get_team_snapshot, snapshot_response, snapshot_to_team
+)
+from app.service.recommender import team_recommender, MAX_SUGGESTIONS
+from app.service.autocomplete import autocomplete_index, MAX_COMPLETIONS
+from app.service.team_stats import team_stats, from_member, MAX_STATS_ROWS
+from app.service.jobs import job_runner, QueueFullError
+from app.service.idempotency import run_idempotent, IdempotencyConflictError
+from app.models.job import JobAcceptedResponse
 from app.database import get_db
 from app.utils.validators import validate_nickname
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 
+# Los snapshots compartidos no cambian: un año en navegadores y CDN
+SNAPSHOT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Cabecera con el cursor de la página siguiente (el cuerpo sigue siendo una lista)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def set_next_cursor(response: Response, next_cursor: str | None):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def job_accepted(job) -> JobAcceptedResponse:
+    return JobAcceptedResponse(job_id=job.id, status=job.status, status_url=f"/api/jobs/{job.id}")
+
 # ===== UTILIDADES DE LIMPIEZA =====
 
 @router.delete("/team/clear-all")
@@ -87,19 +122,47 @@ async def clear_all_training_sessions(
             detail=f"Error al limpiar sesiones de training: {str(e)}"
         )
 
+# ===== EXPORTACIÓN =====
+
+@router.get("/export")
+async def export_user_data(
+    format: str = Query("ndjson", pattern="^(ndjson|gzip)$"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Exportar equipos, sesiones de training e historial del usuario en NDJSON.
+
+    Una línea por registro: {"type": "team" | "training_session" | "search_history", "data": {...}}.
+    La respuesta se genera en streaming con memoria constante; con
+    ?format=gzip se envía comprimida como fichero .ndjson.gz.
+    """
+    compress = format == "gzip"
+    filename = f"pokemon-export-{current_user.id}.ndjson" + (".gz" if compress else "")
+    return StreamingResponse(
+        stream_user_export(current_user.id, compress=compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # ===== EQUIPO POKÉMON =====
 
 @router.post("/team", response_model=UserPokemonResponse)
 async def add_to_team(
     pokemon_data: UserPokemonCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
 
     try:
-        return add_pokemon_to_team(current_user.id, pokemon_data, db)
+        return run_idempotent(
+            db, current_user.id, idempotency_key, "POST /team", pokemon_data,
+            lambda session: add_pokemon_to_team(current_user.id, pokemon_data, session), UserPokemonResponse
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -124,17 +187,35 @@ async def remove_from_team(
 @router.post("/training", response_model=TrainingSessionResponse)
 async def create_session(
     session_data: TrainingSessionCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return create_training_session(current_user.id, session_data, db)
+    # Sin Idempotency-Key también es idempotente: una sesión por Pokémon (la existente se devuelve)
+    try:
+        return run_idempotent(
+            db, current_user.id, idempotency_key, "POST /training", session_data,
+            lambda session: create_training_session(current_user.id, session_data, session), TrainingSessionResponse
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 @router.get("/training", response_model=List[TrainingSessionResponse])
 async def get_sessions(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_training_sessions(current_user.id, db)
+    try:
+        sessions, next_cursor = get_user_training_sessions(current_user.id, db, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor)
+    return sessions
 
 @router.put("/training/{session_id}", response_model=TrainingSessionResponse)
 async def update_session(
@@ -148,6 +229,19 @@ async def update_session(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/training/{session_id}/simulate", response_model=EVSimulationResponse)
+async def simulate_session(
+    session_id: int,
+    simulation: EVSimulationRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Evaluar muchos repartos de EVs a la vez (sin guardarlos) y ordenarlos según un objetivo."""
+    try:
+        return simulate_training_session(current_user.id, session_id, simulation, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/training/{session_id}")
 async def delete_session(
     session_id: int,
@@ -173,11 +267,18 @@ async def add_to_favorites(
 
 @router.get("/favorites", response_model=List[FavoritePokemonResponse])
 async def get_favorites(
-    limit: int = 5,  # AGREGAR PARÁMETRO LIMIT
+    response: Response,
+    limit: int = Query(5, ge=1, le=MAX_PAGE_SIZE),  # AGREGAR PARÁMETRO LIMIT
+    cursor: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_favorites(current_user.id, limit, db)  # PASAR LIMIT
+    try:
+        favorites, next_cursor = get_user_favorites(current_user.id, limit, db, cursor)  # PASAR LIMIT
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor)
+    return favorites
 
 @router.post("/favorites/{pokemon_id}/use")
 async def use_pokemon(
@@ -205,11 +306,12 @@ async def remove_from_favorites(
 @router.get("/favorites/smart", response_model=List[SmartFavoriteResponse])
 async def get_smart_favorites_endpoint(
     limit: int = 5,
+    mode: str = Query("history", pattern="^(history|similar)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
-        return get_smart_favorites(current_user.id, limit, db)
+        return get_smart_favorites(current_user.id, limit, db, mode)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener favoritos inteligentes: {str(e)}")
 
@@ -225,15 +327,48 @@ async def track_pokemon_search_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al registrar búsqueda: {str(e)}")
 
+@router.post("/search/track/batch", response_model=SearchHistoryBatchResponse)
+async def track_pokemon_searches_endpoint(
+    batch: SearchHistoryBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Registrar varias búsquedas a la vez (el frontend las acumula y las envía juntas).
+    
+    Las búsquedas repetidas del mismo Pokémon se agrupan en una sola
+    actualización del contador.
+    """
+    try:
+        return track_pokemon_searches(current_user.id, batch.items, db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al registrar búsquedas: {str(e)}")
+
+@router.get("/search/autocomplete", response_model=List[PokemonCompletion])
+async def autocomplete_pokemon(
+    q: str = Query(..., min_length=1, max_length=50, description="Prefijo del nombre o número de Pokédex"),
+    limit: int = Query(8, ge=1, le=MAX_COMPLETIONS),
+    current_user: User = Depends(get_current_user)
+):
+    """Autocompletar nombres de Pokémon por popularidad global; la elegida se registra con POST /search/track."""
+    return autocomplete_index.complete(q, limit)
+
+
 @router.get("/search/history", response_model=List[SearchHistoryResponse])
 async def get_user_search_history_endpoint(
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     
     try:
-        return get_user_search_history(current_user.id, limit, db)
+        history, next_cursor = get_user_search_history(current_user.id, limit, db, cursor)
+        set_next_cursor(response, next_cursor)
+        return history
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
 
@@ -241,12 +376,19 @@ async def get_user_search_history_endpoint(
 
 @router.get("/favorites/legacy", response_model=List[FavoritePokemonResponse])
 async def get_favorites_legacy(
-    limit: int = 5,
+    response: Response,
+    limit: int = Query(5, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
 
-    return get_user_favorites(current_user.id, limit, db)
+    try:
+        favorites, next_cursor = get_user_favorites(current_user.id, limit, db, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, next_cursor)
+    return favorites
 
 @router.post("/teams", response_model=PokemonTeamResponse, status_code=status.HTTP_201_CREATED)
 async def create_team(
@@ -274,18 +416,96 @@ async def create_team(
         raise HTTPException(status_code=500, detail=f"Error al crear equipo: {str(e)}")
 
 
-@router.get("/teams", response_model=List[PokemonTeamResponse])
+@router.post("/teams/import", response_model=BulkTeamImportResponse | JobAcceptedResponse)
+async def import_teams_endpoint(
+    import_data: BulkTeamImportRequest,
+    response: Response,
+    background: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Importar varios equipos en una sola petición (migración desde otros team builders).
+
+    Los equipos inválidos se devuelven en "errors" con su índice y no
+    impiden guardar el resto. Con ?background=true se responde 202 Accepted
+    y el resultado queda en GET /api/jobs/{job_id}.
+    """
+    try:
+        if background:
+            user_id = current_user.id
+            teams = import_data.teams
+            job = job_runner.submit(
+                db, user_id, "import_teams",
+                lambda job_db: import_teams(user_id, teams, job_db).model_dump()
+            )
+            response.status_code = status.HTTP_202_ACCEPTED
+            return job_accepted(job)
+
+        return import_teams(current_user.id, import_data.teams, db)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al importar equipos: {str(e)}")
+
+
+@router.get("/teams", response_model=List[PokemonTeamResponse] | List[PokemonTeamSummaryResponse])
 async def get_all_teams(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    view: str = Query("full", pattern="^(full|summary)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Listar equipos paginados por keyset.
+
+    Si hay más resultados, el cursor de la siguiente página se devuelve en la
+    cabecera X-Next-Cursor; basta con repetir la petición con ?cursor=<valor>.
+
+    Con ?view=summary se devuelve la proyección ligera PokemonTeamSummaryResponse
+    (nombre, favorito y sprites de los miembros) para la pantalla de listado.
+    """
 
     try:
-        return get_user_teams(current_user.id, db)
+        if view == "summary":
+            teams, next_cursor = get_user_teams(current_user.id, db, limit, cursor, summary=True)
+            # Ya validados: el resto de columnas no se cargan y no deben leerse
+            teams = [PokemonTeamSummaryResponse.model_validate(team) for team in teams]
+        else:
+            teams, next_cursor = get_user_teams(current_user.id, db, limit, cursor)
+        set_next_cursor(response, next_cursor)
+        return teams
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener equipos: {str(e)}")
 
 
+# Antes de /teams/{team_id}: si no, "suggestions" se tomaría como team_id
+@router.get("/teams/suggestions", response_model=List[TeamSuggestion])
+async def get_team_suggestions(
+    pokemon_id: List[int] = Query([], description="pokemon_id de los miembros ya elegidos (repetible)"),
+    limit: int = Query(5, ge=1, le=MAX_SUGGESTIONS),
+    current_user: User = Depends(get_current_user)
+):
+    """Sugerir miembros para completar un equipo según los equipos guardados por todos los usuarios."""
+    if len(pokemon_id) > 6:
+        raise HTTPException(status_code=400, detail="Un equipo debe tener entre 1 y 6 Pokémon")
+    return team_recommender.suggest(pokemon_id, limit)
+
+
+@router.get("/stats/teams", response_model=TeamStatsResponse)
+async def get_team_stats(
+    limit: int = Query(10, ge=1, le=MAX_STATS_ROWS),
+    current_user: User = Depends(get_current_user)
+):
+    """Pokémon más usados, objetos y naturalezas más comunes y EVs medios en los equipos de todos los usuarios."""
+    return team_stats.summary(limit)
+
+
 @router.get("/teams/{team_id}", response_model=PokemonTeamResponse)
 async def get_team(
     team_id: int,
@@ -347,155 +567,117 @@ async def toggle_team_favorite(
         raise HTTPException(status_code=500, detail=f"Error al actualizar favorito: {str(e)}")
 
 
+@router.get("/teams/{team_id}/analysis", response_model=TeamAnalysisResponse)
+async def get_team_type_analysis(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Debilidades, resistencias y cobertura de tipos del equipo."""
+    try:
+        return get_team_analysis(current_user.id, team_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al analizar equipo: {str(e)}")
+
+
+@router.post("/teams/{team_id}/share", response_model=TeamShareResponse, status_code=status.HTTP_201_CREATED)
+async def share_team(
+    team_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Congelar el equipo en un snapshot inmutable con URL corta; compartirlo otra vez sin cambios da la misma."""
+    try:
+        snapshot = create_team_snapshot(current_user.id, team_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TeamShareResponse(
+        snapshot_id=snapshot.id,
+        url=f"/api/pokemon/snapshots/{snapshot.id}",
+        size_bytes=len(snapshot.payload)
+    )
+
+
+@router.get("/snapshots/{snapshot_id}", response_model=TeamSnapshotResponse)
+async def get_snapshot(
+    snapshot_id: str,
+    request: Request,
+    response: Response,
+    format: str = Query("json", pattern="^(json|binary)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Equipo compartido, sin autenticación.
+
+    El contenido de un snapshot no cambia nunca, así que se sirve con caché
+    de un año e `immutable`: navegadores y CDN no vuelven a preguntar. Con
+    ?format=binary se envía la codificación compacta tal cual.
+    """
+    headers = {"Cache-Control": SNAPSHOT_CACHE_CONTROL, "ETag": f'"{snapshot_id}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    try:
+        snapshot = get_team_snapshot(snapshot_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if format == "binary":
+        return Response(content=snapshot.payload, media_type="application/octet-stream", headers=headers)
+    response.headers.update(headers)
+    return snapshot_response(snapshot)
+
+
+@router.post("/snapshots/{snapshot_id}/import", response_model=PokemonTeamResponse, status_code=status.HTTP_201_CREATED)
+async def import_snapshot(
+    snapshot_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Recrear un equipo compartido como equipo propio (en una sola transacción)."""
+    try:
+        snapshot = get_team_snapshot(snapshot_id, db)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        return create_pokemon_team(current_user.id, snapshot_to_team(snapshot), db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/teams/{team_id}/load-for-training")
-async def load_team_for_training(
+async def load_team_for_training_endpoint(
     team_id: int,
+    response: Response,
+    background: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Cargar un equipo guardado para entrenamiento.
     
-    Proceso:
-    1. Obtener el equipo guardado y validar que pertenece al usuario
-    2. Limpiar equipo actual (user_pokemon) y sesiones de training existentes
-    3. Copiar Pokémon del equipo guardado al equipo actual (user_pokemon)
-    4. Crear sesiones de training con los EVs existentes (obtiene base_stats de PokeAPI)
-    5. Hacer commit y verificar que todo se cargó correctamente
+    Ver load_team_for_training en el servicio para el detalle del proceso.
     
-    IMPORTANTE: Los Pokémon se agregan a user_pokemon para que el componente
-    training pueda consultarlos y mostrarlos correctamente.
+    Con ?background=true el trabajo se encola y se responde 202 Accepted con
+    el ID del trabajo; su estado se consulta en GET /api/jobs/{job_id}.
     """
-    import requests
-    
     try:
-        # 1. Obtener el equipo guardado
-        team = db.query(PokemonTeam).filter(
-            PokemonTeam.id == team_id,
-            PokemonTeam.user_id == current_user.id
-        ).first()
-        
-        if not team:
-            raise HTTPException(status_code=404, detail="Equipo no encontrado")
-        
-        # 2. Limpiar equipo actual y sesiones de training existentes
-        db.query(UserPokemon).filter(UserPokemon.user_id == current_user.id).delete()
-        db.query(TrainingSession).filter(TrainingSession.user_id == current_user.id).delete()
-        db.commit()
-        
-        # 3. Cargar Pokémon del equipo guardado al equipo actual (user_pokemon)
-        team_loaded = []
-        for member in team.team_members:
-            team_pokemon = UserPokemon(
-                user_id=current_user.id,
-                pokemon_id=member.pokemon_id,
-                pokemon_name=member.pokemon_name,
-                pokemon_sprite=member.pokemon_sprite,
-                selected_ability=member.selected_ability or '',
-                level=member.level
-            )
-            db.add(team_pokemon)
-            db.flush()
-            team_loaded.append(team_pokemon)
-        
-        db.commit()
-        
-        # 4. Crear sesiones de training para cada Pokémon
-        sessions_created = []
-        
-        for member in team.team_members:
-            # Obtener estadísticas base de PokeAPI
-            try:
-                response = requests.get(
-                    f"https://pokeapi.co/api/v2/pokemon/{member.pokemon_id}", 
-                    timeout=5
-                )
-                pokemon_data = response.json()
-                base_stats = {
-                    'hp': pokemon_data['stats'][0]['base_stat'],
-                    'attack': pokemon_data['stats'][1]['base_stat'],
-                    'defense': pokemon_data['stats'][2]['base_stat'],
-                    'special-attack': pokemon_data['stats'][3]['base_stat'],
-                    'special-defense': pokemon_data['stats'][4]['base_stat'],
-                    'speed': pokemon_data['stats'][5]['base_stat']
-                }
-            except Exception:
-                # Valores por defecto si falla la API
-                base_stats = {
-                    'hp': 50,
-                    'attack': 50,
-                    'defense': 50,
-                    'special-attack': 50,
-                    'special-defense': 50,
-                    'speed': 50
-                }
-            
-            # EVs actuales del equipo guardado
-            current_evs = member.evs or {
-                'hp': 0,
-                'attack': 0,
-                'defense': 0,
-                'special-attack': 0,
-                'special-defense': 0,
-                'speed': 0
-            }
-            
-            total_evs = sum(current_evs.values())
-            remaining_points = 510 - total_evs
-            
-            # Calcular max_evs (estadísticas con EVs aplicados)
-            max_evs = {
-                'hp': base_stats['hp'] + int(current_evs.get('hp', 0) / 4),
-                'attack': base_stats['attack'] + int(current_evs.get('attack', 0) / 4),
-                'defense': base_stats['defense'] + int(current_evs.get('defense', 0) / 4),
-                'special-attack': base_stats['special-attack'] + int(current_evs.get('special-attack', 0) / 4),
-                'special-defense': base_stats['special-defense'] + int(current_evs.get('special-defense', 0) / 4),
-                'speed': base_stats['speed'] + int(current_evs.get('speed', 0) / 4)
-            }
-            
-            training_session = TrainingSession(
-                user_id=current_user.id,
-                pokemon_id=member.pokemon_id,
-                pokemon_name=member.pokemon_name,
-                pokemon_sprite=member.pokemon_sprite,
-                pokemon_types=member.pokemon_types,
-                base_stats=base_stats,
-                current_evs=current_evs,
-                max_evs=max_evs,
-                total_ev_points=total_evs,
-                max_ev_points=510,
-                remaining_points=remaining_points,
-                is_completed=remaining_points <= 0
+        if background:
+            get_team_by_id(current_user.id, team_id, db)
+            user_id = current_user.id
+            job = job_runner.submit(
+                db, user_id, "load_team_for_training",
+                lambda job_db: load_team_for_training(user_id, team_id, job_db)
             )
-            db.add(training_session)
-            db.flush()
-            sessions_created.append(training_session)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return job_accepted(job)
         
-        db.commit()
-        
-        # Verificación final
-        loaded_team = db.query(UserPokemon).filter(UserPokemon.user_id == current_user.id).all()
-        
-        return {
-            "message": f"Equipo '{team.team_name}' cargado exitosamente para entrenamiento",
-            "team_loaded": {
-                "id": team.id,
-                "name": team.team_name,
-                "pokemon_count": len(loaded_team)
-            },
-            "sessions_created": [
-                {
-                    "id": session.id,
-                    "pokemon_name": session.pokemon_name,
-                    "current_evs": session.current_evs,
-                    "training_points": session.remaining_points
-                }
-                for session in sessions_created
-            ]
-        }
+        return load_team_for_training(current_user.id, team_id, db)
         
-    except HTTPException:
-        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -550,6 +732,7 @@ async def update_team_evs(
         
         # 3. Actualizar EVs de cada Pokémon
         updated_count = 0
+        previous_stats, updated_stats = [], []
         for update_data in updated_members:
             pokemon_id = update_data.get('pokemon_id')
             new_evs = update_data.get('evs')
@@ -564,13 +747,16 @@ async def update_team_evs(
             ).first()
             
             if member:
+                previous_stats.append(from_member(member))
                 member.evs = new_evs
+                updated_stats.append(from_member(member))
                 updated_count += 1
         
         # 4. Actualizar timestamp del equipo
         team.updated_at = datetime.utcnow()
         
         db.commit()
+        team_stats.apply(removed=previous_stats, added=updated_stats)
         
         return {
             "message": f"EVs actualizados en {updated_count} Pokémon",
@@ -7,16 +7,13 @@ from fastapi import HTTPException, status, Depends
 from app.models.user import UserCreate
 from app.models.database import User
 from app.database import get_db
+from app.utils.metrics import bcrypt_queue_depth
+from app.utils.log import get_logger, log_event, mask_email, LOG_SAMPLE_RATE
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-import os
-from dotenv import load_dotenv
+from app.config import get_settings
+import logging
 
-load_dotenv()
-
-# Configuración desde variables de entorno
-secret_key = os.getenv("SECRET_KEY", "default-secret-key-change-this")
-algorithm = "HS256"
-access_token_expire_minutes = 30
+logger = get_logger("auth")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
@@ -42,27 +39,36 @@ def create_user(user_data: UserCreate, db: Session):
     return {"message": "Usuario creado", "user": {"id": db_user.id, "email": db_user.email}}
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    bcrypt_queue_depth.inc()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        bcrypt_queue_depth.dec()
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    bcrypt_queue_depth.inc()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        bcrypt_queue_depth.dec()
 
 def get_user_by_email(email: str, db: Session):
     return db.query(User).filter(User.email == email).first()
 
 def authenticate_user(email: str, password: str, db: Session):
-    print(f"🔍 Autenticando: {email}")
     user = get_user_by_email(email, db)
     if not user:
-        print(f"❌ Usuario no existe: {email}")
+        log_event(logger, logging.WARNING, "login_failed", reason="unknown_user", email=mask_email(email))
         return False
     
-    print(f"✅ Usuario encontrado: {user.email}")
     is_valid = verify_password(password, user.hashed_password)
-    print(f"🔑 Password válida: {is_valid}")
     
     if not is_valid:
+        log_event(logger, logging.WARNING, "login_failed", reason="bad_password", user_id=user.id)
         return False
+    
+    # Evento de alto volumen: solo se conserva una muestra
+    log_event(logger, logging.INFO, "login_succeeded", sample_rate=LOG_SAMPLE_RATE, user_id=user.id)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -72,7 +78,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
+    settings = get_settings()
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
@@ -82,7 +89,8 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+        settings = get_settings()
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
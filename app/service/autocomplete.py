@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import logging
+import os
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.database import SearchHistory, SearchHistoryDaily
+from app.models.pokemon import PokemonCompletion
+from app.service.catalog import Species, species_catalog
+from app.service.pokedex import get_pokedex
+from app.utils.log import get_logger, log_event
+
+# Segundos entre reconstrucciones del índice (especies nuevas y popularidad global; 0 = solo al arrancar)
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "300"))
+
+# Resultados máximos por consulta
+MAX_COMPLETIONS = 20
+
+logger = get_logger("autocomplete")
+
+
+def normalize(text: str) -> str:
+    """Mismo formato que los nombres de PokeAPI: minúsculas y guiones."""
+    return "-".join(text.strip().lower().replace("_", " ").split())
+
+
+def _entries(pokemon_id: int, name: str) -> Set[Tuple[str, int]]:
+    """Claves del índice de una especie: el nombre normalizado y cada parte tras un guion."""
+    key = normalize(name)
+    return {(key, pokemon_id)} | {(part, pokemon_id) for part in key.split("-")[1:] if part}
+
+
+class AutocompleteIndex:
+    """
+    Índice de prefijos sobre los nombres de especie.
+
+    Es una lista ordenada de claves (nombre normalizado y cada parte tras un
+    guion, para que "mime" encuentre "mr-mime") con su pokemon_id al lado:
+    un prefijo es el rango [bisect(prefijo), bisect(prefijo + U+FFFF)) y
+    solo se ordenan por popularidad los candidatos de ese rango.
+
+    La popularidad es la suma global de search_count (historial y agregados
+    diarios). Las búsquedas registradas en este worker la suben al momento y
+    las especies que publica su catálogo entran al momento (add); la
+    reconstrucción periódica añade las que crean otros workers y recoge sus
+    búsquedas. Las listas se sustituyen de
+    una vez, así que las lecturas no necesitan locks. La primera construcción
+    es en segundo plano: mientras dura, las consultas no devuelven nada.
+    """
+
+    def __init__(self, refresh_seconds: float = AUTOCOMPLETE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._index: Tuple[List[str], List[int]] = ([], [])
+        self.names: Dict[int, str] = {}
+        self.popularity: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def build(self) -> int:
+        """Reconstruir desde el catálogo de especies (y el pokedex offline). Devuelve el número de especies."""
+        names = {pokemon_id: species.name for pokemon_id, species in species_catalog.species.items()}
+        pokedex = get_pokedex()
+        if pokedex is not None:
+            for pokemon_id in pokedex.ids():
+                if pokemon_id not in names:
+                    names[pokemon_id] = pokedex.get(pokemon_id).name
+
+        popularity: Dict[int, int] = {}
+        db = SessionLocal()
+        try:
+            for model in (SearchHistory, SearchHistoryDaily):
+                rows = db.execute(
+                    select(model.pokemon_id, func.sum(model.search_count)).group_by(model.pokemon_id)
+                )
+                for pokemon_id, total in rows:
+                    popularity[pokemon_id] = popularity.get(pokemon_id, 0) + int(total or 0)
+        finally:
+            db.close()
+
+        entries = sorted({entry for pokemon_id, name in names.items() for entry in _entries(pokemon_id, name)})
+
+        self.names, self.popularity = names, popularity
+        self._index = ([key for key, _ in entries], [pokemon_id for _, pokemon_id in entries])
+        # Publicadas mientras se construía: la foto del catálogo es de antes
+        self.add({pokemon_id: species for pokemon_id, species in species_catalog.species.items()
+                  if pokemon_id not in names})
+        return len(self.names)
+
+    def add(self, species: Dict[int, Species]):
+        """Añadir (o renombrar) especies sin esperar a la reconstrucción; se suscribe al catálogo."""
+        changed = {pokemon_id: s.name for pokemon_id, s in species.items() if self.names.get(pokemon_id) != s.name}
+        if not changed:
+            return
+        keys, ids = self._index
+        entries = [(key, pokemon_id) for key, pokemon_id in zip(keys, ids) if pokemon_id not in changed]
+        entries.extend(entry for pokemon_id, name in changed.items() for entry in _entries(pokemon_id, name))
+        entries.sort()
+
+        # Primero los nombres: complete() lee el índice antes que ellos
+        self.names = {**self.names, **changed}
+        self._index = ([key for key, _ in entries], [pokemon_id for _, pokemon_id in entries])
+
+    def record(self, pokemon_id: int, count: int = 1):
+        """Sumar búsquedas confirmadas a la popularidad en memoria."""
+        self.popularity[pokemon_id] = self.popularity.get(pokemon_id, 0) + count
+
+    def complete(self, query: str, limit: int = 8) -> List[PokemonCompletion]:
+        """
+        Especies cuyo nombre (o una parte tras un guion) empieza por `query`.
+
+        Orden: coincidencia exacta (nombre o número de Pokédex), popularidad
+        global, nombre más corto. Los campos coinciden con los de
+        POST /search/track, así que el cliente registra la elegida enviando
+        el resultado tal cual.
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        limit = max(1, min(limit, MAX_COMPLETIONS))
+        keys, ids = self._index
+        names, popularity = self.names, self.popularity
+
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + "\uffff", lo)
+        candidates = set(ids[lo:hi])
+        exact = int(prefix) if prefix.isdigit() else None
+        if exact in names:
+            candidates.add(exact)
+
+        best = heapq.nlargest(limit, candidates, key=lambda pokemon_id: (
+            pokemon_id == exact or names[pokemon_id] == prefix,
+            popularity.get(pokemon_id, 0),
+            -len(names[pokemon_id]),
+            -pokemon_id,
+        ))
+
+        completions = []
+        for pokemon_id in best:
+            species = species_catalog.species.get(pokemon_id)
+            if species is not None:
+                sprite, types = species.sprite, species.types
+            else:
+                # Solo en el pokedex offline: aún nadie la ha buscado
+                pokedex = get_pokedex()
+                entry = pokedex.get(pokemon_id) if pokedex is not None else None
+                sprite, types = (entry.sprite, entry.types) if entry else (None, None)
+            completions.append(PokemonCompletion(
+                pokemon_id=pokemon_id,
+                pokemon_name=names[pokemon_id],
+                pokemon_sprite=sprite,
+                pokemon_types=types,
+                popularity=popularity.get(pokemon_id, 0),
+            ))
+        return completions
+
+    async def start(self):
+        # Después de species_catalog.start(): se construye con el catálogo ya cargado
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        # La primera construcción va en segundo plano: no retrasa el arranque
+        # (hasta que termina, complete() devuelve una lista vacía)
+        while True:
+            try:
+                await asyncio.to_thread(self.build)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "autocomplete_refresh_failed",
+                          error_type=type(e).__name__, error=str(e))
+            if self.refresh_seconds <= 0:
+                return
+            await asyncio.sleep(self.refresh_seconds)
+
+
+autocomplete_index = AutocompleteIndex()
+species_catalog.subscribe(autocomplete_index.add)
@@ -0,0 +1,437 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import event, insert, null, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.database import SessionLocal
+from app.models.database import (
+    UserPokemon, TrainingSession, FavoritePokemon, SearchHistory, SearchHistoryDaily,
+    PokemonTeamMember, PokemonSpecies
+)
+from app.utils.log import get_logger, log_event
+from app.utils.upsert import insert_ignore
+
+# Segundos entre recargas completas del catálogo en memoria (0 = solo al arrancar).
+# Con varios workers, un cambio de sprite hecho en uno llega a los demás en este plazo.
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "300"))
+
+# Filas por transacción al compactar las tablas existentes
+CATALOG_BACKFILL_CHUNK = int(os.getenv("CATALOG_BACKFILL_CHUNK", "1000"))
+
+# Tablas cuyas copias de sprite/tipos se guardan como NULL cuando coinciden con el catálogo
+NORMALIZED_MODELS = (
+    UserPokemon, TrainingSession, FavoritePokemon, SearchHistory, SearchHistoryDaily, PokemonTeamMember
+)
+
+logger = get_logger("catalog")
+
+# Especies creadas o cambiadas en la transacción en curso (Session.info)
+_PENDING_KEY = "pending_species"
+
+_SPECIES_FIELDS = {"pokemon_name": "name", "pokemon_sprite": "sprite", "pokemon_types": "types"}
+
+
+class Species(NamedTuple):
+    name: str
+    sprite: Optional[str]
+    types: Optional[List[str]]
+
+
+class SpeciesCatalog:
+    """
+    Copia en memoria de pokemon_species (pokemon_id -> Species).
+
+    Las tablas de usuario guardan pokemon_sprite / pokemon_types como NULL
+    cuando coinciden con el catálogo y los recuperan de aquí al cargarse
+    (evento "load" del ORM), sin consultas extra ni JOIN. Un valor propio de
+    la fila (p. ej. un sprite shiny) se conserva y tiene prioridad.
+
+    Una fila solo se compacta contra una especie "asentada": la que este
+    worker conoce con esos valores desde hace dos recargas, así que el resto
+    de workers también la tiene. Con una especie nueva o recién cambiada la
+    fila guarda sus propios valores (backfill_species_catalog.py la compacta
+    después); si no, otro worker la leería con NULL hasta su recarga.
+
+    El dict solo se sustituye o se amplía entrada a entrada, así que las
+    lecturas no necesitan locks. pokemon_name no se normaliza: es NOT NULL
+    en todas las tablas y es corto.
+    """
+
+    def __init__(self, refresh_seconds: float = CATALOG_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.species: Dict[int, Species] = {}
+        # pokemon_id -> instante (time.monotonic) desde el que todos los workers la tienen
+        self._settled_at: Dict[int, float] = {}
+        self._loaded = False
+        # Avisados con las especies nuevas o cambiadas que confirma este worker
+        self._subscribers: List[Callable[[Dict[int, Species]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> int:
+        """Cargar el catálogo completo desde la base de datos. Devuelve el número de especies."""
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(
+                PokemonSpecies.pokemon_id, PokemonSpecies.pokemon_name,
+                PokemonSpecies.pokemon_sprite, PokemonSpecies.pokemon_types
+            )).all()
+        finally:
+            db.close()
+        species = {row[0]: Species(*row[1:]) for row in rows}
+        first_load = not self._loaded
+        self._settled_at = {
+            pokemon_id: self._settled_at[pokemon_id]
+            if pokemon_id in self._settled_at and self.species.get(pokemon_id) == current
+            else self._settle_time(first_load)
+            for pokemon_id, current in species.items()
+        }
+        self.species, self._loaded = species, True
+        return len(self.species)
+
+    def _settle_time(self, first_load: bool = False) -> float:
+        if self.refresh_seconds > 0:
+            # Dos ciclos: cubre lo que tarda cada recarga además de la espera entre ellas
+            return time.monotonic() + 2 * self.refresh_seconds
+        # Sin recargas los demás workers solo tienen lo que había al arrancar
+        return -math.inf if first_load else math.inf
+
+    def settled(self, pokemon_id: int) -> bool:
+        """Si todos los workers tienen ya la especie con sus valores actuales."""
+        return self._settled_at.get(pokemon_id, math.inf) <= time.monotonic()
+
+    def get(self, pokemon_id: int) -> Optional[Species]:
+        """
+        Especie en memoria, sin consultas.
+
+        Una especie creada por otro worker después de la última recarga no
+        está hasta la siguiente (CATALOG_REFRESH_SECONDS); las filas que la
+        usan guardan sus propios valores hasta que está asentada, así que no
+        se pierde nada al leerlas.
+        """
+        return self.species.get(pokemon_id)
+
+    def register(self, db: Session, pokemon_id: int, name: str, sprite: Optional[str] = None,
+                 types: Optional[List[str]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """register_many para una sola fila."""
+        return self.register_many(db, [(pokemon_id, name, sprite, types)])[0]
+
+    def register_many(self, db: Session, entries: Sequence[Tuple[int, str, Optional[str], Optional[List[str]]]]
+                      ) -> List[Tuple[Optional[str], Optional[List[str]]]]:
+        """
+        Asegurar que las especies están en el catálogo y devolver lo que debe guardar cada fila.
+
+        `entries` son (pokemon_id, nombre, sprite, tipos) de las filas a
+        escribir. Si una especie no existe se crea con los datos de su
+        primera fila; si le falta sprite o tipos, se completan. Los valores
+        iguales a los de una especie asentada se devuelven como None (la fila
+        los hereda); los distintos, o los de una especie que algún worker aún
+        no tiene, se devuelven completos para guardarlos en la fila.
+
+        Las especies en memoria no cuestan consultas. Las que faltan se
+        buscan con un solo SELECT ... IN y las nuevas se crean con un solo
+        INSERT multi-fila que ignora las que otro worker cree a la vez, todo
+        en la transacción de `db`: el coste no crece con el número de filas.
+        Los cambios solo pasan al dict en memoria cuando la transacción se
+        confirma.
+
+        Returns:
+            (pokemon_sprite, pokemon_types) a guardar en cada fila, en el orden de `entries`
+        """
+        pending = db.info.setdefault(_PENDING_KEY, {})
+        known: Dict[int, Optional[Species]] = {}
+        for pokemon_id, _, _, _ in entries:
+            if pokemon_id not in known:
+                known[pokemon_id] = pending.get(pokemon_id) or self.species.get(pokemon_id)
+
+        missing = [pokemon_id for pokemon_id, species in known.items() if species is None]
+        if missing:
+            # Creadas por otro worker después de la última recarga: ya confirmadas, se publican
+            found = {row[0]: Species(*row[1:]) for row in db.execute(_species_query(missing))}
+            self.publish(found)
+            known.update(found)
+            new_species = {}
+            for pokemon_id, name, sprite, types in entries:
+                if known[pokemon_id] is None and pokemon_id not in new_species:
+                    new_species[pokemon_id] = Species(name, sprite, types)
+            if new_species:
+                known.update(self._insert(db, new_species))
+                pending.update((pokemon_id, new_species[pokemon_id]) for pokemon_id in new_species
+                               if known[pokemon_id] == new_species[pokemon_id])
+
+        results = []
+        for pokemon_id, _, sprite, types in entries:
+            species = known[pokemon_id]
+            if species is None:
+                # Creada por una transacción que aún no vemos: la fila guarda sus propios valores
+                results.append((sprite, types))
+                continue
+            completed = {}
+            if species.sprite is None and sprite:
+                completed["pokemon_sprite"] = sprite
+            if not species.types and types:
+                completed["pokemon_types"] = types
+            if completed:
+                species = known[pokemon_id] = self.update(db, pokemon_id, **completed)
+            if pokemon_id in pending or not self.settled(pokemon_id):
+                results.append((
+                    sprite if sprite is not None else species.sprite,
+                    types if types is not None else species.types,
+                ))
+                continue
+            results.append((
+                None if sprite is None or sprite == species.sprite else sprite,
+                None if types is None or types == species.types else types,
+            ))
+        return results
+
+    def _insert(self, db: Session, new_species: Dict[int, Species]) -> Dict[int, Optional[Species]]:
+        """Crear las especies nuevas; devuelve la especie vigente de cada una (None si no es visible)."""
+        inserted = insert_ignore(db, PokemonSpecies, [
+            {"pokemon_id": pokemon_id, "pokemon_name": s.name, "pokemon_sprite": s.sprite, "pokemon_types": s.types}
+            for pokemon_id, s in new_species.items()
+        ], ["pokemon_id"])
+        if inserted is not None:
+            return {pokemon_id: new_species[pokemon_id] if pokemon_id in inserted else None
+                    for pokemon_id in new_species}
+        # MySQL no dice cuáles entraron: lectura bloqueante, que ve la última versión confirmada
+        current = {row[0]: Species(*row[1:]) for row in db.execute(
+            _species_query(list(new_species)).with_for_update(read=True)
+        )}
+        return {pokemon_id: current.get(pokemon_id) for pokemon_id in new_species}
+
+    def update(self, db: Session, pokemon_id: int, **values: Any) -> Optional[Species]:
+        """
+        Cambiar nombre, sprite o tipos de una especie: una sola fila para todas las tablas.
+
+        Se aplica en la transacción de `db`; este worker lo ve al confirmarla
+        y el resto tras su siguiente recarga (CATALOG_REFRESH_SECONDS).
+        """
+        pending = db.info.setdefault(_PENDING_KEY, {})
+        current = pending.get(pokemon_id) or self.species.get(pokemon_id)
+        if current is None:
+            return None
+        db.execute(update(PokemonSpecies).where(PokemonSpecies.pokemon_id == pokemon_id).values(**values))
+        species = pending[pokemon_id] = current._replace(**{
+            field: values[column] for column, field in _SPECIES_FIELDS.items() if column in values
+        })
+        return species
+
+    def subscribe(self, callback: Callable[[Dict[int, Species]], None]):
+        """Llamar a `callback` con las especies nuevas o cambiadas en cuanto este worker las publica."""
+        self._subscribers.append(callback)
+
+    def publish(self, species: Dict[int, Species]):
+        changed = {pokemon_id: current for pokemon_id, current in species.items()
+                   if self.species.get(pokemon_id) != current}
+        for pokemon_id in changed:
+            self._settled_at[pokemon_id] = self._settle_time()
+        self.species.update(species)
+        for callback in self._subscribers if changed else ():
+            try:
+                callback(changed)
+            except Exception as e:
+                # Ya está confirmado: un suscriptor que falla no debe romper la petición
+                log_event(logger, logging.WARNING, "catalog_subscriber_failed",
+                          error_type=type(e).__name__, error=str(e))
+
+    def resolve(self, pokemon_id: int, sprite: Optional[str] = None,
+                types: Optional[List[str]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Completar con el catálogo un sprite / tipos leídos sin pasar por el ORM."""
+        if sprite is not None and types is not None:
+            return sprite, types
+        species = self.get(pokemon_id)
+        if species is None:
+            return sprite, types
+        return (sprite if sprite is not None else species.sprite,
+                types if types is not None else species.types)
+
+    def fill(self, instance):
+        """Rellenar sprite / tipos NULL de una instancia recién cargada sin marcarla como modificada."""
+        values = instance.__dict__
+        needs_sprite = "pokemon_sprite" in values and values["pokemon_sprite"] is None
+        needs_types = "pokemon_types" in values and values["pokemon_types"] is None
+        if not (needs_sprite or needs_types):
+            return
+        species = self.get(instance.pokemon_id)
+        if species is None:
+            return
+        if needs_sprite and species.sprite is not None:
+            set_committed_value(instance, "pokemon_sprite", species.sprite)
+        if needs_types and species.types is not None:
+            set_committed_value(instance, "pokemon_types", species.types)
+
+    async def start(self):
+        self.load()
+        if self.refresh_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await asyncio.to_thread(self.load)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "catalog_refresh_failed",
+                          error_type=type(e).__name__, error=str(e))
+
+
+def _species_query(pokemon_ids: List[int]):
+    return select(
+        PokemonSpecies.pokemon_id, PokemonSpecies.pokemon_name,
+        PokemonSpecies.pokemon_sprite, PokemonSpecies.pokemon_types
+    ).where(PokemonSpecies.pokemon_id.in_(pokemon_ids))
+
+
+species_catalog = SpeciesCatalog()
+
+
+def _fill_on_load(target, context):
+    species_catalog.fill(target)
+
+
+def _fill_on_refresh(target, context, attrs):
+    species_catalog.fill(target)
+
+
+def _publish_pending(session):
+    # after_commit también salta al liberar un savepoint: publicar solo con el commit principal
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        species_catalog.publish(pending)
+
+
+def _discard_pending(session, transaction):
+    # Rollback (o fin sin commit) de la transacción principal: no publicar nada
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, "after_commit", _publish_pending)
+event.listen(Session, "after_transaction_end", _discard_pending)
+
+for _model in NORMALIZED_MODELS:
+    event.listen(_model, "load", _fill_on_load)
+    event.listen(_model, "refresh", _fill_on_refresh)
+
+
+def backfill_species_catalog(
+    db: Session,
+    chunk_size: int = CATALOG_BACKFILL_CHUNK,
+    pause_seconds: float = 0.0,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Crear el catálogo a partir de las filas existentes y vaciar sus copias.
+
+    Recorre cada tabla normalizada por clave primaria en lotes de
+    chunk_size filas, una transacción por lote. La primera fila vista de
+    cada pokemon_id define la especie; las filas con el mismo sprite / tipos
+    pasan a NULL y las que difieren conservan su valor.
+
+    Returns:
+        {"species_created": int, "rows_compacted": int, "duration_s": float}
+    """
+    started = time.perf_counter()
+    stats = {"species_created": 0, "rows_compacted": 0}
+    species_catalog.load()
+
+    for model in NORMALIZED_MODELS:
+        has_types = "pokemon_types" in model.__table__.c
+        columns = [model.id, model.pokemon_id, model.pokemon_name, model.pokemon_sprite]
+        if has_types:
+            columns.append(model.pokemon_types)
+            pending = (model.pokemon_sprite.isnot(None)) | (model.pokemon_types.isnot(None))
+        else:
+            pending = model.pokemon_sprite.isnot(None)
+
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(*columns).where(model.id > last_id, pending).order_by(model.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            new_species = {}
+            clear_sprite, clear_types = [], []
+            for row in rows:
+                types = row.pokemon_types if has_types else None
+                species = species_catalog.species.get(row.pokemon_id) or new_species.get(row.pokemon_id)
+                if species is None:
+                    species = new_species[row.pokemon_id] = Species(row.pokemon_name, row.pokemon_sprite, types)
+                if row.pokemon_sprite is not None and row.pokemon_sprite == species.sprite:
+                    clear_sprite.append(row.id)
+                if types is not None and types == species.types:
+                    clear_types.append(row.id)
+
+            stats["species_created"] += len(new_species)
+            stats["rows_compacted"] += len(set(clear_sprite) | set(clear_types))
+            if dry_run:
+                # Simulación: recordar las especies para el resto del recorrido sin escribirlas
+                species_catalog.publish(new_species)
+                continue
+
+            if new_species:
+                db.execute(insert(PokemonSpecies), [
+                    {"pokemon_id": pokemon_id, "pokemon_name": s.name,
+                     "pokemon_sprite": s.sprite, "pokemon_types": s.types}
+                    for pokemon_id, s in new_species.items()
+                ])
+            if clear_sprite:
+                db.execute(update(model).where(model.id.in_(clear_sprite)).values(pokemon_sprite=None))
+            if clear_types:
+                # null(): NULL de SQL en lugar del 'null' de JSON que guardaría None
+                db.execute(update(model).where(model.id.in_(clear_types)).values(pokemon_types=null()))
+            db.commit()
+            species_catalog.publish(new_species)
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+    if dry_run:
+        species_catalog.load()
+    stats["duration_s"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def seed_species_catalog(db: Session, entries: Iterable[Any], chunk_size: int = CATALOG_BACKFILL_CHUNK) -> int:
+    """
+    Insertar en pokemon_species las especies que falten (p. ej. desde el pokedex offline).
+
+    Las existentes no se tocan. Con el catálogo completo de antemano, las
+    filas nuevas no guardan copias desde la primera vez que aparece un Pokémon.
+
+    Args:
+        entries: Objetos con pokemon_id, name, sprite y types (PokedexEntry)
+
+    Returns:
+        Número de especies insertadas
+    """
+    existing = set(db.scalars(select(PokemonSpecies.pokemon_id)))
+    new_species = {
+        entry.pokemon_id: Species(entry.name, entry.sprite, list(entry.types) or None)
+        for entry in entries if entry.pokemon_id not in existing
+    }
+    items = list(new_species.items())
+    for start in range(0, len(items), chunk_size):
+        db.execute(insert(PokemonSpecies), [
+            {"pokemon_id": pokemon_id, "pokemon_name": s.name, "pokemon_sprite": s.sprite, "pokemon_types": s.types}
+            for pokemon_id, s in items[start:start + chunk_size]
+        ])
+        db.commit()
+    species_catalog.publish(new_species)
+    return len(new_species)
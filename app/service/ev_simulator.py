@@ -0,0 +1,153 @@
+import heapq
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.models.database import TrainingSession
+from app.models.pokemon import EVSimulationRequest, EVSimulationResponse, EVSpreadResult
+from app.service.pokedex import NATURE_EFFECTS, NATURES, STAT_NAMES
+
+MAX_EVS_PER_STAT = 252
+MAX_EVS_TOTAL = 510
+
+# Multiplicador de naturaleza en décimas (x1.1, x1.0, x0.9), como en el juego se redondea hacia abajo
+NATURE_TENTHS = {"plus": 11, "neutral": 10, "minus": 9}
+
+
+def stat_table(stat: str, base: int, iv: int, level: int, nature_tenths: int = 10) -> List[int]:
+    """
+    Valor final de la estadística para cada EV // 4 (0..63).
+
+    Solo cuenta EV // 4, así que 64 valores cubren todos los repartos:
+    evaluar uno es una consulta por estadística, sin repetir la fórmula.
+    """
+    values = []
+    for quarter in range(MAX_EVS_PER_STAT // 4 + 1):
+        core = (2 * base + iv + quarter) * level // 100
+        if stat == "hp":
+            # Shedinja (base 1) siempre tiene 1 PS
+            values.append(1 if base == 1 else core + level + 10)
+        else:
+            values.append((core + 5) * nature_tenths // 10)
+    return values
+
+
+def _nature_tenths(nature: Optional[str]) -> Dict[str, int]:
+    up, down = NATURE_EFFECTS.get(nature, (None, None))
+    return {stat: 11 if stat == up else 9 if stat == down else 10 for stat in STAT_NAMES}
+
+
+def evaluate_spreads(base_stats: Dict[str, int], spreads: Sequence[Dict[str, int]], level: int = 50,
+                     nature: Optional[str] = None, ivs: Optional[Dict[str, int]] = None):
+    """
+    Estadísticas finales de muchos repartos a la vez.
+
+    El cálculo va por columnas: para cada estadística se construye su tabla
+    (stat_table) y se traduce la columna de EVs de todos los repartos de
+    una pasada. Los repartos ilegales (EV negativo o > 252, total > 510,
+    estadística desconocida) se descartan.
+
+    Returns:
+        (índices válidos, columnas de EVs, columnas de estadísticas, índices descartados)
+    """
+    tenths = _nature_tenths(nature)
+    ivs = ivs or {}
+
+    valid, invalid = [], []
+    for index, spread in enumerate(spreads):
+        if (any(stat not in tenths for stat in spread)
+                or any(not 0 <= ev <= MAX_EVS_PER_STAT for ev in spread.values())
+                or sum(spread.values()) > MAX_EVS_TOTAL):
+            invalid.append(index)
+        else:
+            valid.append(index)
+
+    ev_columns, stat_columns = {}, {}
+    for stat in STAT_NAMES:
+        table = stat_table(stat, base_stats[stat], ivs.get(stat, 31), level, tenths[stat])
+        column = [spreads[index].get(stat, 0) for index in valid]
+        ev_columns[stat] = column
+        stat_columns[stat] = [table[ev >> 2] for ev in column]
+    return valid, ev_columns, stat_columns, invalid
+
+
+def simulate_training_session(user_id: int, session_id: int, request: EVSimulationRequest,
+                              db: Session) -> EVSimulationResponse:
+    """
+    Evaluar repartos de EVs candidatos para el Pokémon de una sesión de training.
+
+    Con target se ordenan primero los que alcanzan el umbral (target.value
+    o superar en target.stat al rival de base target.outspeed_base, al
+    mismo nivel) y, entre ellos, los que dejan más estadísticas en el resto;
+    los que no llegan, por lo cerca que se quedan. Sin target, por la suma
+    de estadísticas.
+
+    Raises:
+        ValueError: Si la sesión no existe, le faltan estadísticas base o la petición no es válida
+    """
+    session = db.query(TrainingSession).filter(
+        TrainingSession.id == session_id,
+        TrainingSession.user_id == user_id
+    ).first()
+
+    if not session:
+        raise ValueError("Sesión de entrenamiento no encontrada")
+
+    base_stats = session.base_stats or {}
+    if any(stat not in base_stats for stat in STAT_NAMES):
+        raise ValueError("La sesión no tiene estadísticas base completas")
+    if request.nature is not None and request.nature not in NATURES:
+        raise ValueError(f"Naturaleza desconocida: {request.nature}")
+    if request.ivs and any(stat not in STAT_NAMES or not 0 <= iv <= 31 for stat, iv in request.ivs.items()):
+        raise ValueError("IVs inválidos: deben estar entre 0 y 31")
+
+    target = request.target
+    threshold = None
+    if target is not None:
+        if target.stat not in STAT_NAMES:
+            raise ValueError(f"Estadística desconocida: {target.stat}")
+        if target.value is not None:
+            threshold = target.value
+        elif target.outspeed_base is not None:
+            rival = stat_table(target.stat, target.outspeed_base, target.rival_ivs, request.level,
+                               NATURE_TENTHS[target.rival_nature])
+            threshold = rival[target.rival_evs >> 2] + 1
+        else:
+            raise ValueError("El objetivo necesita value u outspeed_base")
+
+    valid, ev_columns, stat_columns, invalid = evaluate_spreads(
+        base_stats, request.spreads, request.level, request.nature, request.ivs
+    )
+
+    totals = [sum(values) for values in zip(*(stat_columns[stat] for stat in STAT_NAMES))]
+    if threshold is not None:
+        target_column = stat_columns[target.stat]
+        margins = [value - threshold for value in target_column]
+        # Cumple > resto de estadísticas > margen
+        keys = [(margin >= 0, total - value if margin >= 0 else margin, -position)
+                for position, (margin, total, value) in enumerate(zip(margins, totals, target_column))]
+    else:
+        margins = None
+        keys = [(total, -position) for position, total in enumerate(totals)]
+
+    best = heapq.nlargest(request.limit, range(len(valid)), key=keys.__getitem__)
+    results = [
+        EVSpreadResult(
+            index=valid[position],
+            evs={stat: ev_columns[stat][position] for stat in STAT_NAMES},
+            stats={stat: stat_columns[stat][position] for stat in STAT_NAMES},
+            meets_target=margins[position] >= 0 if margins is not None else None,
+            margin=margins[position] if margins is not None else None,
+        )
+        for position in best
+    ]
+    return EVSimulationResponse(
+        session_id=session.id,
+        level=request.level,
+        nature=request.nature,
+        threshold=threshold,
+        evaluated=len(valid),
+        meeting_target=sum(1 for margin in margins if margin >= 0) if margins is not None else None,
+        invalid_indexes=invalid,
+        results=results,
+    )
@@ -0,0 +1,139 @@
+import json
+import zlib
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.database import PokemonTeam, PokemonTeamMember, TrainingSession, SearchHistory
+from app.models.pokemon import PokemonTeamResponse, TrainingSessionResponse, SearchHistoryResponse
+from app.service.catalog import species_catalog
+
+# Filas por página (una consulta por página, por clave primaria)
+EXPORT_BATCH_SIZE = 500
+
+# Tamaño aproximado de cada bloque enviado al cliente
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# (tipo de registro, modelo ORM, modelo de serialización)
+EXPORT_SOURCES = (
+    ("team", PokemonTeam, PokemonTeamResponse),
+    ("training_session", TrainingSession, TrainingSessionResponse),
+    ("search_history", SearchHistory, SearchHistoryResponse),
+)
+
+
+def _with_species(data: dict) -> dict:
+    """Completar sprite y tipos NULL con el catálogo, como hace el ORM al cargar la fila."""
+    data["pokemon_sprite"], data["pokemon_types"] = species_catalog.resolve(
+        data["pokemon_id"], data.get("pokemon_sprite"), data.get("pokemon_types")
+    )
+    return data
+
+
+def _iter_pages(db: Session, model, user_id: Optional[int]) -> Iterator[List[dict]]:
+    """Filas de `model` como dicts, en páginas de EXPORT_BATCH_SIZE por id creciente."""
+    columns = model.__table__.columns
+    last_id = 0
+    while True:
+        query = select(*columns).where(columns.id > last_id)
+        if user_id is not None:
+            query = query.where(columns.user_id == user_id)
+        rows = db.execute(query.order_by(columns.id).limit(EXPORT_BATCH_SIZE)).mappings().all()
+        if not rows:
+            return
+        yield [dict(row) for row in rows]
+        last_id = rows[-1]["id"]
+
+
+def iter_export_records(db: Session, user_id: Optional[int] = None) -> Iterator[dict]:
+    """
+    Recorrer equipos, sesiones de training e historial en páginas.
+
+    Cada página es una consulta Core por clave primaria (id > último) de
+    EXPORT_BATCH_SIZE filas que se serializan directamente a dicts: no hay
+    instancias ORM ni identity map que crezca, así que en memoria solo hay
+    una página por vez, independientemente del volumen. Los miembros de
+    cada página de equipos llegan en una sola consulta IN. Al no dejar un
+    cursor abierto entre páginas, la sesión puede ejecutar esas consultas
+    en cualquier motor.
+
+    Args:
+        db: Sesión de base de datos (debe seguir abierta mientras se consume)
+        user_id: Usuario a exportar; None exporta todos (volcado para analítica)
+
+    Yields:
+        dict: {"type": ..., "data": {...}} por cada fila
+    """
+    for record_type, model, schema in EXPORT_SOURCES:
+        for page in _iter_pages(db, model, user_id):
+            if model is PokemonTeam:
+                members: Dict[int, List[SimpleNamespace]] = {row["id"]: [] for row in page}
+                member_rows = db.execute(
+                    select(*PokemonTeamMember.__table__.columns)
+                    .where(PokemonTeamMember.team_id.in_(members.keys()))
+                    .order_by(PokemonTeamMember.team_id, PokemonTeamMember.id)
+                ).mappings()
+                for member in member_rows:
+                    members[member["team_id"]].append(SimpleNamespace(**_with_species(dict(member))))
+                for row in page:
+                    row["team_members"] = members[row["id"]]
+            else:
+                page = [_with_species(row) for row in page]
+            for row in page:
+                # Validación por atributos, como desde el ORM: mismo JSON que las exportaciones anteriores
+                data = schema.model_validate(SimpleNamespace(**row)).model_dump(mode="json")
+                yield {"type": record_type, "data": data}
+
+
+def iter_ndjson_chunks(records: Iterator[dict], compress: bool = False) -> Iterator[bytes]:
+    """
+    Convertir registros en bloques NDJSON (opcionalmente gzip).
+
+    Las líneas se agrupan en bloques de ~EXPORT_CHUNK_BYTES para no hacer una
+    escritura por fila. Al ser un generador, el siguiente bloque solo se
+    produce cuando el consumidor (respuesta HTTP o fichero) pide más, lo que
+    da contrapresión natural frente a clientes lentos.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 => formato gzip
+    buffer = []
+    size = 0
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield emit(b"".join(buffer))
+            buffer = []
+            size = 0
+
+    tail = emit(b"".join(buffer)) if buffer else b""
+    if compressor is not None:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+
+def stream_user_export(user_id: Optional[int], compress: bool = False) -> Iterator[bytes]:
+    """
+    Generador autocontenido para StreamingResponse y para el CLI.
+
+    Abre su propia sesión: la de Depends(get_db) se cierra antes de que
+    empiece a enviarse el cuerpo de una respuesta en streaming.
+    """
+    if not species_catalog.species:
+        # Desde el CLI no hay lifespan: cargar el catálogo una vez en lugar de por especie
+        species_catalog.load()
+    db = SessionLocal()
+    try:
+        yield from iter_ndjson_chunks(iter_export_records(db, user_id), compress)
+    finally:
+        db.close()
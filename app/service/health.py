@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.database import get_engine
+from app.service import pokeapi
+from app.service.jobs import job_runner, JOB_QUEUE_MAXSIZE
+from app.utils.log import get_logger, log_event
+
+# Segundos entre comprobaciones de dependencias
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "10"))
+
+# Segundos máximos para el SELECT 1 antes de dar la BD por caída
+HEALTH_DB_TIMEOUT_SECONDS = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "3"))
+
+# Trabajos en cola a partir de los cuales la instancia deja de recibir tráfico
+HEALTH_MAX_QUEUE_DEPTH = int(os.getenv("HEALTH_MAX_QUEUE_DEPTH", str(int(JOB_QUEUE_MAXSIZE * 0.9))))
+
+# Sin respuesta válida de PokeAPI en este tiempo (y con errores recientes) -> "degraded"
+HEALTH_POKEAPI_STALE_SECONDS = float(os.getenv("HEALTH_POKEAPI_STALE_SECONDS", "300"))
+
+logger = get_logger("health")
+
+
+class HealthMonitor:
+    """
+    Comprobación periódica de dependencias con el último resultado en memoria.
+
+    Una tarea de fondo revisa cada HEALTH_CHECK_INTERVAL_SECONDS la base de
+    datos, el pool de conexiones, PokeAPI y la cola de trabajos; /readyz
+    solo devuelve el último resultado, así que responder a los probes es
+    O(1) y no hace I/O. El SELECT 1 usa un engine propio de una conexión
+    para no quitarle conexiones del pool al tráfico real.
+
+    PokeAPI no bloquea la disponibilidad (la app usa valores por defecto si
+    falla); solo se informa como "degraded".
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL_SECONDS):
+        self.interval = interval
+        self.status: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._probe_engine: Optional[Engine] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status is not None and self.status["ready"]
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._probe_engine is not None:
+            self._probe_engine.dispose()
+            self._probe_engine = None
+
+    async def _loop(self):
+        was_ready = None
+        while True:
+            try:
+                self.status = await self.check()
+            except Exception as e:
+                self.status = {"ready": False, "checked_at": _now(), "error": f"{type(e).__name__}: {e}"}
+            if self.status["ready"] != was_ready:
+                was_ready = self.status["ready"]
+                log_event(logger, logging.INFO if was_ready else logging.WARNING,
+                          "readiness_changed", ready=was_ready, checks=self.status.get("checks"))
+            await asyncio.sleep(self.interval)
+
+    async def check(self) -> Dict[str, Any]:
+        """Ejecutar todas las comprobaciones y devolver el resultado."""
+        checks = {
+            "database": await self._check_database(),
+            "db_pool": self._check_pool(),
+            "jobs": self._check_jobs(),
+            "pokeapi": self._check_pokeapi(),
+        }
+        return {
+            "ready": all(check["status"] != "down" for check in checks.values()),
+            "checked_at": _now(),
+            "checks": checks,
+        }
+
+    async def _check_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._select_one), HEALTH_DB_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return {"status": "down", "error": f"timeout ({HEALTH_DB_TIMEOUT_SECONDS}s)"}
+        except Exception as e:
+            return {"status": "down", "error": type(e).__name__}
+        return {"status": "up", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _select_one(self):
+        if self._probe_engine is None:
+            # Una sola conexión persistente, independiente del pool de la app
+            self._probe_engine = create_engine(
+                get_settings().database_url, pool_size=1, max_overflow=0, pool_recycle=1800
+            )
+        with self._probe_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    @staticmethod
+    def _check_pool() -> Dict[str, Any]:
+        pool = get_engine().pool
+        if not hasattr(pool, "checkedout"):
+            return {"status": "up"}
+        size = pool.size()
+        checked_out = pool.checkedout()
+        capacity = size + max(0, getattr(pool, "_max_overflow", 0))
+        return {
+            # Pool agotado: las peticiones esperan conexión, pero la BD responde
+            "status": "degraded" if checked_out >= capacity else "up",
+            "size": size,
+            "checked_out": checked_out,
+            "overflow": max(0, pool.overflow()),
+        }
+
+    @staticmethod
+    def _check_jobs() -> Dict[str, Any]:
+        depth = job_runner.queue_depth
+        status = "up" if job_runner.running and depth < HEALTH_MAX_QUEUE_DEPTH else "down"
+        return {"status": status, "queue_depth": depth, "max_queue_depth": HEALTH_MAX_QUEUE_DEPTH}
+
+    @staticmethod
+    def _check_pokeapi() -> Dict[str, Any]:
+        now = time.time()
+        last_success, last_error = pokeapi.last_success_at, pokeapi.last_error_at
+        stale = (
+            last_error is not None
+            and (last_success is None or last_success < last_error)
+            and (last_success is None or now - last_success > HEALTH_POKEAPI_STALE_SECONDS)
+        )
+        return {
+            "status": "degraded" if stale else "up",
+            "last_success_age_s": round(now - last_success, 1) if last_success else None,
+            "last_error_age_s": round(now - last_error, 1) if last_error else None,
+        }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+health_monitor = HealthMonitor()
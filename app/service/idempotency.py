@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import IdempotencyKey
+
+# Horas que se guarda la respuesta de cada Idempotency-Key (después la clave se puede reutilizar)
+IDEMPOTENCY_KEY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+
+# Segundos tras los que una reserva sin respuesta se da por abandonada (el
+# worker que la hizo murió a mitad): un reintento con la misma clave la retoma
+# en vez de recibir 409 hasta que caduque
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+
+# Cabecera que marca una respuesta repetida desde idempotency_keys
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyConflictError(Exception):
+    pass
+
+
+def request_hash(endpoint: str, payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{endpoint}\n{body}".encode("utf-8")).hexdigest()
+
+
+def run_idempotent(db: Session, user_id: int, key: Optional[str], endpoint: str, payload: BaseModel,
+                   handler: Callable[[Session], Any], response_model: Type[BaseModel], status_code: int = 200):
+    """
+    Ejecutar `handler` una sola vez por (usuario, Idempotency-Key).
+
+    Sin clave se ejecuta sin más con `db`. Con clave:
+    1. Se reserva la clave (INSERT con la restricción única): de dos
+       peticiones simultáneas solo una ejecuta `handler`.
+    2. `handler` recibe una sesión cuyos commit son savepoints: sus cambios
+       y la respuesta serializada con `response_model` se confirman juntos,
+       en un único commit.
+    3. Los reintentos con la misma clave y el mismo cuerpo reciben esa
+       respuesta tal cual (cabecera Idempotent-Replayed), sin tocar nada más.
+
+    Si `handler` falla se libera la clave y el cliente puede reintentar. Si
+    el worker muere a mitad no queda nada de `handler`, solo la reserva sin
+    respuesta: pasados IDEMPOTENCY_LEASE_SECONDS el siguiente reintento la
+    retoma. Si la petición original sigue viva y termina después, su
+    reserva ya no es suya y sus cambios se deshacen.
+
+    Raises:
+        ValueError: Si la clave ya se usó con otro endpoint u otro cuerpo
+        IdempotencyConflictError: Si la petición original con esa clave aún está en curso
+    """
+    if not key:
+        return handler(db)
+
+    fingerprint = request_hash(endpoint, payload)
+    # Segundos enteros, como DATETIME en MySQL: la marca identifica la reserva al confirmarla
+    now = datetime.utcnow().replace(microsecond=0)
+
+    # Las claves caducadas del usuario se borran aquí: sin tareas periódicas
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.created_at < now - timedelta(hours=IDEMPOTENCY_KEY_TTL_HOURS)
+    ).delete(synchronize_session=False)
+
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+
+    if record is None:
+        try:
+            # Savepoint: si otra petición reserva la misma clave a la vez, solo se deshace este INSERT
+            with db.begin_nested():
+                db.add(IdempotencyKey(
+                    user_id=user_id, key=key, endpoint=endpoint, request_hash=fingerprint, created_at=now
+                ))
+        except IntegrityError:
+            db.commit()
+            raise IdempotencyConflictError("Ya hay una petición en curso con esta Idempotency-Key")
+        db.commit()
+    else:
+        db.commit()
+        if record.endpoint != endpoint or record.request_hash != fingerprint:
+            raise ValueError("La Idempotency-Key ya se usó con otra petición")
+        if record.status_code is None:
+            if record.created_at >= now - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS):
+                raise IdempotencyConflictError("Ya hay una petición en curso con esta Idempotency-Key")
+            # Reserva abandonada: se renueva solo si nadie la ha retomado o completado entretanto
+            taken = db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == record.id,
+                IdempotencyKey.status_code.is_(None),
+                IdempotencyKey.created_at == record.created_at
+            ).update({"created_at": now}, synchronize_session=False)
+            db.commit()
+            if not taken:
+                raise IdempotencyConflictError("Ya hay una petición en curso con esta Idempotency-Key")
+        else:
+            return JSONResponse(
+                content=record.response_body,
+                status_code=record.status_code,
+                headers={REPLAYED_HEADER: "true"}
+            )
+
+    # Reserva vigente: la nuestra, si nadie la ha retomado
+    reserved = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.created_at == now
+    )
+    try:
+        with db.get_bind().connect() as connection, connection.begin():
+            if connection.dialect.name == "sqlite":
+                # pysqlite no abre la transacción hasta el primer INSERT/UPDATE: sin este BEGIN
+                # el primer SAVEPOINT haría de transacción y liberarlo confirmaría el handler
+                connection.exec_driver_sql("BEGIN")
+            session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+            try:
+                body = jsonable_encoder(response_model.model_validate(handler(session)))
+                saved = reserved.with_session(session).update(
+                    {"status_code": status_code, "response_body": body}, synchronize_session=False
+                )
+                if not saved:
+                    # Otro reintento retomó la reserva: sus cambios son los que valen
+                    raise IdempotencyConflictError("La petición con esta Idempotency-Key la completó otro intento")
+                # Solo libera el savepoint: el commit real es el de `connection` al salir
+                session.commit()
+            finally:
+                session.close()
+    except IdempotencyConflictError:
+        raise
+    except Exception:
+        reserved.delete(synchronize_session=False)
+        db.commit()
+        raise
+    return body
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.database import BackgroundJob
+
+# Trabajos ejecutándose a la vez en este proceso
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+
+# Trabajos en espera antes de rechazar nuevos (503)
+JOB_QUEUE_MAXSIZE = int(os.getenv("JOB_QUEUE_MAXSIZE", "1000"))
+
+# Reintentos: espera = JOB_RETRY_BACKOFF_SECONDS * 2^(intento - 1)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "1"))
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def _update_job(job_id: str, **fields):
+    db = SessionLocal()
+    try:
+        db.query(BackgroundJob).filter(BackgroundJob.id == job_id).update(fields)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _run_attempt(func: Callable[[Session], Any]) -> Any:
+    # Cada intento usa su propia sesión: la de la petición ya está cerrada
+    db = SessionLocal()
+    try:
+        return func(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class JobRunner:
+    """
+    Cola de trabajos en segundo plano dentro del propio proceso.
+
+    Los trabajos se encolan en un asyncio.Queue y los consumen
+    JOB_CONCURRENCY workers; el trabajo en sí (síncrono, con SQLAlchemy) se
+    ejecuta en el threadpool para no bloquear el event loop. El estado se
+    guarda en la tabla background_jobs, de modo que cualquier proceso puede
+    responder a la consulta de estado. No necesita ningún broker externo.
+
+    Los ValueError se consideran errores de negocio y no se reintentan; el
+    resto de excepciones se reintenta con backoff exponencial.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, max_queue_size: int = JOB_QUEUE_MAXSIZE):
+        self.concurrency = concurrency
+        self.max_queue_size = max_queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self._workers = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers) and not all(worker.done() for worker in self._workers)
+
+    async def start(self):
+        if self._workers:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, db: Session, user_id: int, kind: str, func: Callable[[Session], Any],
+               max_attempts: int = JOB_MAX_ATTEMPTS) -> BackgroundJob:
+        """
+        Registrar un trabajo y encolarlo.
+
+        Args:
+            db: Sesión de la petición (solo para crear el registro del trabajo)
+            user_id: Dueño del trabajo (solo él puede consultar su estado)
+            kind: Nombre del tipo de trabajo
+            func: Función síncrona func(db) que devuelve un resultado serializable a JSON
+            max_attempts: Intentos máximos ante errores transitorios
+
+        Raises:
+            QueueFullError: Si la cola está llena o los workers no están arrancados
+        """
+        if self.queue is None or self.queue.full():
+            raise QueueFullError("La cola de trabajos está llena, inténtalo más tarde")
+
+        job = BackgroundJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            kind=kind,
+            status="queued",
+            attempts=0,
+            max_attempts=max_attempts
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self.queue.put_nowait((job.id, func, max_attempts))
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id, func, max_attempts = await self.queue.get()
+            try:
+                await self._execute(job_id, func, max_attempts)
+            except Exception:
+                # Un fallo al actualizar el estado no debe matar al worker
+                pass
+            finally:
+                self.queue.task_done()
+
+    async def _execute(self, job_id: str, func: Callable[[Session], Any], max_attempts: int):
+        for attempt in range(1, max_attempts + 1):
+            await asyncio.to_thread(
+                _update_job, job_id,
+                status="running", attempts=attempt, started_at=datetime.utcnow()
+            )
+            try:
+                result = await asyncio.to_thread(_run_attempt, func)
+            except ValueError as e:
+                await asyncio.to_thread(
+                    _update_job, job_id,
+                    status="failed", error=str(e), finished_at=datetime.utcnow()
+                )
+                return
+            except Exception as e:
+                if attempt >= max_attempts:
+                    await asyncio.to_thread(
+                        _update_job, job_id,
+                        status="failed", error=f"{type(e).__name__}: {str(e)}", finished_at=datetime.utcnow()
+                    )
+                    return
+                await asyncio.to_thread(_update_job, job_id, status="retrying", error=str(e))
+                await asyncio.sleep(JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+                continue
+
+            await asyncio.to_thread(
+                _update_job, job_id,
+                status="completed", result=result, error=None, finished_at=datetime.utcnow()
+            )
+            return
+
+
+def get_user_job(user_id: int, job_id: str, db: Session) -> BackgroundJob:
+    job = db.query(BackgroundJob).filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.user_id == user_id
+    ).first()
+
+    if not job:
+        raise ValueError("Trabajo no encontrado")
+
+    return job
+
+
+job_runner = JobRunner()
@@ -0,0 +1,68 @@
+import os
+import time
+from typing import Dict, Optional
+
+from app.service.pokedex import STAT_NAMES, get_pokedex
+from app.utils.metrics import pokeapi_request_duration_seconds, pokeapi_errors_total
+
+POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
+POKEAPI_TIMEOUT_SECONDS = 5
+
+# No llamar nunca a PokeAPI: solo el catálogo offline (tests y entornos sin red)
+POKEAPI_OFFLINE = os.getenv("POKEAPI_OFFLINE", "false").lower() in ("1", "true", "yes")
+
+# Última respuesta válida y último error de PokeAPI (time.time()); los lee /readyz
+last_success_at: Optional[float] = None
+last_error_at: Optional[float] = None
+
+
+def _record_error(reason: str):
+    global last_error_at
+    last_error_at = time.time()
+    pokeapi_errors_total.inc("pokemon", reason)
+
+
+def fetch_base_stats(pokemon_id: int) -> Optional[Dict[str, int]]:
+    """
+    Obtener las estadísticas base de un Pokémon.
+
+    Primero se busca en el catálogo offline (POKEDEX_PATH), sin red. Si no
+    está, se pide a PokeAPI registrando la latencia y los errores en las
+    métricas, salvo con POKEAPI_OFFLINE.
+
+    Returns:
+        {"hp": 45, "attack": 49, ...} o None si no hay datos o PokeAPI falla
+    """
+    global last_success_at
+    pokedex = get_pokedex()
+    if pokedex is not None:
+        stats = pokedex.base_stats(pokemon_id)
+        if stats is not None:
+            return stats
+    if POKEAPI_OFFLINE:
+        return None
+
+    # Importación diferida: requests solo se necesita al llamar a PokeAPI
+    import requests
+
+    try:
+        with pokeapi_request_duration_seconds.time("pokemon"):
+            response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pokemon_id}", timeout=POKEAPI_TIMEOUT_SECONDS)
+        if response.status_code != 200:
+            _record_error(f"http_{response.status_code}")
+            return None
+        pokemon_data = response.json()
+        stats = {name: pokemon_data['stats'][i]['base_stat'] for i, name in enumerate(STAT_NAMES)}
+    except requests.Timeout:
+        _record_error("timeout")
+    except requests.JSONDecodeError:
+        # Antes que RequestException: el cuerpo no es JSON, pero la conexión funcionó
+        _record_error("invalid_response")
+    except requests.RequestException:
+        _record_error("connection")
+    except (ValueError, KeyError, IndexError):
+        _record_error("invalid_response")
+    else:
+        last_success_at = time.time()
+        return stats
+    return None
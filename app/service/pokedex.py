@@ -0,0 +1,267 @@
+import csv
+import json
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Fichero del catálogo offline generado con build_pokedex.py (si no existe se usa PokeAPI)
+POKEDEX_PATH = os.getenv("POKEDEX_PATH", "pokedex.bin")
+
+# Sprite por defecto cuando el volcado no trae uno (volcados CSV de PokeAPI)
+DEFAULT_SPRITE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{}.png"
+
+# Tipos en el orden de PokeAPI; en el fichero se guarda el índice + 1 (0 = sin tipo)
+TYPE_NAMES = ("normal", "fighting", "flying", "poison", "ground", "rock", "bug", "ghost", "steel",
+              "fire", "water", "grass", "electric", "psychic", "ice", "dragon", "dark", "fairy")
+
+# Orden de las estadísticas (el mismo que en la respuesta de /pokemon/{id} de PokeAPI)
+STAT_NAMES = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+# Naturalezas en el orden de PokeAPI
+NATURES = ("hardy", "lonely", "brave", "adamant", "naughty", "bold", "docile", "relaxed", "impish",
+           "lax", "timid", "hasty", "serious", "jolly", "naive", "modest", "mild", "quiet", "bashful",
+           "rash", "calm", "gentle", "sassy", "careful", "quirky")
+
+# Estadística que sube (x1.1) y que baja (x0.9) cada naturaleza; las que no aparecen son neutras
+NATURE_EFFECTS = {
+    "lonely": ("attack", "defense"), "brave": ("attack", "speed"),
+    "adamant": ("attack", "special-attack"), "naughty": ("attack", "special-defense"),
+    "bold": ("defense", "attack"), "relaxed": ("defense", "speed"),
+    "impish": ("defense", "special-attack"), "lax": ("defense", "special-defense"),
+    "timid": ("speed", "attack"), "hasty": ("speed", "defense"),
+    "jolly": ("speed", "special-attack"), "naive": ("speed", "special-defense"),
+    "modest": ("special-attack", "attack"), "mild": ("special-attack", "defense"),
+    "quiet": ("special-attack", "speed"), "rash": ("special-attack", "special-defense"),
+    "calm": ("special-defense", "attack"), "gentle": ("special-defense", "defense"),
+    "sassy": ("special-defense", "speed"), "careful": ("special-defense", "special-attack"),
+}
+
+MAGIC = b"PKDX"
+VERSION = 1
+
+# Cabecera: magic, versión, tamaño de registro, id máximo, offset de la tabla de cadenas
+HEADER = struct.Struct("<4sHHII")
+
+# Registro de ancho fijo por pokemon_id: presente, 6 estadísticas, 2 tipos y
+# (offset, longitud) en la tabla de cadenas de nombre, sprite y 3 habilidades
+RECORD = struct.Struct("<B6B2B" + "IH" * 5)
+
+# Estadísticas de PokeAPI en pokemon_stats.csv (stat_id -> nombre)
+CSV_STAT_IDS = dict(enumerate(STAT_NAMES, start=1))
+
+
+class PokedexEntry(NamedTuple):
+    pokemon_id: int
+    name: str
+    base_stats: Dict[str, int]
+    types: List[str]
+    abilities: List[str]
+    sprite: Optional[str]
+
+
+class Pokedex:
+    """
+    Lectura del catálogo offline mapeado en memoria.
+
+    Cada pokemon_id ocupa un registro de RECORD.size bytes en la posición
+    id - 1, así que una consulta es un struct.unpack_from sin índice ni
+    parseo del fichero completo. El sistema operativo solo carga las
+    páginas que se leen y, al ser un mmap de solo lectura, los workers de
+    gunicorn comparten la misma copia en la caché de páginas.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.max_id, self._strings = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"{path} no es un catálogo compatible (versión {VERSION})")
+        self.path = path
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.ids())
+
+    def ids(self) -> Iterator[int]:
+        for pokemon_id in range(1, self.max_id + 1):
+            if self._mmap[HEADER.size + (pokemon_id - 1) * RECORD.size]:
+                yield pokemon_id
+
+    def get(self, pokemon_id: int) -> Optional[PokedexEntry]:
+        if not 1 <= pokemon_id <= self.max_id:
+            return None
+        fields = RECORD.unpack_from(self._mmap, HEADER.size + (pokemon_id - 1) * RECORD.size)
+        if not fields[0]:
+            return None
+        stats, types, strings = fields[1:7], fields[7:9], fields[9:]
+        name, sprite, *abilities = (self._string(*strings[i:i + 2]) for i in range(0, len(strings), 2))
+        return PokedexEntry(
+            pokemon_id=pokemon_id,
+            name=name,
+            base_stats=dict(zip(STAT_NAMES, stats)),
+            types=[TYPE_NAMES[t - 1] for t in types if t],
+            abilities=[ability for ability in abilities if ability],
+            sprite=sprite or None,
+        )
+
+    def base_stats(self, pokemon_id: int) -> Optional[Dict[str, int]]:
+        entry = self.get(pokemon_id)
+        return entry.base_stats if entry else None
+
+    def close(self):
+        self._mmap.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+
+@lru_cache
+def get_pokedex() -> Optional[Pokedex]:
+    """Catálogo de POKEDEX_PATH, abierto la primera vez; None si no se ha generado."""
+    if not os.path.exists(POKEDEX_PATH):
+        return None
+    return Pokedex(POKEDEX_PATH)
+
+
+def write_pokedex(entries: Iterable[PokedexEntry], path: str) -> int:
+    """
+    Escribir el catálogo en `path` (de forma atómica). Devuelve el número de especies.
+
+    Raises:
+        ValueError: Si una entrada no cabe en el formato (estadística > 255, tipo desconocido...)
+    """
+    by_id = {entry.pokemon_id: entry for entry in entries}
+    if not by_id:
+        raise ValueError("El volcado no contiene ningún Pokémon")
+    max_id = max(by_id)
+
+    strings = bytearray()
+    offsets: Dict[str, tuple] = {}
+
+    def intern(value: Optional[str]) -> tuple:
+        # Las habilidades se repiten mucho: cada cadena se guarda una sola vez
+        if not value:
+            return (0, 0)
+        if value not in offsets:
+            encoded = value.encode("utf-8")
+            offsets[value] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return offsets[value]
+
+    records = bytearray(RECORD.size * max_id)
+    for pokemon_id, entry in by_id.items():
+        if pokemon_id < 1:
+            raise ValueError(f"pokemon_id inválido: {pokemon_id}")
+        stats = [entry.base_stats.get(name, 0) for name in STAT_NAMES]
+        if any(not 0 <= stat <= 255 for stat in stats):
+            raise ValueError(f"Estadística fuera de rango en {entry.name}: {stats}")
+        try:
+            types = [TYPE_NAMES.index(t) + 1 for t in entry.types[:2]]
+        except ValueError:
+            raise ValueError(f"Tipo desconocido en {entry.name}: {entry.types}")
+        abilities = (list(entry.abilities) + [None] * 3)[:3]
+        strings_fields = [field for value in (entry.name, entry.sprite, *abilities) for field in intern(value)]
+        RECORD.pack_into(records, (pokemon_id - 1) * RECORD.size,
+                         1, *stats, *(types + [0, 0])[:2], *strings_fields)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, max_id, HEADER.size + len(records)))
+        f.write(records)
+        f.write(strings)
+    os.replace(tmp_path, path)
+    return len(by_id)
+
+
+def entry_from_pokeapi(data: dict) -> PokedexEntry:
+    """Convertir una respuesta de /pokemon/{id} de PokeAPI."""
+    abilities = sorted(data.get("abilities") or [], key=lambda a: a.get("slot", 0))
+    types = sorted(data.get("types") or [], key=lambda t: t.get("slot", 0))
+    return PokedexEntry(
+        pokemon_id=int(data["id"]),
+        name=data["name"],
+        base_stats={stat["stat"]["name"]: int(stat["base_stat"]) for stat in data["stats"]},
+        types=[t["type"]["name"] for t in types],
+        abilities=[a["ability"]["name"] for a in abilities],
+        sprite=(data.get("sprites") or {}).get("front_default") or DEFAULT_SPRITE_URL.format(data["id"]),
+    )
+
+
+def read_json_dump(path: str) -> Iterator[PokedexEntry]:
+    """
+    Respuestas de /pokemon de PokeAPI en JSON.
+
+    Admite un fichero con una lista, un fichero NDJSON (una respuesta por
+    línea) o un directorio recorrido en busca de *.json, como el árbol
+    data/api/v2/pokemon/{id}/index.json de PokeAPI/api-data.
+    """
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    with open(os.path.join(root, name), encoding="utf-8") as f:
+                        data = json.load(f)
+                    # El índice de la lista (/pokemon/) no es una especie
+                    if isinstance(data, dict) and "stats" in data:
+                        yield entry_from_pokeapi(data)
+        return
+
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            items = json.load(f)
+        else:
+            items = (json.loads(line) for line in f if line.strip())
+        for data in items:
+            yield entry_from_pokeapi(data)
+
+
+def read_csv_dump(directory: str) -> Iterator[PokedexEntry]:
+    """
+    Tablas CSV de PokeAPI (data/v2/csv): pokemon, pokemon_stats,
+    pokemon_types, types, pokemon_abilities y abilities.
+    """
+    def rows(name: str):
+        with open(os.path.join(directory, f"{name}.csv"), encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+    type_names = {row["id"]: row["identifier"] for row in rows("types")}
+    ability_names = {row["id"]: row["identifier"] for row in rows("abilities")}
+
+    stats: Dict[int, Dict[str, int]] = {}
+    for row in rows("pokemon_stats"):
+        stat = CSV_STAT_IDS.get(int(row["stat_id"]))
+        if stat:
+            stats.setdefault(int(row["pokemon_id"]), {})[stat] = int(row["base_stat"])
+
+    types: Dict[int, List[tuple]] = {}
+    for row in rows("pokemon_types"):
+        types.setdefault(int(row["pokemon_id"]), []).append((int(row["slot"]), type_names[row["type_id"]]))
+
+    abilities: Dict[int, List[tuple]] = {}
+    for row in rows("pokemon_abilities"):
+        abilities.setdefault(int(row["pokemon_id"]), []).append((int(row["slot"]), ability_names[row["ability_id"]]))
+
+    for row in rows("pokemon"):
+        pokemon_id = int(row["id"])
+        yield PokedexEntry(
+            pokemon_id=pokemon_id,
+            name=row["identifier"],
+            base_stats=stats.get(pokemon_id, {}),
+            types=[name for _, name in sorted(types.get(pokemon_id, []))],
+            abilities=[name for _, name in sorted(abilities.get(pokemon_id, []))],
+            sprite=DEFAULT_SPRITE_URL.format(pokemon_id),
+        )
+
+
+def read_dump(path: str) -> Iterator[PokedexEntry]:
+    """Elegir el lector según el volcado: directorio con pokemon.csv, o JSON."""
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, "pokemon.csv")):
+        return read_csv_dump(path)
+    return read_json_dump(path)
@@ -1,11 +1,12 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from app.models.database import UserPokemon, TrainingSession, FavoritePokemon, SearchHistory
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import func, desc, literal, select, union_all
+from app.models.database import UserPokemon, TrainingSession, FavoritePokemon, SearchHistory, SearchHistoryDaily
 from app.models.pokemon import (
     UserPokemonCreate, TrainingSessionCreate, TrainingSessionUpdate, 
-    FavoritePokemonCreate, SearchHistoryCreate, SmartFavoriteResponse
+    FavoritePokemonCreate, SearchHistoryCreate, SmartFavoriteResponse,
+    SearchHistoryBatchItem, SearchHistoryBatchResponse
 )
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
 from typing import List, Dict, Any
 from app.models.database import PokemonTeam, PokemonTeamMember
@@ -13,6 +14,14 @@ from app.models.pokemon import (
     PokemonTeamCreate, PokemonTeamUpdate, PokemonTeamResponse,
     PokemonTeamMemberResponse
 )
+from app.utils.pagination import DEFAULT_PAGE_SIZE, paginate_keyset
+from app.utils.upsert import insert_or_get, upsert_accumulate
+from app.service.pokeapi import fetch_base_stats
+from app.service.catalog import species_catalog
+from app.service.recommender import team_recommender
+from app.service.team_stats import team_stats, from_member
+from app.service.autocomplete import autocomplete_index
+from app.service.similar_users import get_similar_user_favorites
 
 # ===== USER POKEMON =====
 def add_pokemon_to_team(user_id: int, pokemon_data: UserPokemonCreate, db: Session):
@@ -30,11 +39,16 @@ def add_pokemon_to_team(user_id: int, pokemon_data: UserPokemonCreate, db: Sessi
     if existing_pokemon:
         raise ValueError(f"{pokemon_data.pokemon_name} ya está en tu equipo")
     
+    # Sprite y tipos quedan en pokemon_species; la fila solo guarda lo que difiera
+    pokemon_sprite, _ = species_catalog.register(
+        db, pokemon_data.pokemon_id, pokemon_data.pokemon_name,
+        pokemon_data.pokemon_sprite, pokemon_data.pokemon_types
+    )
     db_pokemon = UserPokemon(
         user_id=user_id,
         pokemon_id=pokemon_data.pokemon_id,
         pokemon_name=pokemon_data.pokemon_name,
-        pokemon_sprite=pokemon_data.pokemon_sprite,
+        pokemon_sprite=pokemon_sprite,
         selected_ability=pokemon_data.selected_ability,
         nickname=pokemon_data.nickname,
         level=pokemon_data.level
@@ -97,7 +111,8 @@ def create_training_session(user_id: int, session_data: TrainingSessionCreate, d
     max_evs = {"hp": 252, "attack": 252, "defense": 252,
                "special-attack": 252, "special-defense": 252, "speed": 252}
     
-    db_session = TrainingSession(
+    # Si el usuario ya tiene una sesión para este Pokémon se devuelve esa (reintentos, doble clic)
+    return _upsert_training_session(db, dict(
         user_id=user_id,
         pokemon_id=session_data.pokemon_id,
         pokemon_name=session_data.pokemon_name,
@@ -107,12 +122,23 @@ def create_training_session(user_id: int, session_data: TrainingSessionCreate, d
         total_ev_points=0,
         max_ev_points=510,
         remaining_points=510
-    )
-    
-    db.add(db_session)
+    ))
+
+def _upsert_training_session(db: Session, values: Dict[str, Any]) -> TrainingSession:
+    """
+    Crear la sesión (user_id, pokemon_id) o devolver la existente sin modificarla.
+
+    Un solo INSERT con upsert nativo sobre uq_training_sessions_user_pokemon:
+    sin SELECT previo, sin duplicados con peticiones simultáneas y sin
+    refresh (la fila vuelve completa del INSERT).
+    """
+    session = insert_or_get(db, TrainingSession, values, ["user_id", "pokemon_id"])
+    # Fuera de la sesión el commit no la caduca: se sirve sin volver a leerla
+    db.expunge(session)
     db.commit()
-    db.refresh(db_session)
-    return db_session
+    # Una especie nueva entra en el catálogo con el commit
+    species_catalog.fill(session)
+    return session
 
 def update_training_session(user_id: int, session_id: int, update_data: TrainingSessionUpdate, db: Session):
     session = db.query(TrainingSession).filter(
@@ -141,8 +167,22 @@ def update_training_session(user_id: int, session_id: int, update_data: Training
     db.refresh(session)
     return session
 
-def get_user_training_sessions(user_id: int, db: Session):
-    return db.query(TrainingSession).filter(TrainingSession.user_id == user_id).all()
+def get_user_training_sessions(user_id: int, db: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """
+    Obtiene una página de sesiones de entrenamiento ordenadas por (created_at, id).
+
+    Returns:
+        (sesiones, siguiente_cursor)
+    """
+    query = db.query(TrainingSession).filter(TrainingSession.user_id == user_id)
+    return paginate_keyset(
+        query,
+        keys=[(TrainingSession.created_at, False), (TrainingSession.id, False)],
+        row_values=lambda s: (s.created_at, s.id),
+        parsers=[datetime.fromisoformat, int],
+        limit=limit,
+        cursor=cursor
+    )
 
 def delete_training_session(user_id: int, session_id: int, db: Session):
     session = db.query(TrainingSession).filter(
@@ -157,6 +197,73 @@ def delete_training_session(user_id: int, session_id: int, db: Session):
     db.commit()
     return {"message": "Sesión de entrenamiento eliminada"}
 
+def dedupe_training_sessions(db: Session, dry_run: bool = False) -> dict:
+    """
+    Dejar una sola sesión por (user_id, pokemon_id) y crear uq_training_sessions_user_pokemon.
+
+    Para bases creadas antes del índice único (create_all no lo añade a una
+    tabla existente). De cada grupo repetido se conserva la sesión con más
+    EVs entrenados y, a igualdad, la más reciente.
+    """
+    duplicated = db.query(TrainingSession.user_id, TrainingSession.pokemon_id).group_by(
+        TrainingSession.user_id, TrainingSession.pokemon_id
+    ).having(func.count(TrainingSession.id) > 1).all()
+
+    removed = []
+    for user_id, pokemon_id in duplicated:
+        sessions = db.query(TrainingSession.id).filter(
+            TrainingSession.user_id == user_id,
+            TrainingSession.pokemon_id == pokemon_id
+        ).order_by(desc(func.coalesce(TrainingSession.total_ev_points, 0)), desc(TrainingSession.id)).all()
+        removed.extend(session_id for session_id, in sessions[1:])
+
+    if not dry_run:
+        if removed:
+            db.query(TrainingSession).filter(TrainingSession.id.in_(removed)).delete(synchronize_session=False)
+        db.commit()
+        for index in TrainingSession.__table__.indexes:
+            if index.unique:
+                index.create(db.get_bind(), checkfirst=True)
+
+    return {"duplicated_groups": len(duplicated), "sessions_removed": len(removed), "dry_run": dry_run}
+
+def dedupe_search_history(db: Session, dry_run: bool = False) -> dict:
+    """
+    Dejar una sola fila por (user_id, pokemon_id) en search_history y crear uq_search_history_user_pokemon.
+
+    Para bases creadas antes del índice único. Las filas repetidas se
+    fusionan en la más reciente: suma de search_count y el last_searched
+    mayor, así no se pierde ninguna búsqueda.
+    """
+    duplicated = db.query(
+        SearchHistory.user_id, SearchHistory.pokemon_id,
+        func.sum(SearchHistory.search_count), func.max(SearchHistory.last_searched)
+    ).group_by(
+        SearchHistory.user_id, SearchHistory.pokemon_id
+    ).having(func.count(SearchHistory.id) > 1).all()
+
+    removed = []
+    for user_id, pokemon_id, search_count, last_searched in duplicated:
+        rows = db.query(SearchHistory.id).filter(
+            SearchHistory.user_id == user_id,
+            SearchHistory.pokemon_id == pokemon_id
+        ).order_by(desc(SearchHistory.last_searched), desc(SearchHistory.id)).all()
+        removed.extend(search_id for search_id, in rows[1:])
+        if not dry_run:
+            db.query(SearchHistory).filter(SearchHistory.id == rows[0][0]).update(
+                {"search_count": search_count, "last_searched": last_searched}, synchronize_session=False
+            )
+
+    if not dry_run:
+        if removed:
+            db.query(SearchHistory).filter(SearchHistory.id.in_(removed)).delete(synchronize_session=False)
+        db.commit()
+        for index in SearchHistory.__table__.indexes:
+            if index.unique:
+                index.create(db.get_bind(), checkfirst=True)
+
+    return {"duplicated_groups": len(duplicated), "rows_removed": len(removed), "dry_run": dry_run}
+
 # ===== FAVORITE POKEMON =====
 def add_favorite_pokemon(user_id: int, pokemon_data: FavoritePokemonCreate, db: Session):
     # Verificar si ya existe
@@ -168,12 +275,16 @@ def add_favorite_pokemon(user_id: int, pokemon_data: FavoritePokemonCreate, db:
     if existing:
         raise ValueError("Este pokémon ya está en favoritos")
     
+    pokemon_sprite, pokemon_types = species_catalog.register(
+        db, pokemon_data.pokemon_id, pokemon_data.pokemon_name,
+        pokemon_data.pokemon_sprite, pokemon_data.pokemon_types
+    )
     db_favorite = FavoritePokemon(
         user_id=user_id,
         pokemon_id=pokemon_data.pokemon_id,
         pokemon_name=pokemon_data.pokemon_name,
-        pokemon_sprite=pokemon_data.pokemon_sprite,
-        pokemon_types=pokemon_data.pokemon_types,
+        pokemon_sprite=pokemon_sprite,
+        pokemon_types=pokemon_types,
         usage_count=0
     )
     
@@ -182,19 +293,31 @@ def add_favorite_pokemon(user_id: int, pokemon_data: FavoritePokemonCreate, db:
     db.refresh(db_favorite)
     return db_favorite
 
-def get_user_favorites(user_id: int, limit: int = 5, db: Session = None):
+def get_user_favorites(user_id: int, limit: int = 5, db: Session = None, cursor: str = None):
+    """
+    Obtiene una página de favoritos ordenados por (usage_count, last_used, id).
+
+    Returns:
+        (favoritos, siguiente_cursor)
+    """
     if db is None:
         from app.database import get_db
         db = next(get_db())
     
-    favorites = db.query(FavoritePokemon).filter(
-        FavoritePokemon.user_id == user_id
-    ).order_by(
-        FavoritePokemon.usage_count.desc(),  # Ordenar por más usados
-        FavoritePokemon.last_used.desc()     # Luego por más recientes
-    ).limit(limit).all()
-    
-    return favorites
+    query = db.query(FavoritePokemon).filter(FavoritePokemon.user_id == user_id)
+    return paginate_keyset(
+        query,
+        keys=[
+            (FavoritePokemon.usage_count, True),          # Ordenar por más usados
+            (FavoritePokemon.last_used.is_(None), False),  # Los nunca usados (NULL) al final, igual que antes
+            (FavoritePokemon.last_used, True),            # Luego por más recientes
+            (FavoritePokemon.id, True)
+        ],
+        row_values=lambda f: (f.usage_count, f.last_used is None, f.last_used, f.id),
+        parsers=[int, bool, datetime.fromisoformat, int],
+        limit=limit,
+        cursor=cursor
+    )
 
 def increment_pokemon_usage(user_id: int, pokemon_id: int, db: Session):
     favorite = db.query(FavoritePokemon).filter(
@@ -233,15 +356,6 @@ def create_training_session_for_pokemon_with_details(
     base_stats: dict = None,
     db: Session = None
 ):
-    # Verificar si ya existe
-    existing = db.query(TrainingSession).filter(
-        TrainingSession.user_id == user_id,
-        TrainingSession.pokemon_id == pokemon_id
-    ).first()
-    
-    if existing:
-        return existing
-    
     # VALIDAR que base_stats no esté vacío
     if not base_stats or len(base_stats) == 0:
         base_stats = {
@@ -271,25 +385,24 @@ def create_training_session_for_pokemon_with_details(
         "speed": 252
     }
     
-    db_session = TrainingSession(
+    # Sprite y tipos llegan del catálogo al leer la sesión si coinciden con él
+    pokemon_sprite, pokemon_types = species_catalog.register(
+        db, pokemon_id, pokemon_name, pokemon_sprite, pokemon_types
+    )
+    # Si ya existe se devuelve tal cual, igual que antes, pero sin SELECT previo
+    return _upsert_training_session(db, dict(
         user_id=user_id,
         pokemon_id=pokemon_id,
         pokemon_name=pokemon_name,
-        pokemon_sprite=pokemon_sprite,  # DEBE TENER VALOR
-        pokemon_types=pokemon_types,    # DEBE TENER VALOR
+        pokemon_sprite=pokemon_sprite,
+        pokemon_types=pokemon_types,
         base_stats=base_stats,           # DEBE TENER VALOR
         current_evs=current_evs,
         max_evs=max_evs,
         total_ev_points=0,
         max_ev_points=510,
         remaining_points=510
-    )
-    
-    db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
-    
-    return db_session
+    ))
 
 # ===== SEARCH HISTORY & SMART FAVORITES =====
 
@@ -305,60 +418,137 @@ def track_pokemon_search(user_id: int, search_data: SearchHistoryCreate, db: Ses
     Returns:
         SearchHistory: Registro de búsqueda actualizado
     """
-    # Buscar si ya existe una búsqueda previa de este Pokémon por este usuario
-    existing_search = db.query(SearchHistory).filter(
+    pokemon_sprite, pokemon_types = species_catalog.register(
+        db, search_data.pokemon_id, search_data.pokemon_name,
+        search_data.pokemon_sprite, search_data.pokemon_types
+    )
+    # Crear o incrementar en una sola sentencia (uq_search_history_user_pokemon)
+    _upsert_searches(db, [{
+        "user_id": user_id,
+        "pokemon_id": search_data.pokemon_id,
+        "pokemon_name": search_data.pokemon_name,
+        "pokemon_sprite": pokemon_sprite,
+        "pokemon_types": pokemon_types,
+        "search_count": 1,
+        "last_searched": datetime.utcnow(),
+    }])
+    db.commit()
+    autocomplete_index.record(search_data.pokemon_id)
+    return db.query(SearchHistory).filter(
         SearchHistory.user_id == user_id,
         SearchHistory.pokemon_id == search_data.pokemon_id
-    ).first()
+    ).one()
+
+def _upsert_searches(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Crear o acumular filas de search_history; devuelve cuántas ya existían.
+
+    El contador se incrementa en SQL para no perder búsquedas concurrentes y
+    last_searched se queda con la marca más reciente. Sprite y tipos toman
+    los de la búsqueda (NULL = los del catálogo).
+    """
+    return upsert_accumulate(
+        db, SearchHistory, rows, ["user_id", "pokemon_id"],
+        add=["search_count"], greatest=["last_searched"], replace=["pokemon_sprite", "pokemon_types"]
+    )
+
+def track_pokemon_searches(user_id: int, items: List[SearchHistoryBatchItem], db: Session) -> SearchHistoryBatchResponse:
+    """
+    Registra un lote de búsquedas en una sola transacción.
     
-    if existing_search:
-        # Actualizar contador y timestamp
-        existing_search.search_count += 1
-        existing_search.last_searched = datetime.utcnow()
-        # Actualizar datos del Pokémon por si han cambiado
-        existing_search.pokemon_sprite = search_data.pokemon_sprite
-        existing_search.pokemon_types = search_data.pokemon_types
-        db.commit()
-        db.refresh(existing_search)
-        return existing_search
-    else:
-        # Crear nuevo registro de búsqueda
-        new_search = SearchHistory(
-            user_id=user_id,
-            pokemon_id=search_data.pokemon_id,
-            pokemon_name=search_data.pokemon_name,
-            pokemon_sprite=search_data.pokemon_sprite,
-            pokemon_types=search_data.pokemon_types,
-            search_count=1,
-            last_searched=datetime.utcnow()
-        )
-        db.add(new_search)
-        db.commit()
-        db.refresh(new_search)
-        return new_search
+    Las búsquedas repetidas del mismo Pokémon se agrupan: el contador sube
+    en el número de repeticiones y last_searched toma la marca más reciente
+    (las marcas del cliente en el futuro se recortan a ahora). Las especies
+    se registran con register_many y las filas se crean o acumulan con un
+    único INSERT multi-fila con upsert (uq_search_history_user_pokemon):
+    unas pocas sentencias por lote, sin importar cuántas búsquedas lleguen.
+    
+    Args:
+        user_id: ID del usuario
+        items: Búsquedas con marca de tiempo opcional del cliente
+        db: Sesión de base de datos
+        
+    Returns:
+        SearchHistoryBatchResponse: Resumen de búsquedas creadas y actualizadas
+    """
+    now = datetime.utcnow()
+    grouped: Dict[int, Dict[str, Any]] = {}
+    for item in items:
+        searched_at = item.searched_at or now
+        if searched_at.tzinfo is not None:
+            searched_at = searched_at.astimezone(timezone.utc).replace(tzinfo=None)
+        # Segundos enteros, como DATETIME en MySQL: la marca guardada es la que devuelve el cursor
+        searched_at = min(searched_at, now).replace(microsecond=0)
+
+        entry = grouped.get(item.pokemon_id)
+        if entry is None:
+            grouped[item.pokemon_id] = {"item": item, "count": 1, "last_searched": searched_at}
+            continue
+        entry["count"] += 1
+        if searched_at >= entry["last_searched"]:
+            # Los datos del Pokémon se toman de la búsqueda más reciente
+            entry["item"] = item
+            entry["last_searched"] = searched_at
+
+    compacted = species_catalog.register_many(db, [
+        (pokemon_id, entry["item"].pokemon_name, entry["item"].pokemon_sprite, entry["item"].pokemon_types)
+        for pokemon_id, entry in grouped.items()
+    ])
+    rows = [
+        {
+            "user_id": user_id,
+            "pokemon_id": pokemon_id,
+            "pokemon_name": entry["item"].pokemon_name,
+            "pokemon_sprite": pokemon_sprite,
+            "pokemon_types": pokemon_types,
+            "search_count": entry["count"],
+            "last_searched": entry["last_searched"],
+        }
+        for (pokemon_id, entry), (pokemon_sprite, pokemon_types) in zip(grouped.items(), compacted)
+    ]
+    updated = _upsert_searches(db, rows)
+    db.commit()
+    for pokemon_id, entry in grouped.items():
+        autocomplete_index.record(pokemon_id, entry["count"])
+
+    return SearchHistoryBatchResponse(
+        received=len(items),
+        tracked=len(grouped),
+        created=len(rows) - updated,
+        updated=updated
+    )
 
-def get_user_search_history(user_id: int, limit: int = 10, db: Session = None) -> List[SearchHistory]:
+def get_user_search_history(user_id: int, limit: int = 10, db: Session = None, cursor: str = None):
     """
     Obtiene el historial de búsquedas de un usuario.
     
     Args:
         user_id: ID del usuario
-        limit: Número máximo de resultados
+        limit: Número máximo de resultados por página
         db: Sesión de base de datos
+        cursor: Cursor de la página anterior (None para la primera)
         
     Returns:
-        List[SearchHistory]: Lista de búsquedas ordenadas por relevancia
+        (List[SearchHistory], siguiente_cursor): Búsquedas ordenadas por
+        (search_count, last_searched, id) descendente
     """
     if db is None:
         from app.database import get_db
         db = next(get_db())
     
-    return db.query(SearchHistory).filter(
-        SearchHistory.user_id == user_id
-    ).order_by(
-        desc(SearchHistory.search_count),
-        desc(SearchHistory.last_searched)
-    ).limit(limit).all()
+    query = db.query(SearchHistory).filter(SearchHistory.user_id == user_id)
+    return paginate_keyset(
+        query,
+        keys=[
+            (SearchHistory.search_count, True),
+            (SearchHistory.last_searched, True),
+            (SearchHistory.id, True)
+        ],
+        row_values=lambda h: (h.search_count, h.last_searched, h.id),
+        parsers=[int, datetime.fromisoformat, int],
+        limit=limit,
+        cursor=cursor
+    )
 
 def get_global_popular_pokemon(limit: int = 5, db: Session = None) -> List[SmartFavoriteResponse]:
     """
@@ -375,35 +565,47 @@ def get_global_popular_pokemon(limit: int = 5, db: Session = None) -> List[Smart
         from app.database import get_db
         db = next(get_db())
     
-    # Consulta para obtener Pokémon más buscados globalmente
-    popular_pokemon = db.query(
-        SearchHistory.pokemon_id,
-        SearchHistory.pokemon_name,
-        SearchHistory.pokemon_sprite,
-        SearchHistory.pokemon_types,
-        func.sum(SearchHistory.search_count).label('total_searches'),
-        func.count(SearchHistory.user_id).label('unique_users')
-    ).group_by(
-        SearchHistory.pokemon_id,
-        SearchHistory.pokemon_name,
-        SearchHistory.pokemon_sprite,
-        SearchHistory.pokemon_types
-    ).order_by(
-        desc('total_searches'),
-        desc('unique_users')
-    ).limit(limit).all()
+    # Pokémon más buscados globalmente: el historial vivo más los agregados
+    # diarios de las filas que ya borró la retención (como el autocompletado).
+    # Se agrupa solo por pokemon_id: sprite y tipos salen del catálogo, no de
+    # cada fila. unique_users suma los usuarios de cada día agregado, así que
+    # un usuario que buscó en varios días cuenta varias veces (aproximación).
+    searches = union_all(
+        select(
+            SearchHistory.pokemon_id, SearchHistory.pokemon_name, SearchHistory.search_count,
+            literal(1).label('users')
+        ),
+        select(
+            SearchHistoryDaily.pokemon_id, SearchHistoryDaily.pokemon_name, SearchHistoryDaily.search_count,
+            SearchHistoryDaily.unique_users.label('users')
+        )
+    ).subquery()
+    popular_pokemon = db.execute(
+        select(
+            searches.c.pokemon_id,
+            func.max(searches.c.pokemon_name).label('pokemon_name'),
+            func.sum(searches.c.search_count).label('total_searches'),
+            func.sum(searches.c.users).label('unique_users')
+        ).group_by(
+            searches.c.pokemon_id
+        ).order_by(
+            desc('total_searches'),
+            desc('unique_users')
+        ).limit(limit)
+    ).all()
     
     # Convertir a SmartFavoriteResponse con scoring
     results = []
     for pokemon in popular_pokemon:
         # Calcular score de relevancia (búsquedas totales * usuarios únicos)
         relevance_score = float(pokemon.total_searches * pokemon.unique_users)
+        pokemon_sprite, pokemon_types = species_catalog.resolve(pokemon.pokemon_id)
         
         results.append(SmartFavoriteResponse(
             pokemon_id=pokemon.pokemon_id,
             pokemon_name=pokemon.pokemon_name,
-            pokemon_sprite=pokemon.pokemon_sprite,
-            pokemon_types=pokemon.pokemon_types,
+            pokemon_sprite=pokemon_sprite,
+            pokemon_types=pokemon_types,
             relevance_score=relevance_score,
             source="global_popular"
         ))
@@ -465,7 +667,7 @@ def get_user_based_favorites(user_id: int, limit: int = 5, db: Session = None) -
                 pokemon_id=pokemon.pokemon_id,
                 pokemon_name=pokemon.pokemon_name,
                 pokemon_sprite=pokemon.pokemon_sprite,
-                pokemon_types=None,  # No tenemos tipos en UserPokemon
+                pokemon_types=species_catalog.resolve(pokemon.pokemon_id)[1],  # UserPokemon no guarda tipos
                 relevance_score=relevance_score,
                 source="team_usage"
             ))
@@ -482,17 +684,21 @@ def get_user_based_favorites(user_id: int, limit: int = 5, db: Session = None) -
     results.sort(key=lambda x: x.relevance_score, reverse=True)
     return results[:limit]
 
-def get_smart_favorites(user_id: int, limit: int = 5, db: Session = None) -> List[SmartFavoriteResponse]:
+def get_smart_favorites(user_id: int, limit: int = 5, db: Session = None, mode: str = "history") -> List[SmartFavoriteResponse]:
     """
     Obtiene favoritos inteligentes basándose en el comportamiento del usuario.
     
     Para usuarios nuevos: devuelve Pokémon populares globalmente.
     Para usuarios existentes: devuelve favoritos personalizados.
+    Con mode="similar", primero van los Pokémon que buscan los usuarios con
+    un historial parecido (precalculados por rebuild_similar_users.py) y se
+    completa con el modo normal.
     
     Args:
         user_id: ID del usuario
         limit: Número máximo de resultados
         db: Sesión de base de datos
+        mode: "history" (propio historial) o "similar" (usuarios parecidos)
         
     Returns:
         List[SmartFavoriteResponse]: Lista de favoritos inteligentes
@@ -501,6 +707,14 @@ def get_smart_favorites(user_id: int, limit: int = 5, db: Session = None) -> Lis
         from app.database import get_db
         db = next(get_db())
     
+    if mode == "similar":
+        results = get_similar_user_favorites(user_id, limit, db)
+        if len(results) < limit:
+            suggested = {r.pokemon_id for r in results}
+            fallback = get_smart_favorites(user_id, limit, db)
+            results.extend(r for r in fallback if r.pokemon_id not in suggested)
+        return results[:limit]
+    
     # Verificar si el usuario tiene historial de búsquedas
     search_count = db.query(SearchHistory).filter(
         SearchHistory.user_id == user_id
@@ -513,23 +727,32 @@ def get_smart_favorites(user_id: int, limit: int = 5, db: Session = None) -> Lis
         # Usuario existente: devolver favoritos basados en su comportamiento
         return get_user_based_favorites(user_id, limit, db)
 
-def create_pokemon_team(user_id: int, team_data: PokemonTeamCreate, db: Session) -> PokemonTeamResponse:
+def validate_team_members(team_members: list):
     """
-    Crear un nuevo equipo de Pokémon para un usuario.
-    Validación: 1-6 Pokémon por equipo.
+    Validar los miembros de un equipo: cantidad (1-6) y posiciones únicas entre 1 y 6.
+
+    Raises:
+        ValueError: Con el mensaje del primer problema encontrado
     """
     # Validar cantidad de Pokémon
-    if len(team_data.team_members) < 1 or len(team_data.team_members) > 6:
+    if len(team_members) < 1 or len(team_members) > 6:
         raise ValueError("Un equipo debe tener entre 1 y 6 Pokémon")
     
     # Validar posiciones únicas
-    positions = [member.position for member in team_data.team_members]
+    positions = [member.position for member in team_members]
     if len(positions) != len(set(positions)):
         raise ValueError("Las posiciones de los Pokémon deben ser únicas")
     
     # Validar rango de posiciones (1-6)
     if any(pos < 1 or pos > 6 for pos in positions):
         raise ValueError("Las posiciones deben estar entre 1 y 6")
+
+def create_pokemon_team(user_id: int, team_data: PokemonTeamCreate, db: Session) -> PokemonTeamResponse:
+    """
+    Crear un nuevo equipo de Pokémon para un usuario.
+    Validación: 1-6 Pokémon por equipo.
+    """
+    validate_team_members(team_data.team_members)
     
     try:
         # Crear equipo
@@ -543,13 +766,17 @@ def create_pokemon_team(user_id: int, team_data: PokemonTeamCreate, db: Session)
         db.flush()  # Para obtener el ID del equipo
         
         # Agregar miembros del equipo
-        for member_data in team_data.team_members:
+        compacted = species_catalog.register_many(db, [
+            (member_data.pokemon_id, member_data.pokemon_name, member_data.pokemon_sprite, member_data.pokemon_types)
+            for member_data in team_data.team_members
+        ])
+        for member_data, (pokemon_sprite, pokemon_types) in zip(team_data.team_members, compacted):
             team_member = PokemonTeamMember(
                 team_id=new_team.id,
                 pokemon_id=member_data.pokemon_id,
                 pokemon_name=member_data.pokemon_name,
-                pokemon_sprite=member_data.pokemon_sprite,
-                pokemon_types=member_data.pokemon_types,
+                pokemon_sprite=pokemon_sprite,
+                pokemon_types=pokemon_types,
                 nickname=member_data.nickname,
                 level=member_data.level,
                 selected_ability=member_data.selected_ability,
@@ -566,6 +793,8 @@ def create_pokemon_team(user_id: int, team_data: PokemonTeamCreate, db: Session)
             db.add(team_member)
         
         db.commit()
+        team_recommender.apply(added=[member.pokemon_id for member in team_data.team_members])
+        team_stats.apply(added=[from_member(member) for member in team_data.team_members])
         db.refresh(new_team)
         return new_team
         
@@ -574,13 +803,47 @@ def create_pokemon_team(user_id: int, team_data: PokemonTeamCreate, db: Session)
         raise
 
 
-def get_user_teams(user_id: int, db: Session) -> List[PokemonTeamResponse]:
+def get_user_teams(user_id: int, db: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None,
+                   summary: bool = False):
+    """
+    Obtiene una página de equipos: favoritos primero y luego los más recientes.
 
-    teams = db.query(PokemonTeam).filter(PokemonTeam.user_id == user_id).order_by(
-        PokemonTeam.is_favorite.desc(), 
-        PokemonTeam.created_at.desc()
-    ).all()
-    return teams
+    El orden (is_favorite, created_at, id) es total, por lo que el cursor es
+    estable aunque se creen equipos entre una página y otra.
+
+    Los miembros se cargan con una sola consulta extra (selectinload) en lugar
+    de una por equipo. Con summary=True solo se leen las columnas que necesita
+    el listado (nombre, favorito y sprites), sin movimientos, EVs ni IVs.
+
+    Returns:
+        (equipos, siguiente_cursor)
+    """
+    query = db.query(PokemonTeam).filter(PokemonTeam.user_id == user_id)
+    if summary:
+        query = query.options(
+            load_only(PokemonTeam.id, PokemonTeam.team_name, PokemonTeam.is_favorite, PokemonTeam.created_at),
+            selectinload(PokemonTeam.team_members).load_only(
+                PokemonTeamMember.team_id,
+                PokemonTeamMember.pokemon_id,
+                PokemonTeamMember.pokemon_name,
+                PokemonTeamMember.pokemon_sprite,
+                PokemonTeamMember.position
+            )
+        )
+    else:
+        query = query.options(selectinload(PokemonTeam.team_members))
+    return paginate_keyset(
+        query,
+        keys=[
+            (PokemonTeam.is_favorite, True),
+            (PokemonTeam.created_at, True),
+            (PokemonTeam.id, True)
+        ],
+        row_values=lambda t: (bool(t.is_favorite), t.created_at, t.id),
+        parsers=[bool, datetime.fromisoformat, int],
+        limit=limit,
+        cursor=cursor
+    )
 
 
 def get_team_by_id(user_id: int, team_id: int, db: Session) -> PokemonTeamResponse:
@@ -615,22 +878,30 @@ def update_pokemon_team(user_id: int, team_id: int, update_data: PokemonTeamUpda
         team.is_favorite = update_data.is_favorite
     
     # Actualizar miembros si se proporcionan
+    previous_members = None
     if update_data.team_members is not None:
         # Validar cantidad
         if len(update_data.team_members) < 1 or len(update_data.team_members) > 6:
             raise ValueError("Un equipo debe tener entre 1 y 6 Pokémon")
         
-        # Eliminar miembros existentes
+        # Eliminar miembros existentes (recordando cuáles eran para el recomendador y las estadísticas)
+        previous_members = [from_member(member) for member in team.team_members]
         db.query(PokemonTeamMember).filter(PokemonTeamMember.team_id == team_id).delete()
+        # Cambian los miembros aunque no cambie la fila del equipo (UTC, como created_at)
+        team.updated_at = datetime.utcnow()
         
         # Agregar nuevos miembros
-        for member_data in update_data.team_members:
+        compacted = species_catalog.register_many(db, [
+            (member_data.pokemon_id, member_data.pokemon_name, member_data.pokemon_sprite, member_data.pokemon_types)
+            for member_data in update_data.team_members
+        ])
+        for member_data, (pokemon_sprite, pokemon_types) in zip(update_data.team_members, compacted):
             team_member = PokemonTeamMember(
                 team_id=team.id,
                 pokemon_id=member_data.pokemon_id,
                 pokemon_name=member_data.pokemon_name,
-                pokemon_sprite=member_data.pokemon_sprite,
-                pokemon_types=member_data.pokemon_types,
+                pokemon_sprite=pokemon_sprite,
+                pokemon_types=pokemon_types,
                 nickname=member_data.nickname,
                 level=member_data.level,
                 selected_ability=member_data.selected_ability,
@@ -647,6 +918,15 @@ def update_pokemon_team(user_id: int, team_id: int, update_data: PokemonTeamUpda
             db.add(team_member)
     
     db.commit()
+    if previous_members is not None:
+        team_recommender.apply(
+            removed=[member.pokemon_id for member in previous_members],
+            added=[member.pokemon_id for member in update_data.team_members]
+        )
+        team_stats.apply(
+            removed=previous_members,
+            added=[from_member(member) for member in update_data.team_members]
+        )
     db.refresh(team)
     return team
 
@@ -662,8 +942,11 @@ def delete_pokemon_team(user_id: int, team_id: int, db: Session) -> dict:
         raise ValueError("Equipo no encontrado")
     
     team_name = team.team_name
+    members = [from_member(member) for member in team.team_members]
     db.delete(team)
     db.commit()
+    team_recommender.apply(removed=[member.pokemon_id for member in members])
+    team_stats.apply(removed=members)
     
     return {"message": f"Equipo '{team_name}' eliminado exitosamente"}
 
@@ -682,4 +965,143 @@ def toggle_favorite_team(user_id: int, team_id: int, db: Session) -> PokemonTeam
     db.commit()
     db.refresh(team)
     
-    return team
\ No newline at end of file
+    return team
+
+
+def load_team_for_training(user_id: int, team_id: int, db: Session) -> dict:
+    """
+    Cargar un equipo guardado para entrenamiento.
+    
+    Proceso:
+    1. Obtener el equipo guardado y validar que pertenece al usuario
+    2. Limpiar equipo actual (user_pokemon) y sesiones de training existentes
+    3. Copiar Pokémon del equipo guardado al equipo actual (user_pokemon)
+    4. Crear sesiones de training con los EVs existentes (obtiene base_stats de PokeAPI)
+    5. Hacer commit y verificar que todo se cargó correctamente
+    
+    IMPORTANTE: Los Pokémon se agregan a user_pokemon para que el componente
+    training pueda consultarlos y mostrarlos correctamente.
+    
+    Puede ejecutarse dentro de la petición o como trabajo en segundo plano
+    (el resultado es un dict serializable a JSON).
+    """
+    # 1. Obtener el equipo guardado
+    team = db.query(PokemonTeam).filter(
+        PokemonTeam.id == team_id,
+        PokemonTeam.user_id == user_id
+    ).first()
+    
+    if not team:
+        raise ValueError("Equipo no encontrado")
+    
+    # 2. Limpiar equipo actual y sesiones de training existentes
+    db.query(UserPokemon).filter(UserPokemon.user_id == user_id).delete()
+    db.query(TrainingSession).filter(TrainingSession.user_id == user_id).delete()
+    db.commit()
+    
+    # 3. Cargar Pokémon del equipo guardado al equipo actual (user_pokemon)
+    team_loaded = []
+    # Los valores de los miembros ya vienen completados con el catálogo: volver a compactarlos
+    compacted = species_catalog.register_many(db, [
+        (member.pokemon_id, member.pokemon_name, member.pokemon_sprite, member.pokemon_types)
+        for member in team.team_members
+    ])
+    for member, (pokemon_sprite, _) in zip(team.team_members, compacted):
+        team_pokemon = UserPokemon(
+            user_id=user_id,
+            pokemon_id=member.pokemon_id,
+            pokemon_name=member.pokemon_name,
+            pokemon_sprite=pokemon_sprite,
+            selected_ability=member.selected_ability or '',
+            level=member.level
+        )
+        db.add(team_pokemon)
+        db.flush()
+        team_loaded.append(team_pokemon)
+    
+    db.commit()
+    
+    # 4. Crear sesiones de training para cada Pokémon
+    sessions_created = []
+    trained = set()
+    
+    # Mismos valores compactados que user_pokemon (register_many del paso 3)
+    for member, (pokemon_sprite, pokemon_types) in zip(team.team_members, compacted):
+        # Una sesión por especie (uq_training_sessions_user_pokemon): la repetida usa la del primer miembro
+        if member.pokemon_id in trained:
+            continue
+        trained.add(member.pokemon_id)
+        
+        # Obtener estadísticas base de PokeAPI (valores por defecto si falla la API)
+        base_stats = fetch_base_stats(member.pokemon_id) or {
+            'hp': 50,
+            'attack': 50,
+            'defense': 50,
+            'special-attack': 50,
+            'special-defense': 50,
+            'speed': 50
+        }
+        
+        # EVs actuales del equipo guardado
+        current_evs = member.evs or {
+            'hp': 0,
+            'attack': 0,
+            'defense': 0,
+            'special-attack': 0,
+            'special-defense': 0,
+            'speed': 0
+        }
+        
+        total_evs = sum(current_evs.values())
+        remaining_points = 510 - total_evs
+        
+        # Calcular max_evs (estadísticas con EVs aplicados)
+        max_evs = {
+            'hp': base_stats['hp'] + int(current_evs.get('hp', 0) / 4),
+            'attack': base_stats['attack'] + int(current_evs.get('attack', 0) / 4),
+            'defense': base_stats['defense'] + int(current_evs.get('defense', 0) / 4),
+            'special-attack': base_stats['special-attack'] + int(current_evs.get('special-attack', 0) / 4),
+            'special-defense': base_stats['special-defense'] + int(current_evs.get('special-defense', 0) / 4),
+            'speed': base_stats['speed'] + int(current_evs.get('speed', 0) / 4)
+        }
+        
+        training_session = TrainingSession(
+            user_id=user_id,
+            pokemon_id=member.pokemon_id,
+            pokemon_name=member.pokemon_name,
+            pokemon_sprite=pokemon_sprite,
+            pokemon_types=pokemon_types,
+            base_stats=base_stats,
+            current_evs=current_evs,
+            max_evs=max_evs,
+            total_ev_points=total_evs,
+            max_ev_points=510,
+            remaining_points=remaining_points,
+            is_completed=remaining_points <= 0
+        )
+        db.add(training_session)
+        db.flush()
+        sessions_created.append(training_session)
+    
+    db.commit()
+    
+    # Verificación final
+    loaded_team = db.query(UserPokemon).filter(UserPokemon.user_id == user_id).all()
+    
+    return {
+        "message": f"Equipo '{team.team_name}' cargado exitosamente para entrenamiento",
+        "team_loaded": {
+            "id": team.id,
+            "name": team.team_name,
+            "pokemon_count": len(loaded_team)
+        },
+        "sessions_created": [
+            {
+                "id": session.id,
+                "pokemon_name": session.pokemon_name,
+                "current_evs": session.current_evs,
+                "training_points": session.remaining_points
+            }
+            for session in sessions_created
+        ]
+    }
@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.database import PokemonTeamMember
+from app.models.pokemon import TeamSuggestion
+from app.service.catalog import species_catalog
+from app.utils.log import get_logger, log_event
+
+# Segundos entre reconstrucciones completas del índice (la primera, al arrancar; 0 = solo al arrancar)
+RECOMMENDER_REBUILD_INTERVAL_SECONDS = float(os.getenv("RECOMMENDER_REBUILD_INTERVAL_SECONDS", "3600"))
+
+# Filas de pokemon_team_members leídas por viaje durante la reconstrucción
+RECOMMENDER_REBUILD_BATCH = int(os.getenv("RECOMMENDER_REBUILD_BATCH", "5000"))
+
+# Sugerencias máximas por consulta
+MAX_SUGGESTIONS = 20
+
+logger = get_logger("recommender")
+
+
+class CoOccurrenceIndex:
+    """
+    Matriz dispersa de co-ocurrencias entre Pokémon de los equipos guardados.
+
+    pairs[a][b] = número de equipos que contienen a la vez a y b;
+    teams[a] = número de equipos que contienen a. Cada equipo cuenta una vez
+    por especie aunque la repita.
+
+    Crear, editar o borrar un equipo aplica la diferencia en el worker que
+    atiende la petición; la reconstrucción periódica desde la base de datos
+    corrige la deriva entre workers y sustituye los dicts de una vez.
+    """
+
+    def __init__(self):
+        self.pairs: Dict[int, Dict[int, int]] = {}
+        self.teams: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def apply(self, removed: Iterable[int] = (), added: Iterable[int] = ()):
+        """Quitar un equipo (sus pokemon_id) y/o añadir otro. Para una edición, ambos."""
+        removed, added = set(removed), set(added)
+        with self._lock:
+            self._update(removed, -1)
+            self._update(added, 1)
+
+    def _update(self, members: set, delta: int):
+        for a in members:
+            count = self.teams.get(a, 0) + delta
+            if count > 0:
+                self.teams[a] = count
+            else:
+                self.teams.pop(a, None)
+            row = self.pairs.setdefault(a, {})
+            for b in members:
+                if a == b:
+                    continue
+                count = row.get(b, 0) + delta
+                if count > 0:
+                    row[b] = count
+                else:
+                    row.pop(b, None)
+            if not row:
+                del self.pairs[a]
+
+    def rebuild(self) -> Dict[str, int]:
+        """Recalcular el índice completo leyendo los miembros en streaming."""
+        started = time.perf_counter()
+        pairs: Dict[int, Dict[int, int]] = {}
+        teams: Dict[int, int] = {}
+        team_count = 0
+
+        def add(members: set):
+            for a in members:
+                teams[a] = teams.get(a, 0) + 1
+                row = pairs.setdefault(a, {})
+                for b in members:
+                    if a != b:
+                        row[b] = row.get(b, 0) + 1
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(PokemonTeamMember.team_id, PokemonTeamMember.pokemon_id)
+                .order_by(PokemonTeamMember.team_id)
+                .execution_options(stream_results=True, yield_per=RECOMMENDER_REBUILD_BATCH)
+            )
+            current_team, members = None, set()
+            for team_id, pokemon_id in rows:
+                if team_id != current_team:
+                    if members:
+                        add(members)
+                        team_count += 1
+                    current_team, members = team_id, set()
+                members.add(pokemon_id)
+            if members:
+                add(members)
+                team_count += 1
+        finally:
+            db.close()
+
+        with self._lock:
+            self.pairs, self.teams = pairs, teams
+        return {
+            "teams": team_count,
+            "species": len(teams),
+            "pairs": sum(len(row) for row in pairs.values()) // 2,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def suggest(self, members: Iterable[int], limit: int = 5) -> List[TeamSuggestion]:
+        """
+        Pokémon que más acompañan a los del equipo parcial.
+
+        score(c) = suma sobre los miembros m de co(m, c) / sqrt(n(m) * n(c))
+        (similitud coseno), para no recomendar siempre los más populares.
+        Sin miembros conocidos, devuelve los más usados.
+        """
+        members = set(members)
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        scores: Dict[int, float] = {}
+        together: Dict[int, int] = {}
+        # Lock: las importaciones en segundo plano aplican cambios desde otro hilo
+        with self._lock:
+            pairs, teams = self.pairs, self.teams
+            for member in members:
+                row = pairs.get(member)
+                if not row:
+                    continue
+                member_teams = teams.get(member, 1)
+                for candidate, count in row.items():
+                    if candidate in members:
+                        continue
+                    scores[candidate] = scores.get(candidate, 0.0) + count / math.sqrt(
+                        member_teams * teams.get(candidate, 1))
+                    together[candidate] = together.get(candidate, 0) + count
+
+            if scores:
+                best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+            else:
+                total = max(1, max(teams.values(), default=1))
+                best = heapq.nlargest(
+                    limit,
+                    ((pokemon_id, count / total) for pokemon_id, count in teams.items() if pokemon_id not in members),
+                    key=lambda item: (item[1], -item[0])
+                )
+
+        suggestions = []
+        for pokemon_id, score in best:
+            species = species_catalog.get(pokemon_id)
+            suggestions.append(TeamSuggestion(
+                pokemon_id=pokemon_id,
+                pokemon_name=species.name if species else None,
+                pokemon_sprite=species.sprite if species else None,
+                pokemon_types=species.types if species else None,
+                score=round(score, 4),
+                teams_together=together.get(pokemon_id, 0),
+            ))
+        return suggestions
+
+    async def start(self, interval: float = RECOMMENDER_REBUILD_INTERVAL_SECONDS):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, interval: float):
+        # La primera construcción va en segundo plano: no retrasa el arranque
+        while True:
+            try:
+                stats = await asyncio.to_thread(self.rebuild)
+                log_event(logger, logging.INFO, "recommender_rebuilt", **stats)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "recommender_rebuild_failed",
+                          error_type=type(e).__name__, error=str(e))
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+
+team_recommender = CoOccurrenceIndex()
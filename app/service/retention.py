@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.database import SearchHistory, SearchHistoryDaily
+from app.utils.log import get_logger, log_event
+
+# Búsquedas sin actividad en este número de días se agregan y se borran (0 = nunca)
+SEARCH_HISTORY_RETENTION_DAYS = int(os.getenv("SEARCH_HISTORY_RETENTION_DAYS", "180"))
+
+# Filas de historial que se conservan por usuario (0 = sin límite)
+SEARCH_HISTORY_MAX_PER_USER = int(os.getenv("SEARCH_HISTORY_MAX_PER_USER", "500"))
+
+# Filas por transacción: cada lote bloquea solo sus filas y se confirma enseguida
+SEARCH_HISTORY_COMPACTION_CHUNK = int(os.getenv("SEARCH_HISTORY_COMPACTION_CHUNK", "1000"))
+
+# Pausa entre lotes para no competir con el tráfico real
+SEARCH_HISTORY_COMPACTION_PAUSE_SECONDS = float(os.getenv("SEARCH_HISTORY_COMPACTION_PAUSE_SECONDS", "0.05"))
+
+# Ejecutar la compactación dentro del servidor cada N horas (0 = solo por CLI).
+# Con varios workers o instancias, activarlo en una sola.
+SEARCH_HISTORY_RETENTION_INTERVAL_HOURS = float(os.getenv("SEARCH_HISTORY_RETENTION_INTERVAL_HOURS", "0"))
+
+logger = get_logger("retention")
+
+_ROW_COLUMNS = (
+    SearchHistory.id, SearchHistory.user_id, SearchHistory.pokemon_id, SearchHistory.pokemon_name,
+    SearchHistory.pokemon_sprite, SearchHistory.pokemon_types, SearchHistory.search_count,
+    SearchHistory.last_searched
+)
+
+
+def compact_search_history(
+    db: Session,
+    retention_days: int = SEARCH_HISTORY_RETENTION_DAYS,
+    max_per_user: int = SEARCH_HISTORY_MAX_PER_USER,
+    chunk_size: int = SEARCH_HISTORY_COMPACTION_CHUNK,
+    pause_seconds: float = SEARCH_HISTORY_COMPACTION_PAUSE_SECONDS,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Agregar y borrar el historial de búsquedas antiguo o sobrante.
+
+    1. Caducadas: filas con last_searched anterior a retention_days.
+    2. Sobrantes: por usuario, las que quedan fuera de las max_per_user
+       primeras según el orden del historial (search_count, last_searched, id).
+
+    Antes de borrarlas, sus búsquedas se suman en search_history_daily por
+    (día de la última búsqueda, pokemon_id). Se trabaja en lotes de
+    chunk_size filas, cada uno en su propia transacción corta.
+
+    Args:
+        db: Sesión de base de datos
+        retention_days: Días sin actividad antes de caducar (0 = desactivado)
+        max_per_user: Filas conservadas por usuario (0 = desactivado)
+        chunk_size: Filas por lote / transacción
+        pause_seconds: Pausa entre lotes
+        dry_run: Solo contar, sin modificar nada
+
+    Returns:
+        {"expired_rows": int, "overflow_rows": int, "rollup_rows": int, "duration_s": float}
+    """
+    started = time.perf_counter()
+    stats = {"expired_rows": 0, "overflow_rows": 0, "rollup_rows": 0}
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days) if retention_days > 0 else None
+
+    if cutoff is not None:
+        if dry_run:
+            stats["expired_rows"] = db.query(func.count(SearchHistory.id)).filter(
+                SearchHistory.last_searched < cutoff
+            ).scalar()
+        else:
+            last_id = 0
+            while True:
+                # Recorrido por clave primaria: cada consulta continúa donde acabó la anterior
+                rows = db.execute(
+                    select(*_ROW_COLUMNS)
+                    .where(SearchHistory.id > last_id, SearchHistory.last_searched < cutoff)
+                    .order_by(SearchHistory.id)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                stats["rollup_rows"] += _roll_up_and_delete(db, rows)
+                stats["expired_rows"] += len(rows)
+                _pause(pause_seconds)
+
+    if max_per_user > 0:
+        query = db.query(SearchHistory.user_id, func.count(SearchHistory.id))
+        if dry_run and cutoff is not None:
+            # En la simulación las caducadas siguen ahí: no contarlas dos veces
+            query = query.filter(SearchHistory.last_searched >= cutoff)
+        overflowing = query.group_by(SearchHistory.user_id).having(
+            func.count(SearchHistory.id) > max_per_user
+        ).all()
+        db.rollback()
+
+        for user_id, total in overflowing:
+            if dry_run:
+                stats["overflow_rows"] += total - max_per_user
+                continue
+            while True:
+                # Lo que queda más allá de las max_per_user primeras (el índice del historial lo sirve)
+                rows = db.execute(
+                    select(*_ROW_COLUMNS)
+                    .where(SearchHistory.user_id == user_id)
+                    .order_by(
+                        SearchHistory.search_count.desc(),
+                        SearchHistory.last_searched.desc(),
+                        SearchHistory.id.desc()
+                    )
+                    .offset(max_per_user)
+                    .limit(chunk_size)
+                ).all()
+                if not rows:
+                    break
+                stats["rollup_rows"] += _roll_up_and_delete(db, rows)
+                stats["overflow_rows"] += len(rows)
+                _pause(pause_seconds)
+
+    stats["duration_s"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def _roll_up_and_delete(db: Session, rows: List[Any]) -> int:
+    """
+    Borrar las filas y sumarlas en search_history_daily en la misma transacción.
+
+    Entre la lectura y el DELETE una búsqueda concurrente puede acumularse
+    en una de las filas (upsert de track_pokemon_searches). El DELETE exige
+    el search_count leído, que cada búsqueda incrementa: la fila refrescada
+    se conserva y solo se agregan las que de verdad se borraron.
+    """
+    deleted = db.execute(delete(SearchHistory).where(
+        tuple_(SearchHistory.id, func.coalesce(SearchHistory.search_count, 0)).in_(
+            [(row.id, row.search_count or 0) for row in rows]
+        )
+    )).rowcount
+    if deleted < len(rows):
+        kept = set(db.scalars(select(SearchHistory.id).where(SearchHistory.id.in_([row.id for row in rows]))))
+        rows = [row for row in rows if row.id not in kept]
+    if not rows:
+        db.commit()
+        return 0
+
+    grouped: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = ((row.last_searched or datetime.utcnow()).date(), row.pokemon_id)
+        entry = grouped.get(key)
+        if entry is None:
+            entry = grouped[key] = {"row": row, "search_count": 0, "unique_users": 0}
+        entry["search_count"] += row.search_count or 0
+        entry["unique_users"] += 1
+        if (row.last_searched or datetime.min) >= (entry["row"].last_searched or datetime.min):
+            entry["row"] = row
+
+    days = {day for day, _ in grouped}
+    pokemon_ids = {pokemon_id for _, pokemon_id in grouped}
+    existing = {
+        (day, pokemon_id): rollup_id
+        for rollup_id, day, pokemon_id in db.query(
+            SearchHistoryDaily.id, SearchHistoryDaily.day, SearchHistoryDaily.pokemon_id
+        ).filter(SearchHistoryDaily.day.in_(days), SearchHistoryDaily.pokemon_id.in_(pokemon_ids))
+    }
+
+    updates, inserts = [], []
+    for (day, pokemon_id), entry in grouped.items():
+        row = entry["row"]
+        if (day, pokemon_id) in existing:
+            updates.append({
+                "b_id": existing[(day, pokemon_id)],
+                "b_count": entry["search_count"],
+                "b_users": entry["unique_users"],
+            })
+        else:
+            inserts.append({
+                "day": day,
+                "pokemon_id": pokemon_id,
+                "pokemon_name": row.pokemon_name,
+                "pokemon_sprite": row.pokemon_sprite,
+                "pokemon_types": row.pokemon_types,
+                "search_count": entry["search_count"],
+                "unique_users": entry["unique_users"],
+            })
+
+    if updates:
+        db.connection().execute(
+            update(SearchHistoryDaily)
+            .where(SearchHistoryDaily.id == bindparam("b_id"))
+            .values(
+                search_count=SearchHistoryDaily.search_count + bindparam("b_count"),
+                unique_users=SearchHistoryDaily.unique_users + bindparam("b_users")
+            ),
+            updates
+        )
+    if inserts:
+        db.execute(insert(SearchHistoryDaily), inserts)
+    db.commit()
+    return len(updates) + len(inserts)
+
+
+def _pause(seconds: float):
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def run_search_history_retention(dry_run: bool = False) -> Dict[str, Any]:
+    """Compactar con la configuración del entorno en una sesión propia."""
+    db = SessionLocal()
+    try:
+        return compact_search_history(db, dry_run=dry_run)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class RetentionScheduler:
+    """Ejecuta la compactación cada SEARCH_HISTORY_RETENTION_INTERVAL_HOURS en el threadpool."""
+
+    def __init__(self, interval_hours: float = SEARCH_HISTORY_RETENTION_INTERVAL_HOURS):
+        self.interval_hours = interval_hours
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval_hours <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            # Primera ejecución tras un intervalo: un reinicio no dispara la compactación
+            await asyncio.sleep(self.interval_hours * 3600)
+            try:
+                stats = await asyncio.to_thread(run_search_history_retention)
+                log_event(logger, logging.INFO, "search_history_compacted", **stats)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "search_history_compaction_failed",
+                          error_type=type(e).__name__, error=str(e))
+
+
+retention_scheduler = RetentionScheduler()
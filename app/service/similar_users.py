@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.database import SearchHistory, SimilarUserSuggestion
+from app.models.pokemon import SmartFavoriteResponse
+from app.service.catalog import species_catalog
+from app.utils.log import get_logger, log_event
+
+# Búsquedas por usuario que entran en su vector (las de más search_count)
+SIMILAR_USERS_MAX_ITEMS = int(os.getenv("SIMILAR_USERS_MAX_ITEMS", "50"))
+
+# Usuarios por Pokémon en el índice invertido (los de más peso): acota la memoria
+# del índice y el coste de buscar vecinos, a cambio de que la búsqueda sea aproximada
+SIMILAR_USERS_POSTING_LIMIT = int(os.getenv("SIMILAR_USERS_POSTING_LIMIT", "200"))
+
+# Vecinos por usuario y sugerencias guardadas por usuario
+SIMILAR_USERS_NEIGHBORS = int(os.getenv("SIMILAR_USERS_NEIGHBORS", "20"))
+SIMILAR_USERS_SUGGESTIONS = int(os.getenv("SIMILAR_USERS_SUGGESTIONS", "20"))
+
+# Filas leídas por viaje y usuarios escritos por transacción
+SIMILAR_USERS_BATCH = int(os.getenv("SIMILAR_USERS_BATCH", "5000"))
+
+# Reconstruir dentro del servidor cada N horas (0 = solo por CLI).
+# Con varios workers o instancias, activarlo en una sola.
+SIMILAR_USERS_REBUILD_INTERVAL_HOURS = float(os.getenv("SIMILAR_USERS_REBUILD_INTERVAL_HOURS", "0"))
+
+logger = get_logger("similar_users")
+
+
+def rebuild_similar_users(
+    db: Session,
+    max_items: int = SIMILAR_USERS_MAX_ITEMS,
+    posting_limit: int = SIMILAR_USERS_POSTING_LIMIT,
+    neighbors: int = SIMILAR_USERS_NEIGHBORS,
+    suggestions: int = SIMILAR_USERS_SUGGESTIONS,
+    batch_size: int = SIMILAR_USERS_BATCH,
+    dry_run: bool = False
+) -> Dict[str, Any]:
+    """
+    Recalcular las sugerencias por similitud de todos los usuarios.
+
+    1. Cada usuario es un vector disperso pokemon_id -> 1 + log(search_count)
+       con sus max_items búsquedas principales, normalizado (coseno = producto
+       escalar). Los vectores se guardan en arrays compactos (estilo CSR).
+    2. Índice invertido pokemon_id -> los posting_limit usuarios con más peso
+       en él. Los vecinos de un usuario salen de recorrer solo las listas de
+       sus Pokémon: es una búsqueda aproximada, con memoria acotada por
+       especies x posting_limit.
+    3. Cada Pokémon que el usuario no ha buscado puntúa
+       suma(similitud(vecino) * peso del vecino en él); se guardan los
+       `suggestions` mejores en similar_user_suggestions, en lotes de
+       batch_size usuarios por transacción. Las filas de usuarios que ya no
+       tienen vecinos se borran al final.
+
+    Args:
+        db: Sesión de base de datos
+        max_items: Búsquedas por usuario en su vector
+        posting_limit: Usuarios por Pokémon en el índice invertido
+        neighbors: Vecinos por usuario
+        suggestions: Sugerencias guardadas por usuario
+        batch_size: Filas por lectura / usuarios por transacción
+        dry_run: Calcular sin escribir
+
+    Returns:
+        {"users": int, "with_suggestions": int, "postings": int, "duration_s": float}
+    """
+    started = time.perf_counter()
+    # Segundos enteros, como DATETIME en MySQL: si la marca guardada quedara por
+    # debajo de built_at, el DELETE final borraría las filas recién escritas
+    built_at = datetime.utcnow().replace(microsecond=0)
+
+    user_ids = array("i")
+    offsets = array("l", [0])
+    items = array("i")
+    weights = array("f")
+
+    def close_user(user_id: int, vector: List[tuple]):
+        norm = math.sqrt(sum(weight * weight for _, weight in vector))
+        user_ids.append(user_id)
+        for pokemon_id, weight in vector:
+            items.append(pokemon_id)
+            weights.append(weight / norm)
+        offsets.append(len(items))
+
+    rows = db.execute(
+        select(SearchHistory.user_id, SearchHistory.pokemon_id, SearchHistory.search_count)
+        .order_by(SearchHistory.user_id, SearchHistory.search_count.desc(), SearchHistory.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    current_user, vector, seen = None, [], set()
+    for user_id, pokemon_id, search_count in rows:
+        if user_id != current_user:
+            if vector:
+                close_user(current_user, vector)
+            current_user, vector, seen = user_id, [], set()
+        # Ordenadas por search_count: basta con las primeras max_items
+        if len(vector) < max_items and pokemon_id not in seen:
+            seen.add(pokemon_id)
+            vector.append((pokemon_id, 1.0 + math.log(max(1, search_count or 1))))
+    if vector:
+        close_user(current_user, vector)
+    db.rollback()
+
+    # Índice invertido acotado: min-heap de (peso, fila) por Pokémon
+    postings: Dict[int, List[tuple]] = {}
+    for row in range(len(user_ids)):
+        for k in range(offsets[row], offsets[row + 1]):
+            heap = postings.setdefault(items[k], [])
+            if len(heap) < posting_limit:
+                heapq.heappush(heap, (weights[k], row))
+            elif weights[k] > heap[0][0]:
+                heapq.heapreplace(heap, (weights[k], row))
+
+    stats = {"users": len(user_ids), "with_suggestions": 0,
+             "postings": sum(len(heap) for heap in postings.values())}
+    pending: List[Dict[str, Any]] = []
+
+    def flush():
+        if not dry_run and pending:
+            db.execute(delete(SimilarUserSuggestion).where(
+                SimilarUserSuggestion.user_id.in_([entry["user_id"] for entry in pending])))
+            db.execute(insert(SimilarUserSuggestion), pending)
+            db.commit()
+        pending.clear()
+
+    for row in range(len(user_ids)):
+        start, end = offsets[row], offsets[row + 1]
+        own = {items[k]: weights[k] for k in range(start, end)}
+
+        similarity: Dict[int, float] = {}
+        for pokemon_id, weight in own.items():
+            for other_weight, other in postings.get(pokemon_id, ()):
+                if other != row:
+                    similarity[other] = similarity.get(other, 0.0) + weight * other_weight
+        nearest = heapq.nlargest(neighbors, similarity.items(), key=lambda item: (item[1], -item[0]))
+
+        scores: Dict[int, float] = {}
+        for other, sim in nearest:
+            for k in range(offsets[other], offsets[other + 1]):
+                if items[k] not in own:
+                    scores[items[k]] = scores.get(items[k], 0.0) + sim * weights[k]
+        if not scores:
+            continue
+
+        best = heapq.nlargest(suggestions, scores.items(), key=lambda item: (item[1], -item[0]))
+        stats["with_suggestions"] += 1
+        pending.append({
+            "user_id": user_ids[row],
+            "suggestions": [[pokemon_id, round(score, 4)] for pokemon_id, score in best],
+            "neighbors": len(nearest),
+            "built_at": built_at,
+        })
+        if len(pending) >= batch_size:
+            flush()
+    flush()
+
+    if not dry_run:
+        # Usuarios que ya no tienen historial ni vecinos
+        db.execute(delete(SimilarUserSuggestion).where(SimilarUserSuggestion.built_at < built_at))
+        db.commit()
+
+    stats["duration_s"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
+def get_similar_user_favorites(user_id: int, limit: int, db: Session) -> List[SmartFavoriteResponse]:
+    """
+    Sugerencias precalculadas para el usuario: una lectura por clave primaria.
+
+    Devuelve una lista vacía si el usuario aún no tiene fila (sin historial
+    o sin reconstrucción desde su primera búsqueda).
+    """
+    row = db.get(SimilarUserSuggestion, user_id)
+    if row is None:
+        return []
+
+    results = []
+    for pokemon_id, score in row.suggestions:
+        species = species_catalog.get(pokemon_id)
+        if species is None:
+            continue
+        results.append(SmartFavoriteResponse(
+            pokemon_id=pokemon_id,
+            pokemon_name=species.name,
+            pokemon_sprite=species.sprite,
+            pokemon_types=species.types,
+            relevance_score=score,
+            source="similar_users"
+        ))
+        if len(results) >= limit:
+            break
+    return results
+
+
+def run_similar_users_rebuild(dry_run: bool = False) -> Dict[str, Any]:
+    """Reconstruir con la configuración del entorno en una sesión propia."""
+    db = SessionLocal()
+    try:
+        return rebuild_similar_users(db, dry_run=dry_run)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class SimilarUsersScheduler:
+    """Ejecuta la reconstrucción cada SIMILAR_USERS_REBUILD_INTERVAL_HOURS en el threadpool."""
+
+    def __init__(self, interval_hours: float = SIMILAR_USERS_REBUILD_INTERVAL_HOURS):
+        self.interval_hours = interval_hours
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.interval_hours <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            # Las sugerencias están en la BD: un reinicio no necesita recalcularlas
+            await asyncio.sleep(self.interval_hours * 3600)
+            try:
+                stats = await asyncio.to_thread(run_similar_users_rebuild)
+                log_event(logger, logging.INFO, "similar_users_rebuilt", **stats)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "similar_users_rebuild_failed",
+                          error_type=type(e).__name__, error=str(e))
+
+
+similar_users_scheduler = SimilarUsersScheduler()
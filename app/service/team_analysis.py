@@ -0,0 +1,214 @@
+import os
+from collections import OrderedDict
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database import PokemonTeam
+from app.models.pokemon import TeamAnalysisResponse, TeamTypeMatchup
+from app.service.pokedex import TYPE_NAMES, get_pokedex
+from app.utils.metrics import record_cache
+
+# Análisis guardados en memoria (LRU), clave (equipo, miembros con sus tipos)
+TEAM_ANALYSIS_CACHE_SIZE = int(os.getenv("TEAM_ANALYSIS_CACHE_SIZE", "10000"))
+
+TYPE_INDEX = {name: index for index, name in enumerate(TYPE_NAMES)}
+
+# Tabla de tipos (generación 6+): atacante -> (x2, x0.5, x0)
+_CHART = {
+    "normal": ((), ("rock", "steel"), ("ghost",)),
+    "fire": (("grass", "ice", "bug", "steel"), ("fire", "water", "rock", "dragon"), ()),
+    "water": (("fire", "ground", "rock"), ("water", "grass", "dragon"), ()),
+    "electric": (("water", "flying"), ("electric", "grass", "dragon"), ("ground",)),
+    "grass": (("water", "ground", "rock"), ("fire", "grass", "poison", "flying", "bug", "dragon", "steel"), ()),
+    "ice": (("grass", "ground", "flying", "dragon"), ("fire", "water", "ice", "steel"), ()),
+    "fighting": (("normal", "ice", "rock", "dark", "steel"), ("poison", "flying", "psychic", "bug", "fairy"), ("ghost",)),
+    "poison": (("grass", "fairy"), ("poison", "ground", "rock", "ghost"), ("steel",)),
+    "ground": (("fire", "electric", "poison", "rock", "steel"), ("grass", "bug"), ("flying",)),
+    "flying": (("grass", "fighting", "bug"), ("electric", "rock", "steel"), ()),
+    "psychic": (("fighting", "poison"), ("psychic", "steel"), ("dark",)),
+    "bug": (("grass", "psychic", "dark"), ("fire", "fighting", "poison", "flying", "ghost", "steel", "fairy"), ()),
+    "rock": (("fire", "ice", "flying", "bug"), ("fighting", "ground", "steel"), ()),
+    "ghost": (("psychic", "ghost"), ("dark",), ("normal",)),
+    "dragon": (("dragon",), ("steel",), ("fairy",)),
+    "dark": (("psychic", "ghost"), ("fighting", "dark", "fairy"), ()),
+    "steel": (("ice", "rock", "fairy"), ("fire", "water", "electric", "steel"), ()),
+    "fairy": (("fighting", "dragon", "dark"), ("fire", "poison", "steel"), ()),
+}
+
+
+def _build_matrix() -> bytes:
+    """18x18 en un bytes: matrix[atacante * 18 + defensor] = multiplicador x2 (0, 1, 2, 4)."""
+    matrix = bytearray([2] * (len(TYPE_NAMES) ** 2))
+    for attacker, (double, half, immune) in _CHART.items():
+        row = TYPE_INDEX[attacker] * len(TYPE_NAMES)
+        for defenders, value in ((double, 4), (half, 1), (immune, 0)):
+            for defender in defenders:
+                matrix[row + TYPE_INDEX[defender]] = value
+    return bytes(matrix)
+
+
+MATRIX = _build_matrix()
+
+# Conteos por tipo atacante empaquetados en un entero: 4 bits por tipo (un
+# equipo tiene como mucho 6 miembros), así que sumar los perfiles de los
+# miembros suma los 18 contadores a la vez
+LANE_BITS = 4
+LANE_MASK = (1 << LANE_BITS) - 1
+
+
+def _lanes(flags: Sequence[bool]) -> int:
+    return sum(1 << (index * LANE_BITS) for index, flag in enumerate(flags) if flag)
+
+
+def _defensive_profile(defender: Tuple[int, ...]) -> Tuple[int, int, int]:
+    """(débil, resiste, inmune) como enteros por carriles para una combinación de tipos."""
+    size = len(TYPE_NAMES)
+    multipliers = []
+    for attacker in range(size):
+        value = 1
+        for index in defender:
+            value *= MATRIX[attacker * size + index]
+        multipliers.append(value / (2 ** len(defender)))
+    return (
+        _lanes([m > 1 for m in multipliers]),
+        _lanes([0 < m < 1 for m in multipliers]),
+        _lanes([m == 0 for m in multipliers]),
+    )
+
+
+# Las 171 combinaciones posibles (18 simples + 153 dobles), calculadas al importar
+DEFENSIVE_PROFILES: Dict[Tuple[int, ...], Tuple[int, int, int]] = {
+    combo: _defensive_profile(combo)
+    for combo in [(i,) for i in range(len(TYPE_NAMES))] + list(combinations(range(len(TYPE_NAMES)), 2))
+}
+
+# Por tipo atacante, máscara de 18 bits con los tipos a los que pega x2
+SUPER_EFFECTIVE = tuple(
+    sum(1 << defender for defender in range(len(TYPE_NAMES)) if MATRIX[attacker * len(TYPE_NAMES) + defender] == 4)
+    for attacker in range(len(TYPE_NAMES))
+)
+
+
+def _type_key(types: Optional[Sequence[str]]) -> Optional[Tuple[int, ...]]:
+    indexes = sorted({TYPE_INDEX[t.lower()] for t in types or () if t and t.lower() in TYPE_INDEX})[:2]
+    return tuple(indexes) or None
+
+
+def _unpack(value: int) -> List[int]:
+    return [(value >> (index * LANE_BITS)) & LANE_MASK for index in range(len(TYPE_NAMES))]
+
+
+def analyze_types(team_id: int, members: Sequence[Tuple[int, Optional[Sequence[str]]]]) -> TeamAnalysisResponse:
+    """
+    Debilidades, resistencias y cobertura ofensiva (STAB) de un equipo.
+
+    Args:
+        members: (posición, tipos) de cada miembro
+
+    Returns:
+        TeamAnalysisResponse
+    """
+    weak = resist = immune = coverage = 0
+    unknown = []
+    for position, types in members:
+        key = _type_key(types)
+        if key is None:
+            unknown.append(position)
+            continue
+        profile = DEFENSIVE_PROFILES[key]
+        weak += profile[0]
+        resist += profile[1]
+        immune += profile[2]
+        for index in key:
+            coverage |= SUPER_EFFECTIVE[index]
+
+    matchups = [
+        TeamTypeMatchup(type=name, weak=w, resist=r, immune=i)
+        for name, w, r, i in zip(TYPE_NAMES, _unpack(weak), _unpack(resist), _unpack(immune))
+    ]
+    return TeamAnalysisResponse(
+        team_id=team_id,
+        analyzed_members=len(members) - len(unknown),
+        unknown_type_positions=unknown,
+        defensive=matchups,
+        # Neto: más miembros débiles que miembros que resisten o son inmunes
+        weaknesses=[m.type for m in sorted(matchups, key=lambda m: m.resist + m.immune - m.weak)
+                    if m.weak > m.resist + m.immune],
+        resistances=[m.type for m in matchups if m.resist + m.immune > m.weak],
+        offensive_coverage=[name for index, name in enumerate(TYPE_NAMES) if coverage >> index & 1],
+        coverage_gaps=[name for index, name in enumerate(TYPE_NAMES) if not coverage >> index & 1],
+    )
+
+
+class TeamAnalysisCache:
+    """
+    LRU en memoria de análisis por (team_id, miembros).
+
+    La clave lleva (posición, pokemon_id, tipos) de cada miembro, que es
+    todo lo que usa el análisis, así que una entrada nunca queda obsoleta:
+    cambiar un miembro o los tipos de una especie da otra clave y la antigua
+    acaba saliendo por el final del LRU. No depende de updated_at (dos
+    cambios en el mismo segundo darían la misma clave). Solo se usa desde el
+    event loop.
+    """
+
+    def __init__(self, max_size: int = TEAM_ANALYSIS_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: "OrderedDict[tuple, TeamAnalysisResponse]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[TeamAnalysisResponse]:
+        analysis = self.entries.get(key)
+        if analysis is not None:
+            self.entries.move_to_end(key)
+        record_cache("team_analysis", analysis is not None)
+        return analysis
+
+    def put(self, key: tuple, analysis: TeamAnalysisResponse):
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+team_analysis_cache = TeamAnalysisCache()
+
+
+def get_team_analysis(user_id: int, team_id: int, db: Session) -> TeamAnalysisResponse:
+    """
+    Análisis de tipos de un equipo del usuario.
+
+    Los tipos de los miembros salen del catálogo de especies o, si faltan,
+    del pokedex offline; el análisis solo se calcula si esos miembros no
+    están ya en caché.
+
+    Raises:
+        ValueError: Si el equipo no existe o no es del usuario
+    """
+    team = db.query(PokemonTeam).filter(
+        PokemonTeam.id == team_id,
+        PokemonTeam.user_id == user_id
+    ).first()
+
+    if not team:
+        raise ValueError("Equipo no encontrado")
+
+    pokedex = get_pokedex()
+    members = []
+    for member in team.team_members:
+        types = member.pokemon_types
+        if not types and pokedex is not None:
+            entry = pokedex.get(member.pokemon_id)
+            types = entry.types if entry else None
+        members.append((member.position, member.pokemon_id, tuple(types) if types else None))
+    members.sort(key=lambda m: (m[0], m[1]))
+
+    key = (team.id, tuple(members))
+    analysis = team_analysis_cache.get(key)
+    if analysis is not None:
+        return analysis
+
+    analysis = analyze_types(team.id, [(position, types) for position, _, types in members])
+    team_analysis_cache.put(key, analysis)
+    return analysis
@@ -0,0 +1,117 @@
+from typing import List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.database import PokemonTeam, PokemonTeamMember
+from app.models.pokemon import PokemonTeamCreate, BulkTeamImportError, BulkTeamImportResponse
+from app.service.catalog import species_catalog
+from app.service.pokemon import validate_team_members
+from app.service.recommender import team_recommender
+from app.service.team_stats import team_stats, from_member
+from app.utils.validators import validate_nickname
+
+# Equipos insertados por transacción
+IMPORT_CHUNK_SIZE = 200
+
+# Columnas de PokemonTeamMember que se copian tal cual desde PokemonTeamMemberCreate
+MEMBER_FIELDS = (
+    "pokemon_id", "pokemon_name", "pokemon_sprite", "pokemon_types", "level",
+    "selected_ability", "position", "move_1", "move_2", "move_3", "move_4",
+    "held_item", "nature", "evs", "ivs",
+)
+
+
+def validate_teams_for_import(teams: List[PokemonTeamCreate]) -> Tuple[List[Tuple[int, PokemonTeamCreate, List[dict]]], List[BulkTeamImportError]]:
+    """
+    Validar todos los equipos en una sola pasada, sin tocar la base de datos.
+
+    Aplica las mismas reglas que create_pokemon_team (cantidad y posiciones)
+    más la validación de nicknames, y deja preparadas las filas de miembros.
+
+    Returns:
+        (válidos, errores) - válidos es una lista de (índice, equipo, filas_de_miembros)
+    """
+    valid = []
+    errors = []
+
+    for index, team in enumerate(teams):
+        try:
+            validate_team_members(team.team_members)
+            member_rows = []
+            for member in team.team_members:
+                row = {field: getattr(member, field) for field in MEMBER_FIELDS}
+                row["nickname"] = validate_nickname(member.nickname)
+                member_rows.append(row)
+        except ValueError as e:
+            errors.append(BulkTeamImportError(index=index, team_name=team.team_name, error=str(e)))
+            continue
+        except HTTPException as e:
+            errors.append(BulkTeamImportError(index=index, team_name=team.team_name, error=str(e.detail)))
+            continue
+
+        valid.append((index, team, member_rows))
+
+    return valid, errors
+
+
+def import_teams(user_id: int, teams: List[PokemonTeamCreate], db: Session) -> BulkTeamImportResponse:
+    """
+    Importar muchos equipos de golpe para un usuario.
+
+    Los equipos válidos se insertan en bloques de IMPORT_CHUNK_SIZE, una
+    transacción por bloque: los equipos con un flush agrupado (INSERT
+    multi-fila con RETURNING donde el motor lo soporta) y todos sus miembros
+    con un único executemany. Un equipo inválido no aborta el lote; si falla
+    un bloque entero en la base de datos, solo ese bloque se marca con error.
+    """
+    valid, errors = validate_teams_for_import(teams)
+    created_ids = []
+
+    for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+        chunk = valid[start:start + IMPORT_CHUNK_SIZE]
+        try:
+            new_teams = [
+                PokemonTeam(
+                    user_id=user_id,
+                    team_name=team.team_name,
+                    description=team.description,
+                    is_favorite=team.is_favorite
+                )
+                for _, team, _ in chunk
+            ]
+            db.add_all(new_teams)
+            db.flush()  # Para obtener los IDs de los equipos
+
+            member_rows = [
+                {**row, "team_id": new_team.id}
+                for new_team, (_, _, rows) in zip(new_teams, chunk) for row in rows
+            ]
+            # Sprite y tipos iguales a los del catálogo no se copian en cada miembro
+            compacted = species_catalog.register_many(db, [
+                (row["pokemon_id"], row["pokemon_name"], row["pokemon_sprite"], row["pokemon_types"])
+                for row in member_rows
+            ])
+            for row, (sprite, types) in zip(member_rows, compacted):
+                row["pokemon_sprite"], row["pokemon_types"] = sprite, types
+            db.execute(insert(PokemonTeamMember), member_rows)
+            db.commit()
+            created_ids.extend(new_team.id for new_team in new_teams)
+            for _, team, rows in chunk:
+                team_recommender.apply(added=[row["pokemon_id"] for row in rows])
+                team_stats.apply(added=[from_member(member) for member in team.team_members])
+        except Exception as e:
+            db.rollback()
+            errors.extend(
+                BulkTeamImportError(index=index, team_name=team.team_name, error=f"Error al guardar: {str(e)}")
+                for index, team, _ in chunk
+            )
+
+    errors.sort(key=lambda error: error.index)
+    return BulkTeamImportResponse(
+        created_count=len(created_ids),
+        failed_count=len(errors),
+        team_ids=created_ids,
+        errors=errors
+    )
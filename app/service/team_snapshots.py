@@ -0,0 +1,226 @@
+import base64
+import hashlib
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.database import PokemonTeam, TeamSnapshot
+from app.models.pokemon import PokemonTeamCreate, PokemonTeamMemberCreate, TeamSnapshotResponse
+from app.service.pokedex import NATURES, STAT_NAMES, TYPE_NAMES
+
+MAGIC = b"PKTS"
+VERSION = 1
+
+# Cabecera: magic, versión, miembros, índices de nombre y descripción en la tabla de cadenas
+HEADER = struct.Struct("<4sBBHH")
+
+# Miembro: pokemon_id, nivel, posición, flags (1 = EVs, 2 = IVs), naturaleza (índice en NATURES + 1), 2 tipos,
+# 6 EVs de un byte, 6 IVs de 5 bits en un entero y 10 índices de cadena (NONE = sin valor):
+# nombre, nickname, habilidad, 4 movimientos, objeto, sprite y naturaleza no estándar
+MEMBER = struct.Struct("<HBBBB2B6BI10H")
+
+STRING_LENGTH = struct.Struct("<H")
+NONE = 0xFFFF
+HAS_EVS, HAS_IVS = 1, 2
+
+# Naturaleza fuera de NATURES: se guarda como cadena
+CUSTOM_NATURE = 0xFF
+
+# Bytes de sha256 en el identificador (base64 URL: 12 caracteres)
+SNAPSHOT_ID_BYTES = 9
+
+
+def encode_team(team_name: str, description: Optional[str], members: Sequence[PokemonTeamMemberCreate]) -> bytes:
+    """
+    Codificar un equipo en binario.
+
+    Los registros de miembro son de ancho fijo; las cadenas (nombres,
+    movimientos, objetos...) se guardan una sola vez en una tabla al final
+    y los miembros las referencian por índice. Los miembros van ordenados
+    por posición, así que el mismo equipo da siempre los mismos bytes.
+
+    Raises:
+        ValueError: Si un valor no cabe en el formato (EV > 255, IV > 31, más de 6 miembros...)
+    """
+    if not 1 <= len(members) <= 6:
+        raise ValueError("Un equipo debe tener entre 1 y 6 Pokémon")
+
+    strings: List[bytes] = []
+    indexes: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NONE
+        if value not in indexes:
+            encoded = value.encode("utf-8")
+            if len(encoded) > 0xFFFF:
+                raise ValueError("Texto demasiado largo para el snapshot")
+            indexes[value] = len(strings)
+            strings.append(encoded)
+        return indexes[value]
+
+    records = bytearray()
+    header_strings = (intern(team_name), intern(description))
+    for member in sorted(members, key=lambda m: m.position):
+        if not 1 <= member.pokemon_id <= 0xFFFF or not 0 <= member.level <= 255 or not 1 <= member.position <= 6:
+            raise ValueError(f"Miembro fuera de rango: {member.pokemon_name}")
+        flags = 0
+        evs = [0] * len(STAT_NAMES)
+        if member.evs is not None:
+            flags |= HAS_EVS
+            evs = [member.evs.get(stat, 0) for stat in STAT_NAMES]
+            if any(not 0 <= ev <= 255 for ev in evs):
+                raise ValueError(f"EVs fuera de rango en {member.pokemon_name}")
+        ivs = 0
+        if member.ivs is not None:
+            flags |= HAS_IVS
+            for index, stat in enumerate(STAT_NAMES):
+                iv = member.ivs.get(stat, 0)
+                if not 0 <= iv <= 31:
+                    raise ValueError(f"IVs fuera de rango en {member.pokemon_name}")
+                ivs |= iv << (index * 5)
+
+        nature, custom_nature = 0, None
+        if member.nature is not None:
+            if member.nature in NATURES:
+                nature = NATURES.index(member.nature) + 1
+            else:
+                nature, custom_nature = CUSTOM_NATURE, member.nature
+
+        # Los tipos son datos de la especie: si no encajan en la tabla se omiten
+        types = [0, 0]
+        member_types = member.pokemon_types or []
+        if len(member_types) <= 2 and all(t in TYPE_NAMES for t in member_types):
+            types[:len(member_types)] = [TYPE_NAMES.index(t) + 1 for t in member_types]
+
+        records += MEMBER.pack(
+            member.pokemon_id, member.level, member.position, flags, nature, *types, *evs, ivs,
+            intern(member.pokemon_name), intern(member.nickname), intern(member.selected_ability),
+            intern(member.move_1), intern(member.move_2), intern(member.move_3), intern(member.move_4),
+            intern(member.held_item), intern(member.pokemon_sprite), intern(custom_nature),
+        )
+
+    table = bytearray(STRING_LENGTH.pack(len(strings)))
+    for encoded in strings:
+        table += STRING_LENGTH.pack(len(encoded)) + encoded
+    return HEADER.pack(MAGIC, VERSION, len(members), *header_strings) + bytes(records) + bytes(table)
+
+
+def decode_team(payload: bytes) -> Tuple[str, Optional[str], List[PokemonTeamMemberCreate]]:
+    """Inverso de encode_team: (nombre, descripción, miembros)."""
+    magic, version, count, name_index, description_index = HEADER.unpack_from(payload, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Snapshot incompatible (versión {VERSION})")
+
+    offset = HEADER.size + count * MEMBER.size
+    (string_count,) = STRING_LENGTH.unpack_from(payload, offset)
+    offset += STRING_LENGTH.size
+    strings = []
+    for _ in range(string_count):
+        (length,) = STRING_LENGTH.unpack_from(payload, offset)
+        offset += STRING_LENGTH.size
+        strings.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    def text(index: int) -> Optional[str]:
+        return None if index == NONE else strings[index]
+
+    members = []
+    for position in range(count):
+        fields = MEMBER.unpack_from(payload, HEADER.size + position * MEMBER.size)
+        pokemon_id, level, slot, flags, nature = fields[:5]
+        types, evs, ivs = fields[5:7], fields[7:13], fields[13]
+        (name, nickname, ability, move_1, move_2, move_3, move_4,
+         held_item, sprite, custom_nature) = (text(index) for index in fields[14:])
+        members.append(PokemonTeamMemberCreate(
+            pokemon_id=pokemon_id,
+            pokemon_name=name,
+            pokemon_sprite=sprite,
+            pokemon_types=[TYPE_NAMES[t - 1] for t in types if t] or None,
+            nickname=nickname,
+            level=level,
+            selected_ability=ability,
+            position=slot,
+            move_1=move_1,
+            move_2=move_2,
+            move_3=move_3,
+            move_4=move_4,
+            held_item=held_item,
+            nature=custom_nature if nature == CUSTOM_NATURE else (NATURES[nature - 1] if nature else None),
+            evs=dict(zip(STAT_NAMES, evs)) if flags & HAS_EVS else None,
+            ivs={stat: (ivs >> (index * 5)) & 31 for index, stat in enumerate(STAT_NAMES)} if flags & HAS_IVS else None,
+        ))
+    return text(name_index), text(description_index), members
+
+
+def snapshot_id(payload: bytes) -> str:
+    """Identificador corto derivado del contenido: el mismo equipo da el mismo id."""
+    return base64.urlsafe_b64encode(hashlib.sha256(payload).digest()[:SNAPSHOT_ID_BYTES]).decode("ascii")
+
+
+def create_team_snapshot(user_id: int, team_id: int, db: Session) -> TeamSnapshot:
+    """
+    Congelar un equipo del usuario en un snapshot inmutable.
+
+    Compartir dos veces el mismo contenido devuelve el snapshot existente;
+    editar el equipo después no cambia los snapshots ya compartidos.
+
+    Raises:
+        ValueError: Si el equipo no existe o no es del usuario
+    """
+    team = db.query(PokemonTeam).filter(
+        PokemonTeam.id == team_id,
+        PokemonTeam.user_id == user_id
+    ).first()
+
+    if not team:
+        raise ValueError("Equipo no encontrado")
+
+    # Sprite y tipos ya completados con el catálogo al cargar los miembros
+    members = [PokemonTeamMemberCreate.model_validate(member, from_attributes=True) for member in team.team_members]
+    payload = encode_team(team.team_name, team.description, members)
+    key = snapshot_id(payload)
+
+    snapshot = db.get(TeamSnapshot, key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = TeamSnapshot(id=key, payload=payload, created_by=user_id)
+    db.add(snapshot)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Otro usuario compartió el mismo contenido a la vez
+        db.rollback()
+        snapshot = db.get(TeamSnapshot, key)
+    return snapshot
+
+
+def get_team_snapshot(snapshot_key: str, db: Session) -> TeamSnapshot:
+    """
+    Raises:
+        ValueError: Si el snapshot no existe
+    """
+    snapshot = db.get(TeamSnapshot, snapshot_key)
+    if snapshot is None:
+        raise ValueError("Snapshot no encontrado")
+    return snapshot
+
+
+def snapshot_response(snapshot: TeamSnapshot) -> TeamSnapshotResponse:
+    team_name, description, members = decode_team(snapshot.payload)
+    return TeamSnapshotResponse(
+        snapshot_id=snapshot.id,
+        team_name=team_name,
+        description=description,
+        team_members=members,
+        created_at=snapshot.created_at,
+    )
+
+
+def snapshot_to_team(snapshot: TeamSnapshot) -> PokemonTeamCreate:
+    """Datos para recrear el equipo con create_pokemon_team (una sola transacción)."""
+    team_name, description, members = decode_team(snapshot.payload)
+    return PokemonTeamCreate(team_name=team_name, description=description, team_members=members)
@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.models.database import PokemonTeamMember
+from app.models.pokemon import PokemonUsageStat, TeamStatsResponse, UsageCount
+from app.service.catalog import species_catalog
+from app.service.pokedex import STAT_NAMES
+from app.utils.log import get_logger, log_event
+
+# Segundos entre recálculos completos desde pokemon_team_members (el primero, al arrancar; 0 = solo al arrancar)
+TEAM_STATS_REBUILD_INTERVAL_SECONDS = float(os.getenv("TEAM_STATS_REBUILD_INTERVAL_SECONDS", "3600"))
+
+# Filas de pokemon_team_members leídas por viaje durante el recálculo
+TEAM_STATS_REBUILD_BATCH = int(os.getenv("TEAM_STATS_REBUILD_BATCH", "5000"))
+
+# Filas máximas por ranking
+MAX_STATS_ROWS = 50
+
+logger = get_logger("team_stats")
+
+
+class MemberStats(NamedTuple):
+    pokemon_id: int
+    held_item: Optional[str]
+    nature: Optional[str]
+    evs: Optional[Tuple[int, ...]]  # En el orden de STAT_NAMES; None si no tiene EVs guardados
+
+
+def _label(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+def member_stats(pokemon_id: int, held_item: Optional[str] = None, nature: Optional[str] = None,
+                 evs: Optional[Dict[str, Any]] = None) -> MemberStats:
+    """Lo que cuenta de un miembro para las estadísticas (objeto y naturaleza normalizados)."""
+    return MemberStats(
+        pokemon_id=pokemon_id,
+        held_item=_label(held_item),
+        nature=_label(nature),
+        evs=tuple(int(evs.get(stat) or 0) for stat in STAT_NAMES) if isinstance(evs, dict) and evs else None,
+    )
+
+
+def from_member(member: Any) -> MemberStats:
+    """member_stats de un PokemonTeamMember o de un PokemonTeamMemberCreate."""
+    return member_stats(member.pokemon_id, member.held_item, member.nature, member.evs)
+
+
+class TeamStatsRollup:
+    """
+    Agregados de todos los equipos guardados, mantenidos en memoria.
+
+    - species_teams[p]: equipos que contienen la especie p (una vez por equipo)
+    - ev_totals[p]: [miembros con EVs, suma de cada estadística]
+    - held_items / natures: miembros por objeto equipado / naturaleza
+
+    Igual que el recomendador, cada escritura de equipos aplica la
+    diferencia en el worker que la atiende y el recálculo periódico corrige
+    la deriva entre workers. Las respuestas se guardan por `limit` hasta el
+    siguiente cambio, así que una lectura sin escrituras intermedias no
+    recorre nada.
+    """
+
+    def __init__(self):
+        self.teams = 0
+        self.members = 0
+        self.species_teams: Dict[int, int] = {}
+        self.ev_totals: Dict[int, List[int]] = {}
+        self.held_items: Dict[str, int] = {}
+        self.natures: Dict[str, int] = {}
+        self.rebuilt_at: Optional[datetime] = None
+        self._responses: Dict[int, TeamStatsResponse] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def apply(self, removed: Iterable[MemberStats] = (), added: Iterable[MemberStats] = ()):
+        """
+        Quitar los miembros de un equipo y/o añadir los de otro.
+
+        Crear = solo added; borrar = solo removed; cambiar miembros (o sus
+        EVs) = los antiguos en removed y los nuevos en added, sin cambiar el
+        número de equipos.
+        """
+        removed, added = list(removed), list(added)
+        with self._lock:
+            self.teams += bool(added) - bool(removed)
+            self._update(removed, -1)
+            self._update(added, 1)
+            self._responses = {}
+
+    def _update(self, members: List[MemberStats], delta: int):
+        self.members += delta * len(members)
+        for pokemon_id in {member.pokemon_id for member in members}:
+            _count(self.species_teams, pokemon_id, delta)
+        for member in members:
+            if member.held_item:
+                _count(self.held_items, member.held_item, delta)
+            if member.nature:
+                _count(self.natures, member.nature, delta)
+            if member.evs:
+                totals = self.ev_totals.setdefault(member.pokemon_id, [0] * (len(STAT_NAMES) + 1))
+                totals[0] += delta
+                for index, value in enumerate(member.evs, start=1):
+                    totals[index] += delta * value
+                if totals[0] <= 0:
+                    del self.ev_totals[member.pokemon_id]
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Recalcular todos los agregados leyendo los miembros en streaming."""
+        started = time.perf_counter()
+        fresh = TeamStatsRollup()
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(PokemonTeamMember.team_id, PokemonTeamMember.pokemon_id, PokemonTeamMember.held_item,
+                       PokemonTeamMember.nature, PokemonTeamMember.evs)
+                .order_by(PokemonTeamMember.team_id)
+                .execution_options(stream_results=True, yield_per=TEAM_STATS_REBUILD_BATCH)
+            )
+            current_team, members = None, []
+            for team_id, pokemon_id, held_item, nature, evs in rows:
+                if team_id != current_team:
+                    if members:
+                        fresh.apply(added=members)
+                    current_team, members = team_id, []
+                members.append(member_stats(pokemon_id, held_item, nature, evs))
+            if members:
+                fresh.apply(added=members)
+        finally:
+            db.close()
+
+        with self._lock:
+            self.teams, self.members = fresh.teams, fresh.members
+            self.species_teams, self.ev_totals = fresh.species_teams, fresh.ev_totals
+            self.held_items, self.natures = fresh.held_items, fresh.natures
+            self.rebuilt_at = datetime.utcnow()
+            self._responses = {}
+        return {
+            "teams": fresh.teams,
+            "members": fresh.members,
+            "species": len(fresh.species_teams),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def summary(self, limit: int = 10) -> TeamStatsResponse:
+        """Pokémon más usados (con su reparto medio de EVs), objetos y naturalezas más comunes."""
+        limit = max(1, min(limit, MAX_STATS_ROWS))
+        response = self._responses.get(limit)
+        if response is not None:
+            return response
+
+        with self._lock:
+            teams, members = self.teams, self.members
+            top_species = heapq.nlargest(limit, self.species_teams.items(), key=lambda item: (item[1], -item[0]))
+            averages = {
+                pokemon_id: _average(self.ev_totals.get(pokemon_id)) for pokemon_id, _ in top_species
+            }
+            held_items = _ranking(self.held_items, limit, members)
+            natures = _ranking(self.natures, limit, members)
+            rebuilt_at = self.rebuilt_at
+            responses = self._responses
+
+        pokemon = []
+        for pokemon_id, count in top_species:
+            species = species_catalog.get(pokemon_id)
+            pokemon.append(PokemonUsageStat(
+                pokemon_id=pokemon_id,
+                pokemon_name=species.name if species else None,
+                pokemon_sprite=species.sprite if species else None,
+                teams=count,
+                usage_pct=round(100 * count / teams, 2) if teams else 0.0,
+                average_evs=averages[pokemon_id],
+            ))
+        response = TeamStatsResponse(
+            teams=teams,
+            members=members,
+            pokemon=pokemon,
+            held_items=held_items,
+            natures=natures,
+            rebuilt_at=rebuilt_at,
+        )
+        # Si hubo una escritura mientras tanto, se guarda en el dict ya descartado
+        responses[limit] = response
+        return response
+
+    async def start(self, interval: float = TEAM_STATS_REBUILD_INTERVAL_SECONDS):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, interval: float):
+        # El primer cálculo va en segundo plano: no retrasa el arranque
+        while True:
+            try:
+                stats = await asyncio.to_thread(self.rebuild)
+                log_event(logger, logging.INFO, "team_stats_rebuilt", **stats)
+            except Exception as e:
+                log_event(logger, logging.ERROR, "team_stats_rebuild_failed",
+                          error_type=type(e).__name__, error=str(e))
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+
+def _count(counter: Dict[Any, int], key: Any, delta: int):
+    count = counter.get(key, 0) + delta
+    if count > 0:
+        counter[key] = count
+    else:
+        counter.pop(key, None)
+
+
+def _average(totals: Optional[List[int]]) -> Optional[Dict[str, float]]:
+    if not totals or totals[0] <= 0:
+        return None
+    return {stat: round(total / totals[0], 1) for stat, total in zip(STAT_NAMES, totals[1:])}
+
+
+def _ranking(counter: Dict[str, int], limit: int, members: int) -> List[UsageCount]:
+    return [
+        UsageCount(name=name, count=count, usage_pct=round(100 * count / members, 2) if members else 0.0)
+        for name, count in heapq.nlargest(limit, counter.items(), key=lambda item: (item[1], item[0]))
+    ]
+
+
+team_stats = TeamStatsRollup()
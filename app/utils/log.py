@@ -0,0 +1,225 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Nivel mínimo de log (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# "json" para producción (una línea por evento) o "text" para desarrollo
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+# Fracción de eventos muestreados que se conservan (p. ej. logins correctos)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+# Eventos pendientes de escribir antes de empezar a descartar
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# ID de la petición en curso para correlacionar todos sus logs
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            payload["request_id"] = record.request_id
+        payload.update(getattr(record, "fields", None) or {})
+        exception = _exception_text(self, record)
+        if exception:
+            payload["exception"] = exception
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if getattr(record, "request_id", None):
+            line += f" [{record.request_id}]"
+        exception = _exception_text(self, record)
+        if exception:
+            line += "\n" + exception
+        return line
+
+
+def _exception_text(formatter: logging.Formatter, record: logging.LogRecord) -> Optional[str]:
+    # Los registros que pasan por la cola ya traen la traza en exc_text
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return record.exc_text
+
+
+class ContextFilter(logging.Filter):
+    """Añade el request_id y aplica el muestreo en el hilo que emite el log."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloquea el event loop.
+
+    El formateo y la escritura a stdout ocurren en el hilo del
+    QueueListener; si la cola se llena se descarta el evento en lugar de
+    esperar.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolver el mensaje y la traza aquí: los argumentos pueden cambiar después
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def setup_logging():
+    """
+    Configurar el logging de la aplicación (idempotente).
+
+    Los loggers escriben en una cola en memoria y un QueueListener en un
+    hilo aparte los formatea y los envía a stdout, así una ráfaga de logs
+    no añade escrituras síncronas a la latencia de las peticiones.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else TextFormatter()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.handlers = [queue_handler]
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+    # Con gunicorn --preload los workers nacen de un fork del master: el hilo
+    # del listener no se hereda, así que cada worker arranca el suyo
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork():
+    global _listener
+    if _listener is None:
+        return
+    # Cola nueva: el lock de la heredada pudo quedar tomado durante el fork
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    for handler in logging.getLogger("app").handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=False)
+    _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger bajo la jerarquía "app" (p. ej. get_logger("auth") -> app.auth)."""
+    return logging.getLogger(name if name.startswith("app") else f"app.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, sample_rate: float = None, **fields):
+    """
+    Registrar un evento estructurado.
+
+    Args:
+        logger: Logger destino
+        level: logging.INFO, logging.WARNING, ...
+        event: Nombre corto del evento (p. ej. "login_failed")
+        sample_rate: Fracción de eventos a conservar (None = todos)
+        **fields: Campos adicionales del evento
+    """
+    if not logger.isEnabledFor(level):
+        return
+    logger.log(level, event, extra={"fields": {"event": event, **fields}, "sample_rate": sample_rate})
+
+
+def mask_email(email: str) -> str:
+    """Ocultar el email en los logs: "usuario@example.com" -> "u***@example.com"."""
+    if not email or "@" not in email:
+        return "***"
+    local, domain = email.split("@", 1)
+    return f"{local[:1]}***@{domain}"
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que asigna un ID a cada petición.
+
+    Reutiliza la cabecera X-Request-ID si llega del proxy (Traefik/Coolify)
+    y la devuelve en la respuesta para poder correlacionar logs.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
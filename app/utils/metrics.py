@@ -0,0 +1,215 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+# Buckets de latencia en segundos (mismos que el cliente oficial de Prometheus)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+class Counter:
+    """
+    Contador por combinación de etiquetas.
+
+    Sin locks: dict.get/setdefault son atómicos con el GIL y los incrementos
+    se hacen casi siempre desde el event loop. Desde el threadpool se puede
+    perder, como mucho, algún incremento concurrente, algo aceptable para
+    métricas y mucho más barato que sincronizar cada petición.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in list(self.values.items()):
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+class Gauge:
+    """Valor instantáneo; con callback se calcula en el momento del scrape."""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float] = None):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def collect(self) -> Iterable[str]:
+        value = self.value
+        if self.callback is not None:
+            try:
+                value = self.callback()
+            except Exception:
+                return
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {value}"
+
+
+class _HistogramSeries:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """
+    Histograma por combinación de etiquetas.
+
+    observe() solo hace un bisect y tres sumas; los buckets acumulados que
+    pide el formato de Prometheus se calculan al exportar, no al observar.
+    """
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.series: Dict[tuple, _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series.setdefault(label_values, _HistogramSeries(len(self.buckets) + 1))
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def time(self, *label_values):
+        return _Timer(self, label_values)
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in list(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {series.sum}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {series.count}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram: Histogram, label_values: tuple):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ===== MÉTRICAS DE LA APLICACIÓN =====
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "Peticiones HTTP por ruta, método y estado", ("method", "route", "status")))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP por ruta", ("method", "route")))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso"))
+
+pokeapi_request_duration_seconds = registry.register(Histogram(
+    "pokeapi_request_duration_seconds", "Latencia de las llamadas a PokeAPI", ("endpoint",)))
+pokeapi_errors_total = registry.register(Counter(
+    "pokeapi_errors_total", "Errores en llamadas a PokeAPI", ("endpoint", "reason")))
+
+cache_requests_total = registry.register(Counter(
+    "cache_requests_total", "Accesos a cachés en memoria por resultado (hit/miss)", ("cache", "result")))
+
+bcrypt_queue_depth = registry.register(Gauge(
+    "bcrypt_queue_depth", "Operaciones bcrypt (hash/verify) en curso o esperando CPU"))
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests_total.inc(cache, "hit" if hit else "miss")
+
+
+def register_callback_gauge(name: str, help_text: str, callback: Callable[[], float]):
+    return registry.register(Gauge(name, help_text, callback))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición por plantilla de ruta.
+
+    Se usa la plantilla (/api/pokemon/teams/{team_id}) y no la URL real para
+    que el número de series no crezca con los IDs; lo que no coincide con
+    ninguna ruta se agrupa como "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(time.perf_counter() - started, method, route)
+            http_requests_total.inc(method, route, status_code)
@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, literal, or_
+from sqlalchemy.orm import Query
+
+# Tamaño de página por defecto y máximo permitido en los listados
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Codificar los valores de la última fila de una página en un cursor opaco.
+
+    Los datetime se serializan en ISO 8601; el resultado es base64 URL-safe
+    sin padding para poder usarlo directamente en la query string.
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> List[Any]:
+    """
+    Decodificar un cursor generado por encode_cursor.
+
+    Args:
+        cursor: Cursor recibido del cliente
+        parsers: Un conversor por columna (p. ej. bool, int, datetime.fromisoformat)
+
+    Raises:
+        ValueError: Si el cursor está mal formado o no coincide con las columnas
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError
+        return [parse(v) if v is not None else None for parse, v in zip(parsers, values)]
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+
+def _bind(column, value):
+    """
+    Convertir un valor del cursor en parámetro SQL comparable con la columna.
+
+    Se enlaza con el tipo de la propia columna: el datetime llega a la base
+    con el mismo formato con el que se guardó (en SQLite, texto con
+    microsegundos), así que la igualdad de los empates se cumple. Por eso
+    las columnas datetime de orden tienen default en Python además del
+    server_default (CURRENT_TIMESTAMP las guardaría sin microsegundos).
+    También hace que True/False se comparen como parámetro y no como
+    constante.
+    """
+    return literal(value, column.type)
+
+
+def keyset_condition(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """
+    Construir la condición "fila posterior al cursor" para un orden compuesto.
+
+    Se expande como (a < x) OR (a = x AND b < y) OR ... en lugar de usar
+    comparación de tuplas para que funcione igual en MySQL y SQLite y admita
+    columnas con distinta dirección de orden. Las columnas que admiten NULL
+    necesitan antes una clave "columna IS NULL" que separe los NULL del resto.
+
+    Args:
+        keys: Pares (columna, descendente) en el mismo orden que el ORDER BY
+        values: Valores de la última fila de la página anterior
+    """
+    bound = [_bind(column, value) for (column, _), value in zip(keys, values)]
+    # Un valor NULL en el cursor solo admite igualdad (IS NULL): el orden dentro
+    # del grupo lo deciden las columnas siguientes
+    equal = [column.is_(None) if value is None else column == bound_value
+             for (column, _), value, bound_value in zip(keys, values, bound)]
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        if values[i] is None:
+            continue
+        step = column < bound[i] if descending else column > bound[i]
+        clauses.append(and_(*equal[:i], step))
+    return or_(*clauses)
+
+
+def paginate_keyset(
+    query: Query,
+    keys: Sequence[Tuple[Any, bool]],
+    row_values: Callable[[Any], Sequence[Any]],
+    parsers: Sequence[Callable[[Any], Any]],
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Paginar una consulta por keyset (seek method).
+
+    El coste de cada página es constante: no hay OFFSET y la condición del
+    cursor aprovecha el índice compuesto de las columnas de orden.
+
+    Args:
+        query: Consulta ya filtrada por usuario
+        keys: Pares (columna, descendente) que definen un orden total (último: id)
+        row_values: Función que extrae de una fila los valores de las columnas de orden
+        parsers: Conversores para decodificar el cursor
+        limit: Tamaño de página (se limita a MAX_PAGE_SIZE)
+        cursor: Cursor devuelto por la página anterior
+
+    Returns:
+        (filas, siguiente_cursor) - siguiente_cursor es None en la última página
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    if cursor:
+        query = query.filter(keyset_condition(keys, decode_cursor(cursor, parsers)))
+
+    order_by = [column.desc() if descending else column.asc() for column, descending in keys]
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(row_values(rows[-1]))
+
+    return rows, next_cursor
@@ -0,0 +1,145 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.log import get_logger, log_event
+
+# Consultas más lentas que este umbral se registran individualmente
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+
+# Peticiones con este número de consultas o más se registran (posible N+1)
+SQL_QUERY_COUNT_WARN = int(os.getenv("SQL_QUERY_COUNT_WARN", "20"))
+
+# Añadir la cabecera Server-Timing a las respuestas
+SQL_TIMING_HEADER = os.getenv("SQL_TIMING_HEADER", "true").lower() in ("1", "true", "yes")
+
+logger = get_logger("sql")
+
+
+class RequestQueryStats:
+    """Consultas ejecutadas durante una petición."""
+
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+
+
+# Estadísticas de la petición en curso; None fuera de una petición (trabajos, CLI)
+current_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+    if elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+        log_event(
+            logger, logging.WARNING, "slow_query",
+            duration_ms=round(elapsed * 1000, 2),
+            statement=" ".join(statement.split())[:500]
+        )
+
+
+def _handle_error(exception_context):
+    # Una consulta fallida no pasa por after_cursor_execute: desapilar su inicio
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def install_query_instrumentation(engine: Engine):
+    """Registrar los eventos que miden cada sentencia ejecutada por el engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que atribuye las consultas SQL a cada petición.
+
+    Crea un RequestQueryStats en un ContextVar al inicio de la petición (las
+    dependencias síncronas del threadpool heredan el contexto), añade la
+    cabecera Server-Timing con el número de consultas, el tiempo total en BD
+    y la consulta más lenta, y registra un log estructurado cuando la
+    petición supera SQL_QUERY_COUNT_WARN consultas o incluye alguna lenta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = current_query_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SQL_TIMING_HEADER:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", self._server_timing(stats, started).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            self._log_request(scope, status_code, stats, started)
+
+    @staticmethod
+    def _server_timing(stats: RequestQueryStats, started: float) -> str:
+        return (
+            f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", '
+            f'db-slowest;dur={stats.slowest * 1000:.2f}, '
+            f'app;dur={(time.perf_counter() - started) * 1000:.2f}'
+        )
+
+    @staticmethod
+    def _log_request(scope, status_code: int, stats: RequestQueryStats, started: float):
+        slow = stats.slowest * 1000 >= SQL_SLOW_QUERY_MS
+        if stats.count < SQL_QUERY_COUNT_WARN and not slow:
+            return
+
+        route = scope.get("route")
+        log_event(
+            logger, logging.WARNING, "request_queries",
+            method=scope.get("method"),
+            path=getattr(route, "path", scope.get("path")),
+            status=status_code,
+            query_count=stats.count,
+            db_ms=round(stats.total * 1000, 2),
+            slowest_ms=round(stats.slowest * 1000, 2),
+            slowest_statement=" ".join((stats.slowest_statement or "").split())[:300],
+            duration_ms=round((time.perf_counter() - started) * 1000, 2)
+        )
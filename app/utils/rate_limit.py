@@ -0,0 +1,248 @@
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import jwt
+
+from app.config import get_settings
+from app.utils.log import get_logger, log_event
+from app.utils.metrics import registry, Counter
+
+# Desactivar por completo (p. ej. en benchmarks de carga)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Límites por ruta: "MÉTODO RUTA=N/periodo" separados por comas (periodo: second,
+# minute, hour). N es también la ráfaga máxima. Sustituye a los de por defecto.
+DEFAULT_RATE_LIMITS = (
+    "POST /api/login=5/minute,"
+    "POST /api/login/json=5/minute,"
+    "POST /api/token=5/minute,"
+    "POST /api/register=10/hour,"
+    "POST /api/pokemon/search/track=10/second,"
+    "POST /api/pokemon/search/track/batch=2/second"
+)
+RATE_LIMITS = os.getenv("RATE_LIMITS", DEFAULT_RATE_LIMITS)
+
+# "memory" (por proceso) o una URL redis:// compartida entre workers
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+
+# Buckets máximos en memoria (al llenarse se descarta el usado hace más tiempo)
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600}
+
+logger = get_logger("rate_limit")
+
+rate_limited_total = registry.register(Counter(
+    "rate_limited_total", "Peticiones rechazadas con 429 por ruta", ("method", "route")))
+
+
+class RateLimitRule:
+    """Token bucket de `capacity` fichas que se rellena a `rate` fichas por segundo."""
+
+    __slots__ = ("method", "path", "pattern", "capacity", "rate")
+
+    def __init__(self, method: str, path: str, capacity: int, period_seconds: float):
+        self.method = method
+        self.path = path
+        # Las plantillas con parámetros ({team_id}) coinciden con un segmento
+        self.pattern: Pattern = re.compile("^" + re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(path)) + "$")
+        self.capacity = capacity
+        self.rate = capacity / period_seconds
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == self.method and self.pattern.match(path) is not None
+
+
+def parse_rate_limits(spec: str) -> List[RateLimitRule]:
+    """
+    "POST /api/login=5/minute,POST /api/pokemon/search/track=10/second"
+
+    Raises:
+        ValueError: Si alguna regla no tiene el formato esperado
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            route, limit = item.rsplit("=", 1)
+            method, path = route.split()
+            count, period = limit.split("/")
+            rules.append(RateLimitRule(method.upper(), path, int(count), PERIOD_SECONDS[period.strip().lower()]))
+        except (ValueError, KeyError):
+            raise ValueError(f"Regla de RATE_LIMITS inválida: {item!r}")
+    return rules
+
+
+class MemoryTokenBucketStore:
+    """
+    Buckets en un OrderedDict del proceso, del usado hace más tiempo al más reciente.
+
+    Solo se usa desde el event loop, así que no necesita locks. Con varios
+    workers cada uno aplica el límite por separado (límite efectivo = N x
+    workers); para un límite global usar RedisTokenBucketStore.
+
+    Cada clave nueva descarta por la cabeza los buckets que ya se habrían
+    rellenado (equivalen a uno nuevo) y, si sigue lleno, el menos reciente:
+    coste O(1) amortizado por petición y nunca más de max_keys buckets,
+    aunque lleguen muchas IPs distintas.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        """Gastar una ficha. Devuelve (permitido, segundos hasta la siguiente ficha)."""
+        now = time.monotonic()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self._evict(now)
+            bucket = self.buckets[key] = [capacity, now, capacity / rate]
+        else:
+            self.buckets.move_to_end(key)
+
+        tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return True, 0.0
+        bucket[0] = tokens
+        return False, (1 - tokens) / rate
+
+    def _evict(self, now: float):
+        buckets = self.buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if len(buckets) < self.max_keys and now - oldest[1] < oldest[2]:
+                return
+            buckets.popitem(last=False)
+
+
+# Refill + consumo atómicos en Redis (un solo round trip por petición)
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisTokenBucketStore:
+    """
+    Buckets compartidos entre workers e instancias en Redis.
+
+    Requiere el paquete `redis` (no está en requirements.txt). Si Redis no
+    responde la petición se deja pasar: el límite protege capacidad, no
+    debe tumbar la API.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_STORE=redis://... requiere `pip install redis`")
+        self.prefix = prefix
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after = await self.script(keys=[self.prefix + key], args=[rate, capacity, time.time()])
+        except Exception as e:
+            log_event(logger, logging.WARNING, "rate_limit_store_error", error=type(e).__name__)
+            return True, 0.0
+        return bool(int(allowed)), float(retry_after)
+
+
+def create_store(spec: str = RATE_LIMIT_STORE):
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTokenBucketStore(spec)
+    if spec != "memory":
+        raise ValueError(f"RATE_LIMIT_STORE inválido: {spec!r}")
+    return MemoryTokenBucketStore()
+
+
+def _client_key(scope) -> str:
+    # Usuario autenticado: el token firmado identifica al usuario aunque cambie de IP
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                settings = get_settings()
+                try:
+                    subject = jwt.decode(token, settings.secret_key, algorithms=[settings.jwt_algorithm]).get("sub")
+                except jwt.PyJWTError:
+                    subject = None
+                if subject:
+                    return f"user:{subject}"
+            break
+    # Sin usuario: IP del cliente. Con --proxy-headers (uvicorn/gunicorn) scope["client"]
+    # ya trae la IP de X-Forwarded-For si el proxy está en FORWARDED_ALLOW_IPS
+    # (gunicorn.conf.py, start.sh, docker-compose.yml)
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de rate limiting con token buckets por ruta.
+
+    Cada regla de RATE_LIMITS tiene un bucket por usuario (token JWT válido)
+    o por IP; al agotarse se responde 429 con Retry-After sin llegar a la
+    ruta, así que no se abre sesión de BD ni se ejecuta bcrypt. Las rutas
+    sin regla no pagan más que la búsqueda de la regla.
+    """
+
+    def __init__(self, app, rules: Optional[List[RateLimitRule]] = None, store=None):
+        self.app = app
+        self.rules = rules if rules is not None else parse_rate_limits(RATE_LIMITS)
+        self.store = store if store is not None else create_store()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        rule = next((rule for rule in self.rules if rule.matches(method, path)), None)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{rule.method} {rule.path}|{_client_key(scope)}"
+        allowed, retry_after = await self.store.consume(key, rule.rate, rule.capacity)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limited_total.inc(rule.method, rule.path)
+        body = json.dumps({"detail": "Demasiadas peticiones, inténtalo más tarde"}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
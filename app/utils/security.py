@@ -1,14 +1,10 @@
 import jwt
 from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY", "default-secret-key-change-this")
+from app.config import get_settings
 
 def create_token(data: dict, expires_delta: timedelta):
     to_encode = data.copy()
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
\ No newline at end of file
+    settings = get_settings()
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.jwt_algorithm)
\ No newline at end of file
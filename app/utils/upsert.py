@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def insert_or_get(db: Session, model: Any, values: Dict[str, Any], index_elements: List[str]):
+    """
+    Insertar una fila o, si ya hay una con la misma clave única, devolver la existente sin tocarla.
+
+    Usa el upsert nativo del motor, así que dos peticiones a la vez no
+    pueden crear duplicados ni fallar por la restricción:
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE (sin cambios) RETURNING, un solo viaje
+    - MySQL / MariaDB: INSERT ... ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id) y lectura por PK
+
+    `index_elements` son las columnas de la restricción única. La fila
+    devuelta viene completa (con los valores por defecto del servidor) y va
+    en la transacción de `db`; el commit es del llamador.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(model).values(**values)
+        # DO UPDATE sin cambios en vez de DO NOTHING: así RETURNING también devuelve la fila existente
+        key = index_elements[0]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, set_={key: stmt.excluded[key]}
+        ).returning(model)
+        return db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+    if dialect in ("mysql", "mariadb"):
+        table = model.__table__
+        stmt = mysql.insert(table).values(**values).on_duplicate_key_update(
+            id=func.last_insert_id(table.c.id)
+        )
+        row_id = db.execute(stmt).lastrowid
+        return db.get(model, row_id, populate_existing=True)
+
+    # Otros motores: INSERT en un savepoint y, si choca con la restricción, leer la existente
+    try:
+        with db.begin_nested():
+            row = model(**values)
+            db.add(row)
+        db.refresh(row)
+        return row
+    except IntegrityError:
+        return db.scalars(
+            select(model).filter_by(**{column: values[column] for column in index_elements})
+        ).one()
+
+
+def insert_ignore(db: Session, model: Any, rows: List[Dict[str, Any]], index_elements: List[str]) -> Optional[Set[Any]]:
+    """
+    INSERT multi-fila que omite las filas que ya existen con la misma clave única.
+
+    Una sola sentencia para todo el lote, en la transacción de `db`:
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO NOTHING RETURNING clave
+    - MySQL / MariaDB: INSERT ... ON DUPLICATE KEY UPDATE clave = clave (sin cambios)
+
+    Returns:
+        Valores de la primera columna de `index_elements` que se insertaron,
+        o None si el motor no lo informa (MySQL)
+    """
+    if not rows:
+        return set()
+    table = model.__table__
+    key = index_elements[0]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+        return set(db.execute(stmt.returning(table.c[key])).scalars())
+
+    if dialect in ("mysql", "mariadb"):
+        db.execute(mysql.insert(table).values(rows).on_duplicate_key_update({key: table.c[key]}))
+        return None
+
+    # Otros motores: una fila por savepoint
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(table.insert().values(**row))
+            inserted.add(row[key])
+        except IntegrityError:
+            pass
+    return inserted
+
+
+def upsert_accumulate(db: Session, model: Any, rows: List[Dict[str, Any]], index_elements: List[str],
+                      add: Sequence[str], greatest: Sequence[str] = (), replace: Sequence[str] = ()) -> int:
+    """
+    INSERT multi-fila que, si la clave única ya existe, acumula sobre la fila existente.
+
+    En la fila existente las columnas de `add` suman el valor nuevo, las de
+    `greatest` se quedan con el mayor de los dos y las de `replace` toman el
+    nuevo. Una sola sentencia para todo el lote, en la transacción de `db`,
+    sin perder incrementos concurrentes:
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+    - MySQL / MariaDB: INSERT ... ON DUPLICATE KEY UPDATE col = col + VALUES(col)
+
+    Los valores de la primera columna de `add` deben ser positivos: así se
+    distingue una fila creada (vale lo enviado) de una acumulada.
+
+    Returns:
+        Número de filas que ya existían
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    def accumulated(new):
+        values = {column: table.c[column] + new[column] for column in add}
+        for column in greatest:
+            # Con NULL en la fila existente gana el valor nuevo
+            larger = func.max if dialect == "sqlite" else func.greatest
+            values[column] = larger(func.coalesce(table.c[column], new[column]), new[column])
+        values.update((column, new[column]) for column in replace)
+        return values
+
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=accumulated(stmt.excluded))
+        counter = add[0]
+        sent = {tuple(row[column] for column in index_elements): row[counter] for row in rows}
+        returned = db.execute(stmt.returning(*(table.c[column] for column in index_elements), table.c[counter]))
+        return sum(1 for *key, value in returned if value != sent[tuple(key)])
+
+    if dialect in ("mysql", "mariadb"):
+        stmt = mysql.insert(table).values(rows)
+        # Filas afectadas: 1 por fila creada y 2 por fila actualizada
+        return db.execute(stmt.on_duplicate_key_update(accumulated(stmt.inserted))).rowcount - len(rows)
+
+    # Otros motores: una fila por savepoint
+    existing = 0
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(table.insert().values(**row))
+        except IntegrityError:
+            existing += 1
+            db.execute(table.update().filter_by(
+                **{column: row[column] for column in index_elements}
+            ).values(accumulated(row)))
+    return existing
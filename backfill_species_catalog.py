@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script para crear el catálogo pokemon_species a partir de los datos existentes.
+Usa la misma configuración de base de datos que el servidor.
+
+Recorre user_pokemon, training_sessions, favorite_pokemon, search_history,
+search_history_daily y pokemon_team_members en lotes pequeños: registra cada
+especie una vez y deja a NULL el sprite y los tipos de las filas que
+coinciden con ella, así que se puede ejecutar con el servidor en marcha.
+
+Ejemplos:
+    python backfill_species_catalog.py --dry-run
+    python backfill_species_catalog.py --chunk-size 500 --pause 0.1
+"""
+
+import argparse
+import json
+import sys
+
+
+def main():
+    # Importar la configuración para usar sus valores por defecto en --help
+    from app.service.catalog import CATALOG_BACKFILL_CHUNK
+
+    parser = argparse.ArgumentParser(description="Crear pokemon_species y compactar las tablas existentes")
+    parser.add_argument("--chunk-size", type=int, default=CATALOG_BACKFILL_CHUNK, help="Filas por transacción")
+    parser.add_argument("--pause", type=float, default=0.05, help="Segundos de pausa entre lotes")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar especies y filas afectadas")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, init_db
+    from app.service.catalog import backfill_species_catalog
+
+    # La tabla del catálogo puede no existir todavía si el servidor no ha arrancado
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = backfill_species_catalog(
+            db, chunk_size=args.chunk_size, pause_seconds=args.pause, dry_run=args.dry_run
+        )
+    except KeyboardInterrupt:
+        # Los lotes ya confirmados se quedan aplicados; se puede relanzar
+        db.rollback()
+        print("\n👋 Compactación interrumpida", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(json.dumps(stats))
+    if args.dry_run:
+        print("ℹ️ Simulación: no se ha modificado nada", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Pruebas de rendimiento de la API: latencia por endpoint y carga concurrente.
+
+Por defecto la app se ejecuta en el mismo proceso a través de ASGI (sin red
+ni servidor), contra la base de datos preparada con benchmarks/seed.py. Con
+--base-url se ataca a un servidor real.
+
+Modos:
+    latencia (por defecto): cada endpoint de app/routes/*.py se llama
+        --iterations veces de forma secuencial y se informa p50/p95/p99.
+    carga (--concurrency N --duration S): N clientes concurrentes lanzan una
+        mezcla de lecturas y escrituras frecuentes durante S segundos.
+
+Ejemplos:
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --reset
+    python -m benchmarks.run --database-url sqlite:///./bench.db
+    python -m benchmarks.run --database-url sqlite:///./bench.db --save-baseline
+    python -m benchmarks.run --concurrency 20 --duration 30 --base-url http://localhost:8000
+
+Si hay una línea base guardada (--baseline), el proceso termina con código 1
+cuando algún endpoint empeora su p95 más allá de --tolerance.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Margen absoluto para no marcar como regresión el ruido de endpoints de microsegundos
+MIN_REGRESSION_MS = 1.0
+
+# Rutas que no se miden (documentación generada por FastAPI)
+IGNORED_PATHS = {"/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc"}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed=None):
+    """Convertir tiempos (en segundos) en métricas en milisegundos."""
+    values = sorted(samples)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(total / len(values) * 1000, 3) if values else 0.0,
+        "rps": round(len(values) / (elapsed if elapsed else total), 1) if values and (elapsed or total) else 0.0,
+    }
+
+
+class Bench:
+    def __init__(self, client):
+        self.client = client
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.headers = {}
+        self.counter = itertools.count()
+        self.ctx = {}
+
+    async def call(self, method, url, **kwargs):
+        """Petición de preparación: no se mide."""
+        kwargs.setdefault("headers", self.headers)
+        return await self.client.request(method, url, **kwargs)
+
+    async def timed(self, name, method, url, expected=(200, 201, 202), **kwargs):
+        """Petición medida; name es la plantilla de la ruta (p. ej. "GET /api/pokemon/teams/{team_id}")."""
+        kwargs.setdefault("headers", self.headers)
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        await response.aread()
+        self.samples[name].append(time.perf_counter() - started)
+        if response.status_code not in expected:
+            self.errors[name] += 1
+        return response
+
+
+# ===== ESCENARIOS =====
+
+P = "/api/pokemon"
+
+
+def member_payload(pokemon_id, position):
+    return {
+        "pokemon_id": pokemon_id, "pokemon_name": f"pokemon-{pokemon_id}",
+        "pokemon_sprite": f"https://example.com/{pokemon_id}.png", "pokemon_types": ["fire"],
+        "position": position, "level": 50, "nature": "adamant", "held_item": "leftovers",
+        "evs": {"hp": 252, "attack": 252, "speed": 4}, "ivs": {"hp": 31},
+    }
+
+
+def team_payload(name, size=6):
+    return {"team_name": name, "team_members": [member_payload(100 + i, i + 1) for i in range(size)]}
+
+
+async def prepare(bench, email, password):
+    """Login del usuario sembrado y creación de recursos de trabajo."""
+    response = await bench.client.post("/api/login/json", json={"email": email, "password": password})
+    if response.status_code != 200:
+        raise SystemExit(f"No se pudo iniciar sesión con {email}: ¿se ejecutó benchmarks/seed.py?")
+    bench.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    teams = (await bench.call("GET", f"{P}/teams", params={"limit": 1})).json()
+    sessions = (await bench.call("GET", f"{P}/training", params={"limit": 1})).json()
+    favorites = (await bench.call("GET", f"{P}/favorites", params={"limit": 1})).json()
+    scratch = (await bench.call("POST", f"{P}/teams", json=team_payload("bench-scratch"))).json()
+
+    bench.ctx.update({
+        "team_id": teams[0]["id"] if teams else scratch["id"],
+        "session_id": sessions[0]["id"] if sessions else None,
+        "favorite_id": favorites[0]["pokemon_id"] if favorites else None,
+        "scratch_team_id": scratch["id"],
+        "scratch_member_id": scratch["team_members"][0]["id"],
+    })
+
+
+async def s_root(b):
+    await b.timed("GET /", "GET", "/")
+
+
+async def s_health(b):
+    await b.timed("GET /health", "GET", "/health")
+
+
+async def s_probes(b):
+    await b.timed("GET /livez", "GET", "/livez")
+    await b.timed("GET /readyz", "GET", "/readyz")
+
+
+async def s_register(b):
+    email = f"bench-register-{os.getpid()}-{next(b.counter)}@example.com"
+    await b.timed("POST /api/register", "POST", "/api/register", json={"email": email, "password": "benchpass"})
+
+
+async def s_login(b):
+    await b.timed("POST /api/login", "POST", "/api/login", headers={},
+                  data={"username": b.ctx["email"], "password": b.ctx["password"]})
+
+
+async def s_login_json(b):
+    await b.timed("POST /api/login/json", "POST", "/api/login/json", headers={},
+                  json={"email": b.ctx["email"], "password": b.ctx["password"]})
+
+
+async def s_token(b):
+    await b.timed("POST /api/token", "POST", "/api/token", headers={},
+                  data={"username": b.ctx["email"], "password": b.ctx["password"]})
+
+
+async def s_profile(b):
+    await b.timed("GET /api/user/profile", "GET", "/api/user/profile")
+
+
+async def s_get_team(b):
+    await b.timed(f"GET {P}/team", "GET", f"{P}/team")
+
+
+async def s_add_team(b):
+    await b.call("DELETE", f"{P}/team/clear-all")
+    await b.timed(f"POST {P}/team", "POST", f"{P}/team", json={
+        "pokemon_id": 25, "pokemon_name": "pikachu", "pokemon_types": ["electric"],
+        "base_stats": {"hp": 35, "attack": 55, "defense": 40, "special-attack": 50, "special-defense": 50, "speed": 90},
+    })
+
+
+async def s_remove_team(b):
+    await b.call("DELETE", f"{P}/team/clear-all")
+    created = (await b.call("POST", f"{P}/team", json={"pokemon_id": 1, "pokemon_name": "bulbasaur"})).json()
+    await b.timed(f"DELETE {P}/team/{{team_pokemon_id}}", "DELETE", f"{P}/team/{created['id']}")
+
+
+async def s_clear_team(b):
+    await b.call("POST", f"{P}/team", json={"pokemon_id": 4, "pokemon_name": "charmander"})
+    await b.timed(f"DELETE {P}/team/clear-all", "DELETE", f"{P}/team/clear-all")
+
+
+async def s_create_session(b):
+    response = await b.timed(f"POST {P}/training", "POST", f"{P}/training", json={
+        "pokemon_id": 7, "pokemon_name": "squirtle", "base_stats": {"hp": 44, "speed": 43},
+    })
+    if response.status_code == 200:
+        await b.call("DELETE", f"{P}/training/{response.json()['id']}")
+
+
+async def s_replay_session(b):
+    # Reintento con la misma Idempotency-Key: se sirve la respuesta guardada
+    headers = {**b.headers, "Idempotency-Key": "bench-replay-session"}
+    body = {"pokemon_id": 152, "pokemon_name": "chikorita", "base_stats": {"hp": 45, "speed": 45}}
+    if "replay_session" not in b.ctx:
+        await b.call("POST", f"{P}/training", json=body, headers=headers)
+        b.ctx["replay_session"] = True
+    await b.timed(f"POST {P}/training (Idempotency-Key repetida)", "POST", f"{P}/training",
+                  json=body, headers=headers)
+
+
+async def s_get_sessions(b):
+    await b.timed(f"GET {P}/training", "GET", f"{P}/training")
+
+
+async def s_update_session(b):
+    if b.ctx["session_id"] is None:
+        return
+    await b.timed(f"PUT {P}/training/{{session_id}}", "PUT", f"{P}/training/{b.ctx['session_id']}",
+                  json={"current_evs": {"hp": 252, "speed": 252}})
+
+
+async def s_simulate_session(b):
+    if "simulation_session_id" not in b.ctx:
+        created = (await b.call("POST", f"{P}/training", json={
+            "pokemon_id": 445, "pokemon_name": "garchomp",
+            "base_stats": {"hp": 108, "attack": 130, "defense": 95, "special-attack": 80, "special-defense": 85, "speed": 102},
+        })).json()
+        b.ctx["simulation_session_id"] = created["id"]
+    spreads = [{"speed": speed, "attack": 252, "hp": 252 - speed} for speed in range(0, 253, 4)] * 16
+    await b.timed(f"POST {P}/training/{{session_id}}/simulate", "POST",
+                  f"{P}/training/{b.ctx['simulation_session_id']}/simulate",
+                  json={"spreads": spreads, "nature": "jolly", "target": {"outspeed_base": 100}})
+
+
+async def s_delete_session(b):
+    created = (await b.call("POST", f"{P}/training", json={
+        "pokemon_id": 7, "pokemon_name": "squirtle", "base_stats": {"hp": 44}})).json()
+    await b.timed(f"DELETE {P}/training/{{session_id}}", "DELETE", f"{P}/training/{created['id']}")
+
+
+async def s_clear_sessions(b):
+    await b.timed(f"DELETE {P}/training/clear-all", "DELETE", f"{P}/training/clear-all")
+
+
+def bench_favorite_id(b):
+    # Fuera del rango usado por seed.py (pokemon_id es único en favorite_pokemon)
+    return 100000 + os.getpid() % 1000 * 1000 + next(b.counter) % 1000
+
+
+async def s_add_favorite(b):
+    pokemon_id = bench_favorite_id(b)
+    await b.timed(f"POST {P}/favorites", "POST", f"{P}/favorites",
+                  json={"pokemon_id": pokemon_id, "pokemon_name": "mew"})
+    await b.call("DELETE", f"{P}/favorites/{pokemon_id}")
+
+
+async def s_get_favorites(b):
+    await b.timed(f"GET {P}/favorites", "GET", f"{P}/favorites")
+
+
+async def s_use_favorite(b):
+    if b.ctx["favorite_id"] is None:
+        return
+    await b.timed(f"POST {P}/favorites/{{pokemon_id}}/use", "POST", f"{P}/favorites/{b.ctx['favorite_id']}/use")
+
+
+async def s_remove_favorite(b):
+    pokemon_id = bench_favorite_id(b)
+    await b.call("POST", f"{P}/favorites", json={"pokemon_id": pokemon_id, "pokemon_name": "mew"})
+    await b.timed(f"DELETE {P}/favorites/{{pokemon_id}}", "DELETE", f"{P}/favorites/{pokemon_id}")
+
+
+async def s_smart_favorites(b):
+    await b.timed(f"GET {P}/favorites/smart", "GET", f"{P}/favorites/smart")
+
+
+async def s_legacy_favorites(b):
+    await b.timed(f"GET {P}/favorites/legacy", "GET", f"{P}/favorites/legacy")
+
+
+async def s_track_search(b):
+    pokemon_id = random.randint(1, 1025)
+    await b.timed(f"POST {P}/search/track", "POST", f"{P}/search/track",
+                  json={"pokemon_id": pokemon_id, "pokemon_name": f"pokemon-{pokemon_id}", "pokemon_types": ["grass"]})
+
+
+async def s_track_search_batch(b):
+    # Una sesión de navegación: 50 Pokémon vistos, con repeticiones
+    items = [{"pokemon_id": pokemon_id, "pokemon_name": f"pokemon-{pokemon_id}", "pokemon_types": ["grass"]}
+             for pokemon_id in (random.randint(1, 1025) for _ in range(40))]
+    items += random.sample(items, 10)
+    await b.timed(f"POST {P}/search/track/batch", "POST", f"{P}/search/track/batch", json={"items": items})
+
+
+async def s_search_history(b):
+    await b.timed(f"GET {P}/search/history", "GET", f"{P}/search/history")
+
+
+async def s_autocomplete(b):
+    await b.timed(f"GET {P}/search/autocomplete", "GET", f"{P}/search/autocomplete", params={"q": "pok"})
+
+
+async def s_export(b):
+    await b.timed(f"GET {P}/export", "GET", f"{P}/export")
+
+
+async def s_create_team(b):
+    response = await b.timed(f"POST {P}/teams", "POST", f"{P}/teams", json=team_payload("bench-create"))
+    if response.status_code == 201:
+        await b.call("DELETE", f"{P}/teams/{response.json()['id']}")
+
+
+async def s_import_teams(b):
+    response = await b.timed(f"POST {P}/teams/import", "POST", f"{P}/teams/import",
+                             json={"teams": [team_payload(f"bench-import-{i}") for i in range(10)]})
+    for team_id in response.json().get("team_ids", []):
+        await b.call("DELETE", f"{P}/teams/{team_id}")
+
+
+async def s_list_teams(b):
+    await b.timed(f"GET {P}/teams", "GET", f"{P}/teams")
+
+
+async def s_list_teams_summary(b):
+    await b.timed(f"GET {P}/teams?view=summary", "GET", f"{P}/teams", params={"view": "summary"})
+
+
+async def s_get_team_by_id(b):
+    await b.timed(f"GET {P}/teams/{{team_id}}", "GET", f"{P}/teams/{b.ctx['team_id']}")
+
+
+async def s_team_analysis(b):
+    await b.timed(f"GET {P}/teams/{{team_id}}/analysis", "GET", f"{P}/teams/{b.ctx['team_id']}/analysis")
+
+
+async def s_team_suggestions(b):
+    await b.timed(f"GET {P}/teams/suggestions", "GET", f"{P}/teams/suggestions",
+                  params={"pokemon_id": [100, 101, 102, 103, 104]})
+
+
+async def s_team_stats(b):
+    await b.timed(f"GET {P}/stats/teams", "GET", f"{P}/stats/teams")
+
+
+async def s_team_snapshot(b):
+    if "snapshot_url" not in b.ctx:
+        shared = (await b.call("POST", f"{P}/teams/{b.ctx['team_id']}/share")).json()
+        b.ctx["snapshot_url"] = shared["url"]
+    await b.timed(f"GET {P}/snapshots/{{snapshot_id}}", "GET", b.ctx["snapshot_url"])
+
+
+async def s_update_team(b):
+    await b.timed(f"PUT {P}/teams/{{team_id}}", "PUT", f"{P}/teams/{b.ctx['scratch_team_id']}",
+                  json={"description": f"actualizado {next(b.counter)}"})
+
+
+async def s_delete_team(b):
+    created = (await b.call("POST", f"{P}/teams", json=team_payload("bench-delete"))).json()
+    await b.timed(f"DELETE {P}/teams/{{team_id}}", "DELETE", f"{P}/teams/{created['id']}")
+
+
+async def s_toggle_favorite(b):
+    await b.timed(f"PATCH {P}/teams/{{team_id}}/favorite", "PATCH", f"{P}/teams/{b.ctx['scratch_team_id']}/favorite")
+
+
+async def s_update_evs(b):
+    await b.timed(f"PATCH {P}/teams/{{team_id}}/update-evs", "PATCH", f"{P}/teams/{b.ctx['scratch_team_id']}/update-evs",
+                  json={"updated_members": [{"pokemon_id": 100, "evs": {"hp": 252, "defense": 252}}]})
+
+
+async def s_member_nickname(b):
+    await b.timed(f"PATCH {P}/teams/{{team_id}}/members/{{member_id}}/nickname", "PATCH",
+                  f"{P}/teams/{b.ctx['scratch_team_id']}/members/{b.ctx['scratch_member_id']}/nickname",
+                  json={"nickname": "Bench"})
+
+
+async def s_member_level(b):
+    await b.timed(f"PATCH {P}/teams/{{team_id}}/members/{{member_id}}/level", "PATCH",
+                  f"{P}/teams/{b.ctx['scratch_team_id']}/members/{b.ctx['scratch_member_id']}/level",
+                  json={"level": 77})
+
+
+async def s_member_moves(b):
+    await b.timed(f"PATCH {P}/teams/{{team_id}}/members/{{member_id}}/moves", "PATCH",
+                  f"{P}/teams/{b.ctx['scratch_team_id']}/members/{b.ctx['scratch_member_id']}/moves",
+                  json={"move_1": "surf"})
+
+
+async def s_job_status(b):
+    if "job_id" not in b.ctx:
+        response = await b.call("POST", f"{P}/teams/import", params={"background": "true"},
+                                json={"teams": [team_payload("bench-job", 1)]})
+        b.ctx["job_id"] = response.json().get("job_id", "missing")
+    await b.timed("GET /api/jobs/{job_id}", "GET", f"/api/jobs/{b.ctx['job_id']}")
+
+
+async def s_load_for_training(b):
+    # Consulta PokeAPI por cada miembro: depende de la red
+    await b.timed(f"POST {P}/teams/{{team_id}}/load-for-training", "POST",
+                  f"{P}/teams/{b.ctx['scratch_team_id']}/load-for-training")
+
+
+# Orden de ejecución: los escenarios destructivos (clear-all, load-for-training) al final
+LATENCY_SCENARIOS = [
+    s_root, s_health, s_probes, s_profile, s_login, s_login_json, s_token, s_register,
+    s_list_teams, s_list_teams_summary, s_get_team_by_id, s_team_analysis, s_team_suggestions, s_team_stats, s_team_snapshot, s_create_team, s_import_teams,
+    s_update_team, s_delete_team, s_toggle_favorite, s_update_evs,
+    s_member_nickname, s_member_level, s_member_moves,
+    s_get_sessions, s_create_session, s_replay_session, s_update_session, s_simulate_session, s_delete_session,
+    s_get_favorites, s_legacy_favorites, s_smart_favorites, s_add_favorite, s_use_favorite, s_remove_favorite,
+    s_track_search, s_track_search_batch, s_search_history, s_autocomplete, s_export,
+    s_get_team, s_add_team, s_remove_team, s_clear_team, s_job_status,
+    s_load_for_training, s_clear_sessions,
+]
+
+NETWORK_SCENARIOS = {s_load_for_training}
+
+# Mezcla para el modo carga: (peso, escenario)
+LOAD_MIX = [
+    (30, s_list_teams_summary), (10, s_list_teams), (25, s_track_search), (10, s_search_history),
+    (10, s_smart_favorites), (5, s_get_sessions), (5, s_profile), (5, s_get_team_by_id),
+]
+
+
+# ===== EJECUCIÓN =====
+
+def make_client(base_url):
+    import httpx
+
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+def app_route_templates():
+    from app.main import app
+
+    templates = set()
+    for route in app.routes:
+        if getattr(route, "path", None) in IGNORED_PATHS or not getattr(route, "methods", None):
+            continue
+        for method in route.methods - {"HEAD", "OPTIONS"}:
+            templates.add(f"{method} {route.path}")
+    return templates
+
+
+async def run_latency(bench, iterations, skip_network):
+    for scenario in LATENCY_SCENARIOS:
+        if skip_network and scenario in NETWORK_SCENARIOS:
+            continue
+        for _ in range(iterations):
+            await scenario(bench)
+    return {name: summarize(samples) for name, samples in bench.samples.items()}
+
+
+async def run_load(bench, concurrency, duration):
+    weights = [weight for weight, _ in LOAD_MIX]
+    scenarios = [scenario for _, scenario in LOAD_MIX]
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user():
+        while time.perf_counter() < deadline:
+            await random.choices(scenarios, weights)[0](bench)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {name: summarize(samples, elapsed) for name, samples in bench.samples.items()}
+    results["TOTAL"] = summarize([s for samples in bench.samples.values() for s in samples], elapsed)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = max(previous["p95_ms"] * (1 + tolerance), previous["p95_ms"] + MIN_REGRESSION_MS)
+        if current["p95_ms"] > limit:
+            regressions.append((name, previous["p95_ms"], current["p95_ms"]))
+    return regressions
+
+
+def print_table(results, errors):
+    print(f"{'endpoint':<72} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'err':>4}")
+    for name in sorted(results):
+        r = results[name]
+        print(f"{name:<72} {r['count']:>6} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['rps']:>8.1f} {errors.get(name, 0):>4}")
+
+
+async def main_async(args):
+    client = make_client(args.base_url)
+    lifespan = None
+    if not args.base_url:
+        # En proceso: arrancar los eventos de startup (cola de trabajos, etc.)
+        from app.main import app
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+
+    try:
+        async with client:
+            bench = Bench(client)
+            bench.ctx.update({"email": args.email, "password": args.password})
+            await prepare(bench, args.email, args.password)
+
+            if args.concurrency:
+                results = await run_load(bench, args.concurrency, args.duration)
+            else:
+                results = await run_latency(bench, args.iterations, args.skip_network)
+            return results, dict(bench.errors)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API Pokémon")
+    parser.add_argument("--database-url", default="sqlite:///./bench.db")
+    parser.add_argument("--base-url", help="Atacar un servidor real en lugar de la app en proceso")
+    parser.add_argument("--email", default="bench0@example.com")
+    parser.add_argument("--password", default="benchpass")
+    parser.add_argument("--iterations", type=int, default=30, help="Llamadas por endpoint en modo latencia")
+    parser.add_argument("--concurrency", type=int, default=0, help="Clientes concurrentes (activa el modo carga)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos del modo carga")
+    parser.add_argument("--skip-network", action="store_true", help="Omitir endpoints que llaman a PokeAPI")
+    parser.add_argument("--output", help="Guardar los resultados en JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como nueva línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento de p95 permitido (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    # Se mide la latencia de la app, no el rate limiting (login se llama decenas de veces)
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    results, errors = asyncio.run(main_async(args))
+    print_table(results, errors)
+
+    if not args.base_url and not args.concurrency:
+        missing = app_route_templates() - {name.split("?")[0] for name in results}
+        if missing:
+            print(f"\n⚠️ Endpoints sin escenario: {', '.join(sorted(missing))}", file=sys.stderr)
+
+    mode = "load" if args.concurrency else "latency"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "results": results, "errors": errors}, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline[mode] = results
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n💾 Línea base guardada en {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get(mode, {})
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for name, before, after in regressions:
+            print(f"❌ Regresión en {name}: p95 {before:.2f} ms -> {after:.2f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tiempo de arranque en frío de la API (despliegues que escalan a cero).
+
+Cada repetición lanza un intérprete nuevo y mide dos fases:
+    import: `python -X importtime -c "import app.main"`, tiempo acumulado
+        del módulo app.main según -X importtime.
+    ready: importar app.main y completar el lifespan (engine, create_all,
+        cola de trabajos) hasta poder servir la primera petición.
+
+Ejemplos:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 10 --top 20
+    python -m benchmarks.startup --save-baseline
+
+Si hay una línea base guardada (clave "startup" de benchmarks/baseline.json),
+el proceso termina con código 1 cuando la mediana de alguna fase empeora
+más allá de --tolerance.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from benchmarks.run import BASELINE_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Margen absoluto para no marcar como regresión el ruido del sistema
+MIN_REGRESSION_MS = 20.0
+
+READY_SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+from app.main import app
+
+async def main():
+    async with app.router.lifespan_context(app):
+        print(round((time.perf_counter() - started) * 1000, 3))
+
+asyncio.run(main())
+"""
+
+
+def parse_importtime(stderr: str):
+    """Líneas de -X importtime -> {módulo: (self_ms, acumulado_ms)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return modules
+
+
+def run_python(args, env):
+    result = subprocess.run(
+        [sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"❌ Falló: python {' '.join(args)}")
+    return result
+
+
+def measure(repeat: int, database_url: str):
+    env = {**os.environ, "DATABASE_URL": database_url, "LOG_LEVEL": "WARNING"}
+
+    # Una ejecución previa para compilar los .pyc y no medir la compilación
+    run_python(["-c", "import app.main"], env)
+
+    import_ms, ready_ms = [], []
+    per_module = defaultdict(list)
+    for _ in range(repeat):
+        modules = parse_importtime(run_python(["-X", "importtime", "-c", "import app.main"], env).stderr)
+        import_ms.append(modules["app.main"][1])
+        for name, (_, cumulative) in modules.items():
+            per_module[name].append(cumulative)
+
+        ready_ms.append(float(run_python(["-c", READY_SCRIPT], env).stdout.strip().splitlines()[-1]))
+
+    results = {
+        "import": round(statistics.median(import_ms), 3),
+        "ready": round(statistics.median(ready_ms), 3),
+    }
+    modules = {name: statistics.median(values) for name, values in per_module.items()}
+    return results, modules
+
+
+def top_level_modules(modules, top: int):
+    # Paquetes de primer nivel y módulos de la app, ordenados por tiempo acumulado
+    candidates = {
+        name: ms for name, ms in modules.items()
+        if "." not in name or name.startswith("app.")
+    }
+    return sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la API Pokémon")
+    parser.add_argument("--repeat", type=int, default=5, help="Intérpretes nuevos por fase (se informa la mediana)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más lentos a mostrar")
+    parser.add_argument("--database-url", help="Por defecto, SQLite temporal")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como nueva línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Empeoramiento permitido (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        results, modules = measure(args.repeat, database_url)
+
+    print(f"{'Módulo':<40} {'acumulado ms':>12}")
+    for name, ms in top_level_modules(modules, args.top):
+        print(f"{name:<40} {ms:>12.1f}")
+    print(f"\nimport app.main: {results['import']:.1f} ms (mediana de {args.repeat})")
+    print(f"listo para servir: {results['ready']:.1f} ms (mediana de {args.repeat})")
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline["startup"] = results
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n💾 Línea base guardada en {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("startup", {})
+        failed = False
+        for phase, after in results.items():
+            before = baseline.get(phase)
+            if before is None:
+                continue
+            if after > max(before * (1 + args.tolerance), before + MIN_REGRESSION_MS):
+                print(f"❌ Regresión en {phase}: {before:.1f} ms -> {after:.1f} ms", file=sys.stderr)
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
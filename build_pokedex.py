@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script para generar el catálogo offline de Pokémon (pokedex.bin) desde un volcado de PokeAPI.
+
+Con el fichero generado, las estadísticas base se leen del disco mapeado en
+memoria en lugar de pedirse a PokeAPI (ver POKEDEX_PATH y POKEAPI_OFFLINE).
+
+Volcados admitidos:
+    - Directorio con las tablas CSV de PokeAPI (data/v2/csv del repositorio PokeAPI/pokeapi)
+    - Directorio con respuestas JSON de /pokemon (data/api/v2/pokemon de PokeAPI/api-data)
+    - Fichero JSON (lista) o NDJSON con respuestas de /pokemon
+
+Ejemplos:
+    python build_pokedex.py ./pokeapi/data/v2/csv
+    python build_pokedex.py ./api-data/data/api/v2/pokemon -o /srv/pokedex.bin
+    python build_pokedex.py pokemon.ndjson --seed-catalog
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+def main():
+    # Importar la configuración para usar sus valores por defecto en --help
+    from app.service.pokedex import POKEDEX_PATH
+
+    parser = argparse.ArgumentParser(description="Generar el catálogo offline de Pokémon")
+    parser.add_argument("source", help="Volcado de PokeAPI (directorio CSV/JSON o fichero JSON/NDJSON)")
+    parser.add_argument("-o", "--output", default=POKEDEX_PATH, help="Fichero de salida")
+    parser.add_argument("--seed-catalog", action="store_true",
+                        help="Insertar también las especies que falten en la tabla pokemon_species")
+    args = parser.parse_args()
+
+    from app.service.pokedex import Pokedex, read_dump, write_pokedex
+
+    if not os.path.exists(args.source):
+        print(f"❌ No existe el volcado: {args.source}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        count = write_pokedex(read_dump(args.source), args.output)
+    except (ValueError, KeyError) as e:
+        print(f"❌ Volcado inválido: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    stats = {"species": count, "bytes": os.path.getsize(args.output), "path": args.output}
+
+    if args.seed_catalog:
+        from app.database import SessionLocal, init_db
+        from app.service.catalog import seed_species_catalog
+
+        # La tabla del catálogo puede no existir todavía si el servidor no ha arrancado
+        init_db()
+        pokedex = Pokedex(args.output)
+        db = SessionLocal()
+        try:
+            stats["catalog_inserted"] = seed_species_catalog(db, (pokedex.get(i) for i in pokedex.ids()))
+        finally:
+            db.close()
+            pokedex.close()
+
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Script para compactar el historial de búsquedas (retención).
+Usa la misma configuración de base de datos que el servidor.
+
+Las búsquedas caducadas o que exceden el máximo por usuario se suman en
+search_history_daily y se borran de search_history en lotes pequeños, así
+que se puede ejecutar con el servidor en marcha (p. ej. desde cron).
+
+Ejemplos:
+    python compact_search_history.py --dry-run
+    python compact_search_history.py --retention-days 90 --max-per-user 200
+"""
+
+import argparse
+import json
+import sys
+
+
+def main():
+    # Importar la configuración para usar sus valores por defecto en --help
+    from app.service.retention import (
+        SEARCH_HISTORY_RETENTION_DAYS, SEARCH_HISTORY_MAX_PER_USER,
+        SEARCH_HISTORY_COMPACTION_CHUNK, SEARCH_HISTORY_COMPACTION_PAUSE_SECONDS
+    )
+
+    parser = argparse.ArgumentParser(description="Compactar el historial de búsquedas")
+    parser.add_argument("--retention-days", type=int, default=SEARCH_HISTORY_RETENTION_DAYS,
+                        help="Días sin actividad antes de agregar y borrar (0 = desactivado)")
+    parser.add_argument("--max-per-user", type=int, default=SEARCH_HISTORY_MAX_PER_USER,
+                        help="Búsquedas conservadas por usuario (0 = sin límite)")
+    parser.add_argument("--chunk-size", type=int, default=SEARCH_HISTORY_COMPACTION_CHUNK,
+                        help="Filas por transacción")
+    parser.add_argument("--pause", type=float, default=SEARCH_HISTORY_COMPACTION_PAUSE_SECONDS,
+                        help="Segundos de pausa entre lotes")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar las filas afectadas")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, init_db
+    from app.service.retention import compact_search_history
+
+    # La tabla de agregados puede no existir todavía si el servidor no ha arrancado
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = compact_search_history(
+            db, retention_days=args.retention_days, max_per_user=args.max_per_user,
+            chunk_size=args.chunk_size, pause_seconds=args.pause, dry_run=args.dry_run
+        )
+    except KeyboardInterrupt:
+        # Los lotes ya confirmados se quedan aplicados
+        db.rollback()
+        print("\n👋 Compactación interrumpida", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(json.dumps(stats))
+    if args.dry_run:
+        print("ℹ️ Simulación: no se ha modificado nada", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script para preparar una base existente para el índice único de search_history.
+Usa la misma configuración de base de datos que el servidor.
+
+Las bases creadas antes de uq_search_history_user_pokemon pueden tener
+varias filas del mismo Pokémon para un usuario: se fusionan en la más
+reciente (se suman los contadores), se borran las demás y se crea el
+índice. Ejecutarlo una vez antes de desplegar; se puede repetir sin riesgo.
+
+Ejemplos:
+    python dedupe_search_history.py --dry-run
+    python dedupe_search_history.py
+"""
+
+import argparse
+import json
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusionar búsquedas duplicadas y crear el índice único")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar las búsquedas duplicadas")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, init_db
+    from app.service.pokemon import dedupe_search_history
+
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = dedupe_search_history(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    print(json.dumps(stats))
+    if args.dry_run:
+        print("ℹ️ Simulación: no se ha modificado nada", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Script para exportar datos de usuarios en NDJSON (copias de seguridad y analítica).
+Usa la misma configuración de base de datos que el servidor.
+
+Ejemplos:
+    python export_data.py --user-id 1 -o backup.ndjson
+    python export_data.py --all --gzip -o dump.ndjson.gz
+"""
+
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar equipos, training e historial en NDJSON")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user-id", type=int, help="ID del usuario a exportar")
+    target.add_argument("--all", action="store_true", help="Exportar todos los usuarios")
+    parser.add_argument("-o", "--output", help="Fichero de salida (por defecto stdout)")
+    parser.add_argument("--gzip", action="store_true", help="Comprimir la salida con gzip")
+    args = parser.parse_args()
+
+    # Importar después de parsear para que --help no conecte a la base de datos
+    from app.service.export import stream_user_export
+
+    user_id = None if args.all else args.user_id
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+
+    try:
+        for chunk in stream_user_export(user_id, compress=args.gzip):
+            output.write(chunk)
+    except KeyboardInterrupt:
+        print("\n👋 Exportación cancelada", file=sys.stderr)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Configuración de Gunicorn para producción (workers de Uvicorn).
+
+Uso:
+    gunicorn app.main:app -c gunicorn.conf.py
+
+Todas las opciones se pueden ajustar por variables de entorno; ver
+.env.example.
+"""
+
+import math
+import os
+import sys
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def available_cpus() -> int:
+    """
+    CPUs realmente asignadas al proceso.
+
+    os.cpu_count() devuelve las del host; dentro de un contenedor con
+    límite de CPU (docker --cpus, Coolify) se respeta la cuota del cgroup
+    (v2 o v1) y la afinidad del proceso.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = None
+    try:
+        # cgroup v2: "max 100000" o "200000 100000"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: -1 = sin límite
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+# ===== SERVIDOR =====
+
+bind = f"0.0.0.0:{os.getenv('PORT', '3000')}"
+
+# Un worker por CPU asignada: la app es async y el trabajo de CPU (bcrypt)
+# ya va al threadpool de cada worker. WEB_CONCURRENCY fuerza el número.
+workers = int(os.getenv("WEB_CONCURRENCY") or min(available_cpus(), int(os.getenv("MAX_WORKERS", "8"))))
+
+# El worker de uvicorn usa loop="auto" y http="auto": uvloop y httptools
+# si están instalados (uvicorn[standard]) y asyncio/h11 si no
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Heartbeat de los workers en memoria compartida en lugar del disco del contenedor
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# ===== PROXY =====
+
+# IPs (o subredes) de los proxies cuyo X-Forwarded-For / X-Forwarded-Proto se
+# acepta: sin el proxy aquí, todos los clientes anónimos comparten su IP y
+# sus buckets de rate limiting. "*" solo si el puerto no es accesible más que
+# desde el proxy.
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1,::1")
+
+# ===== RECICLADO DE WORKERS =====
+
+# Reiniciar cada worker tras N peticiones para acotar fugas de memoria;
+# el jitter evita que todos se reinicien a la vez. 0 = desactivado.
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Segundos que un worker tiene para terminar sus peticiones al reiniciarse
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+
+# ===== KEEP-ALIVE =====
+
+# Mayor que el idle timeout del proxy hacia el backend (Traefik: 90s) para que
+# sea el proxy quien cierre las conexiones inactivas y no el worker a mitad
+# de reutilizarlas
+keepalive = int(os.getenv("KEEP_ALIVE", "95"))
+
+# ===== PRELOAD =====
+
+# Importar la app una sola vez en el master: arranque más rápido y memoria
+# compartida copy-on-write entre workers
+preload_app = _env_bool("PRELOAD_APP", "true")
+
+accesslog = "-" if _env_bool("ACCESS_LOG", "false") else None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def when_ready(server):
+    # Crear las tablas una vez en el master, antes de lanzar los workers:
+    # heredan la marca de init_db() y no repiten el create_all a la vez
+    from app.database import init_db, dispose_engine
+    init_db()
+    dispose_engine()
+
+
+def post_fork(server, worker):
+    # Si el master llegó a abrir conexiones, descartar las heredadas
+    # para que cada worker abra las suyas
+    database = sys.modules.get("app.database")
+    if database is not None:
+        database.dispose_engine(close=False)
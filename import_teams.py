@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script para importar equipos de forma masiva a la cuenta de un usuario.
+Usa la misma configuración de base de datos que el servidor.
+
+Acepta un array JSON de equipos (formato de POST /teams) o un fichero NDJSON
+con un equipo por línea; las líneas generadas por export_data.py también
+valen, solo se importan los registros de tipo "team".
+
+Ejemplos:
+    python import_teams.py --user-id 1 equipos.json
+    python import_teams.py --user-id 1 backup.ndjson
+"""
+
+import argparse
+import json
+import sys
+
+
+def read_team_payloads(path):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+
+    payloads = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "type" in record and "data" in record:
+            if record["type"] != "team":
+                continue
+            record = record["data"]
+        payloads.append(record)
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importar equipos Pokémon en bloque")
+    parser.add_argument("--user-id", type=int, required=True, help="ID del usuario destino")
+    parser.add_argument("file", help="Fichero JSON o NDJSON con los equipos")
+    args = parser.parse_args()
+
+    from pydantic import ValidationError
+    from app.database import SessionLocal
+    from app.models.pokemon import PokemonTeamCreate
+    from app.service.team_import import import_teams
+
+    teams = []
+    for line_number, payload in enumerate(read_team_payloads(args.file), start=1):
+        try:
+            teams.append(PokemonTeamCreate.model_validate(payload))
+        except ValidationError as e:
+            print(f"❌ Equipo #{line_number} con formato inválido: {e.errors()[0]['msg']}", file=sys.stderr)
+
+    db = SessionLocal()
+    try:
+        result = import_teams(args.user_id, teams, db)
+    finally:
+        db.close()
+
+    for error in result.errors:
+        print(f"❌ {error.team_name}: {error.error}", file=sys.stderr)
+    print(f"✅ Equipos importados: {result.created_count} | Con errores: {result.failed_count}")
+
+
+if __name__ == "__main__":
+    main()
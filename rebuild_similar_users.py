@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular los favoritos por usuarios parecidos.
+Usa la misma configuración de base de datos que el servidor.
+
+Lee el historial de búsquedas en streaming, busca los vecinos aproximados
+de cada usuario y guarda sus sugerencias en similar_user_suggestions, en
+lotes pequeños, así que se puede ejecutar con el servidor en marcha
+(p. ej. desde cron).
+
+Ejemplos:
+    python rebuild_similar_users.py --dry-run
+    python rebuild_similar_users.py --neighbors 30 --posting-limit 500
+"""
+
+import argparse
+import json
+import sys
+
+
+def main():
+    # Importar la configuración para usar sus valores por defecto en --help
+    from app.service.similar_users import (
+        SIMILAR_USERS_MAX_ITEMS, SIMILAR_USERS_POSTING_LIMIT, SIMILAR_USERS_NEIGHBORS,
+        SIMILAR_USERS_SUGGESTIONS, SIMILAR_USERS_BATCH
+    )
+
+    parser = argparse.ArgumentParser(description="Recalcular los favoritos por usuarios parecidos")
+    parser.add_argument("--max-items", type=int, default=SIMILAR_USERS_MAX_ITEMS,
+                        help="Búsquedas por usuario en su vector")
+    parser.add_argument("--posting-limit", type=int, default=SIMILAR_USERS_POSTING_LIMIT,
+                        help="Usuarios por Pokémon en el índice invertido")
+    parser.add_argument("--neighbors", type=int, default=SIMILAR_USERS_NEIGHBORS,
+                        help="Vecinos por usuario")
+    parser.add_argument("--suggestions", type=int, default=SIMILAR_USERS_SUGGESTIONS,
+                        help="Sugerencias guardadas por usuario")
+    parser.add_argument("--batch-size", type=int, default=SIMILAR_USERS_BATCH,
+                        help="Filas por lectura / usuarios por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="Calcular sin escribir")
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, init_db
+    from app.service.similar_users import rebuild_similar_users
+
+    # La tabla de sugerencias puede no existir todavía si el servidor no ha arrancado
+    init_db()
+
+    db = SessionLocal()
+    try:
+        stats = rebuild_similar_users(
+            db, max_items=args.max_items, posting_limit=args.posting_limit,
+            neighbors=args.neighbors, suggestions=args.suggestions,
+            batch_size=args.batch_size, dry_run=args.dry_run
+        )
+    except KeyboardInterrupt:
+        # Los lotes ya confirmados se quedan aplicados
+        db.rollback()
+        print("\n👋 Reconstrucción interrumpida", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(json.dumps(stats))
+    if args.dry_run:
+        print("ℹ️ Simulación: no se ha modificado nada", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
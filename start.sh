@@ -14,6 +14,14 @@ else
   echo "⚠️ DATABASE_URL not set"
 fi
 
-# Usamos exec para que Uvicorn tome el control del proceso (PID 1)
-# Añadimos --proxy-headers para Cloudflare/Traefik
-exec uvicorn app.main:app --host 0.0.0.0 --port "$PORT" --proxy-headers
+# SERVER_MODE=uvicorn: un solo proceso (depuración o contenedores de 1 CPU)
+if [ "${SERVER_MODE:-gunicorn}" = "uvicorn" ]; then
+  # Usamos exec para que Uvicorn tome el control del proceso (PID 1)
+  # Añadimos --proxy-headers para Cloudflare/Traefik, confiando solo en FORWARDED_ALLOW_IPS
+  exec uvicorn app.main:app --host 0.0.0.0 --port "$PORT" --proxy-headers \
+    --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1,::1}" \
+    --timeout-keep-alive "${KEEP_ALIVE:-95}"
+fi
+
+# Gunicorn con un worker de Uvicorn por CPU asignada (ver gunicorn.conf.py)
+exec gunicorn app.main:app -c gunicorn.conf.py
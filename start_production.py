@@ -18,12 +18,11 @@ def main():
     print("-" * 50)
     
     try:
-        # Iniciar uvicorn
+        # Iniciar gunicorn con workers de uvicorn (ver gunicorn.conf.py)
         subprocess.run([
-            sys.executable, "-m", "uvicorn", 
+            sys.executable, "-m", "gunicorn", 
             "app.main:app", 
-            "--host", "0.0.0.0", 
-            "--port", os.getenv("PORT", "3000")
+            "-c", "gunicorn.conf.py"
         ])
     except KeyboardInterrupt:
         print("\n👋 Servidor detenido")
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# Base SQLite propia de los tests: se fija antes de que la app lea la configuración
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ.setdefault("SECRET_KEY", "tests-secret-key-with-at-least-32-bytes")
+os.environ.setdefault("POKEAPI_OFFLINE", "true")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal, get_db, get_engine
+from app.main import app
+from app.models.database import Base, User
+from app.service.auth import get_current_user
+from app.service.catalog import species_catalog
+
+
+@pytest.fixture
+def db():
+    engine = get_engine()
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # El catálogo en memoria es global: vaciarlo con la base
+    species_catalog.load()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="ash@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def client(db, user):
+    """Cliente HTTP autenticado como `user`; cada petición con su propia sesión."""
+    def session():
+        request_db = SessionLocal()
+        try:
+            yield request_db
+        finally:
+            request_db.close()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,31 @@
+from app.models.pokemon import PokemonTeamCreate, SearchHistoryBatchItem
+from app.service.autocomplete import autocomplete_index
+from app.service.pokemon import create_pokemon_team, track_pokemon_searches
+
+
+def names(query):
+    return [completion.pokemon_name for completion in autocomplete_index.complete(query)]
+
+
+def test_species_registered_by_a_team_are_completed_at_once(db, user):
+    autocomplete_index.build()
+    assert names("pik") == []
+
+    create_pokemon_team(user.id, PokemonTeamCreate(team_name="t", team_members=[
+        {"pokemon_id": 25, "pokemon_name": "pikachu", "pokemon_sprite": "25.png",
+         "pokemon_types": ["electric"], "position": 1},
+    ]), db)
+
+    assert names("pik") == ["pikachu"]
+    assert autocomplete_index.complete("pik")[0].pokemon_sprite == "25.png"
+
+
+def test_tracked_species_are_completed_and_ranked_by_searches(db, user):
+    autocomplete_index.build()
+    track_pokemon_searches(user.id, [
+        SearchHistoryBatchItem(pokemon_id=122, pokemon_name="mr-mime"),
+        SearchHistoryBatchItem(pokemon_id=439, pokemon_name="mime-jr"),
+        SearchHistoryBatchItem(pokemon_id=439, pokemon_name="mime-jr"),
+    ], db)
+
+    assert names("mime") == ["mime-jr", "mr-mime"]
@@ -0,0 +1,70 @@
+from sqlalchemy import select
+
+from app.models.database import PokemonTeamMember, SearchHistory, TrainingSession, UserPokemon
+from app.models.pokemon import PokemonTeamCreate, SearchHistoryBatchItem
+from app.service.catalog import species_catalog
+from app.service.pokemon import create_pokemon_team, load_team_for_training, track_pokemon_searches
+
+
+def stored(db, model):
+    return db.execute(select(model.pokemon_id, model.pokemon_sprite, model.pokemon_types).order_by(model.id)).all()
+
+
+def test_new_species_rows_keep_their_values_for_other_workers(db, user):
+    create_pokemon_team(user.id, PokemonTeamCreate(team_name="t", team_members=[
+        {"pokemon_id": 25, "pokemon_name": "pikachu", "pokemon_sprite": "25.png",
+         "pokemon_types": ["electric"], "position": 1},
+    ]), db)
+
+    # Aún no asentada: otro worker no la tiene en memoria, la fila no puede depender del catálogo
+    assert stored(db, PokemonTeamMember) == [(25, "25.png", ["electric"])]
+
+    species_catalog.species.pop(25)
+    db.expire_all()
+    member = db.query(PokemonTeamMember).one()
+    assert (member.pokemon_sprite, member.pokemon_types) == ("25.png", ["electric"])
+
+
+def test_settled_species_rows_are_compacted(db, user):
+    track_pokemon_searches(user.id, [
+        SearchHistoryBatchItem(pokemon_id=1, pokemon_name="bulbasaur", pokemon_sprite="1.png",
+                               pokemon_types=["grass", "poison"]),
+    ], db)
+    species_catalog._settled_at[1] = 0.0
+
+    track_pokemon_searches(user.id, [
+        SearchHistoryBatchItem(pokemon_id=1, pokemon_name="bulbasaur", pokemon_sprite="1.png",
+                               pokemon_types=["grass", "poison"]),
+    ], db)
+
+    assert stored(db, SearchHistory) == [(1, None, None)]
+    db.expire_all()
+    row = db.query(SearchHistory).one()
+    assert (row.pokemon_sprite, row.pokemon_types, row.search_count) == ("1.png", ["grass", "poison"], 2)
+
+
+def test_changed_species_is_no_longer_settled(db, user):
+    track_pokemon_searches(user.id, [SearchHistoryBatchItem(pokemon_id=4, pokemon_name="charmander")], db)
+    species_catalog._settled_at[4] = 0.0
+    assert species_catalog.settled(4)
+
+    # Completar el sprite cambia la especie: hasta que la tengan todos, la fila guarda el suyo
+    track_pokemon_searches(user.id, [
+        SearchHistoryBatchItem(pokemon_id=4, pokemon_name="charmander", pokemon_sprite="4.png"),
+    ], db)
+
+    assert not species_catalog.settled(4)
+    assert stored(db, SearchHistory)[0][1] == "4.png"
+
+
+def test_team_loaded_for_training_keeps_species_values(db, user):
+    team = create_pokemon_team(user.id, PokemonTeamCreate(team_name="t", team_members=[
+        {"pokemon_id": 25, "pokemon_name": "pikachu", "pokemon_sprite": "25.png",
+         "pokemon_types": ["electric"], "position": 1},
+        {"pokemon_id": 25, "pokemon_name": "pikachu", "position": 2},
+    ]), db)
+
+    load_team_for_training(user.id, team.id, db)
+
+    assert db.execute(select(UserPokemon.pokemon_sprite)).scalars().all() == ["25.png", "25.png"]
+    assert stored(db, TrainingSession) == [(25, "25.png", ["electric"])]
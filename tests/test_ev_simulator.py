@@ -0,0 +1,70 @@
+import pytest
+
+from app.models.database import TrainingSession
+from app.models.pokemon import EVSimulationRequest
+from app.service.ev_simulator import evaluate_spreads, simulate_training_session, stat_table
+
+GARCHOMP = {"hp": 108, "attack": 130, "defense": 95, "special-attack": 80, "special-defense": 85, "speed": 102}
+
+
+def test_stat_formula_matches_the_games():
+    # Ejemplo de Bulbapedia: Garchomp nivel 78, Adamant
+    ivs = {"hp": 24, "attack": 12, "defense": 30, "special-attack": 16, "special-defense": 23, "speed": 5}
+    evs = {"hp": 74, "attack": 190, "defense": 91, "special-attack": 48, "special-defense": 84, "speed": 23}
+
+    valid, _, stats, invalid = evaluate_spreads(GARCHOMP, [evs], level=78, nature="adamant", ivs=ivs)
+
+    assert (valid, invalid) == ([0], [])
+    assert {stat: column[0] for stat, column in stats.items()} == {
+        "hp": 289, "attack": 278, "defense": 193, "special-attack": 135, "special-defense": 171, "speed": 171,
+    }
+
+
+def test_only_every_fourth_ev_counts():
+    table = stat_table("speed", 102, 31, 50)
+
+    assert len(table) == 64
+    assert table[0] == 122 and table[63] == 154
+    assert stat_table("hp", 1, 31, 100) == [1] * 64
+
+
+@pytest.fixture
+def session(db, user):
+    row = TrainingSession(user_id=user.id, pokemon_id=445, pokemon_name="garchomp", base_stats=GARCHOMP)
+    db.add(row)
+    db.commit()
+    return row
+
+
+def test_spreads_meeting_the_target_rank_by_the_rest(db, user, session):
+    spreads = [
+        {"speed": 252, "attack": 252},
+        {"speed": 140, "attack": 252, "hp": 116},  # Justo lo necesario para superar al rival
+        {"speed": 136, "attack": 252, "hp": 120},  # Un punto por debajo
+        {"attack": 300},
+        {"hp": 252, "defense": 252},
+        {"speed": 252, "hp": 252, "defense": 7},
+    ]
+    request = EVSimulationRequest(spreads=spreads, nature="jolly", target={"outspeed_base": 100})
+
+    response = simulate_training_session(user.id, session.id, request, db)
+
+    # Rival base 100 con 252 EVs y 31 IVs a nivel 50: 152 de velocidad
+    assert response.threshold == 153
+    assert response.invalid_indexes == [3, 5]
+    assert (response.evaluated, response.meeting_target) == (4, 2)
+    assert [(r.index, r.margin) for r in response.results] == [(1, 1), (0, 16), (2, -1), (4, -19)]
+
+
+def test_without_target_spreads_rank_by_total(db, user, session):
+    request = EVSimulationRequest(spreads=[{"speed": 4}, {"hp": 252, "attack": 252, "speed": 4}, {}], limit=2)
+
+    response = simulate_training_session(user.id, session.id, request, db)
+
+    assert [r.index for r in response.results] == [1, 0]
+    assert response.threshold is None and response.results[0].meets_target is None
+
+
+def test_unknown_nature_is_rejected(db, user, session):
+    with pytest.raises(ValueError):
+        simulate_training_session(user.id, session.id, EVSimulationRequest(spreads=[{}], nature="grumpy"), db)
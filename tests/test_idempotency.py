@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.database import IdempotencyKey, UserPokemon
+from app.models.pokemon import UserPokemonCreate, UserPokemonResponse
+from app.service.idempotency import IdempotencyConflictError, request_hash, run_idempotent
+
+BODY = {"pokemon_id": 25, "pokemon_name": "pikachu"}
+
+
+def post_team(client, key, body=BODY):
+    return client.post("/api/pokemon/team", json=body, headers={"Idempotency-Key": key})
+
+
+def reserve(db, user, key, age_seconds):
+    db.add(IdempotencyKey(
+        user_id=user.id, key=key, endpoint="POST /team",
+        request_hash=request_hash("POST /team", UserPokemonCreate(**BODY)),
+        created_at=datetime.utcnow().replace(microsecond=0) - timedelta(seconds=age_seconds)
+    ))
+    db.commit()
+
+
+def test_retry_replays_the_stored_response(client, db):
+    first = post_team(client, "k1")
+    retry = post_team(client, "k1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert db.query(UserPokemon).count() == 1
+
+
+def test_same_key_with_another_body_is_rejected(client):
+    assert post_team(client, "k1").status_code == 200
+    assert post_team(client, "k1", {**BODY, "pokemon_id": 26}).status_code == 400
+
+
+def test_request_in_flight_gets_409(client, db, user):
+    reserve(db, user, "k1", age_seconds=5)
+
+    assert post_team(client, "k1").status_code == 409
+    assert db.query(UserPokemon).count() == 0
+
+
+def test_abandoned_reservation_is_taken_over(client, db, user):
+    reserve(db, user, "k1", age_seconds=120)
+
+    response = post_team(client, "k1")
+
+    assert response.status_code == 200
+    assert db.query(UserPokemon).count() == 1
+    db.expire_all()
+    assert db.query(IdempotencyKey).one().status_code == 200
+    assert post_team(client, "k1").headers["Idempotent-Replayed"] == "true"
+
+
+def add_pikachu(user, session):
+    row = UserPokemon(user_id=user.id, pokemon_id=25, pokemon_name="pikachu")
+    session.add(row)
+    session.commit()
+    return row
+
+
+def test_failed_handler_leaves_nothing_behind(db, user):
+    def handler(session):
+        add_pikachu(user, session)
+        raise RuntimeError("el worker muere antes de guardar la respuesta")
+
+    with pytest.raises(RuntimeError):
+        run_idempotent(db, user.id, "k1", "POST /team", UserPokemonCreate(**BODY), handler, UserPokemonResponse)
+
+    # El commit del handler era un savepoint: no queda ni su fila ni la reserva
+    assert db.query(UserPokemon).count() == 0
+    assert db.query(IdempotencyKey).count() == 0
+
+
+def test_original_that_lost_its_reservation_is_rolled_back(db, user):
+    def handler(session):
+        # Mientras tanto otro reintento retoma la reserva (supera el lease)
+        other = SessionLocal()
+        other.query(IdempotencyKey).update({"created_at": datetime(2030, 1, 1)})
+        other.commit()
+        other.close()
+        return add_pikachu(user, session)
+
+    with pytest.raises(IdempotencyConflictError):
+        run_idempotent(db, user.id, "k1", "POST /team", UserPokemonCreate(**BODY), handler, UserPokemonResponse)
+
+    assert db.query(UserPokemon).count() == 0
@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from app.models.database import FavoritePokemon, PokemonTeam
+from app.models.pokemon import SearchHistoryBatchItem
+from app.service.pokemon import (
+    get_user_favorites, get_user_search_history, get_user_teams, track_pokemon_searches
+)
+
+# Segundo exacto: el caso en que el texto guardado y el del cursor divergían
+TIED = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def collect(fetch, limit):
+    ids, cursor = [], None
+    for _ in range(100):
+        rows, cursor = fetch(limit=limit, cursor=cursor)
+        ids += [row.id for row in rows]
+        if not cursor:
+            return ids
+    raise AssertionError("La paginación no termina")
+
+
+def test_favorites_never_used_are_all_paged(db, user):
+    db.add_all(FavoritePokemon(user_id=user.id, pokemon_id=i, pokemon_name=f"p{i}") for i in range(1, 8))
+    db.add_all(FavoritePokemon(user_id=user.id, pokemon_id=i, pokemon_name=f"p{i}", usage_count=0, last_used=TIED)
+               for i in range(8, 11))
+    db.commit()
+
+    ids = collect(lambda **page: get_user_favorites(user.id, db=db, **page), limit=2)
+
+    assert len(ids) == len(set(ids)) == 10
+    # Los usados antes que los nunca usados
+    assert {f.pokemon_id for f in db.query(FavoritePokemon).filter(FavoritePokemon.id.in_(ids[:3]))} == {8, 9, 10}
+
+
+def test_history_with_whole_second_timestamps(db, user):
+    items = [SearchHistoryBatchItem(pokemon_id=i, pokemon_name=f"p{i}", searched_at=TIED) for i in range(1, 51)]
+    track_pokemon_searches(user.id, items, db)
+
+    ids = collect(lambda **page: get_user_search_history(user.id, db=db, **page), limit=10)
+
+    assert len(ids) == len(set(ids)) == 50
+
+
+def test_teams_created_in_the_same_second(db, user):
+    db.add_all(PokemonTeam(user_id=user.id, team_name=f"t{i}", created_at=TIED) for i in range(7))
+    db.commit()
+
+    ids = collect(lambda **page: get_user_teams(user.id, db, **page), limit=3)
+
+    assert ids == sorted(ids, reverse=True) and len(ids) == 7
+
+
+def test_teams_route_pages_both_views(db, user, client):
+    db.add_all(PokemonTeam(user_id=user.id, team_name=f"t{i}") for i in range(3))
+    db.commit()
+
+    full = client.get("/api/pokemon/teams", params={"limit": 2})
+    summary = client.get("/api/pokemon/teams", params={"limit": 2, "view": "summary"})
+    rest = client.get("/api/pokemon/teams", params={"view": "summary", "cursor": summary.headers["X-Next-Cursor"]})
+
+    assert full.status_code == summary.status_code == 200
+    assert full.headers["X-Next-Cursor"] == summary.headers["X-Next-Cursor"]
+    assert {"user_id", "created_at"} <= full.json()[0].keys()
+    assert set(summary.json()[0]) == {"id", "team_name", "is_favorite", "team_members"}
+    assert len(rest.json()) == 1 and "X-Next-Cursor" not in rest.headers
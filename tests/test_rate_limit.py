@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import rate_limit
+from app.utils.rate_limit import MemoryTokenBucketStore, RateLimitMiddleware, parse_rate_limits
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def consume(store, key, rate=1.0, capacity=2):
+    return asyncio.run(store.consume(key, rate, capacity))
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    store = MemoryTokenBucketStore()
+
+    assert consume(store, "a") == (True, 0.0)
+    assert consume(store, "a") == (True, 0.0)
+    allowed, retry_after = consume(store, "a")
+    assert not allowed and retry_after == pytest.approx(1.0)
+
+    clock.now += 1
+    assert consume(store, "a")[0]
+
+
+def test_store_never_exceeds_max_keys(clock):
+    store = MemoryTokenBucketStore(max_keys=3)
+    for index in range(10):
+        consume(store, f"ip:{index}")
+
+    assert list(store.buckets) == ["ip:7", "ip:8", "ip:9"]
+
+
+def test_store_evicts_least_recently_used(clock):
+    store = MemoryTokenBucketStore(max_keys=2)
+    consume(store, "a")
+    consume(store, "b")
+    consume(store, "a")
+    consume(store, "c")
+
+    assert list(store.buckets) == ["a", "c"]
+
+
+def test_refilled_buckets_are_dropped_before_the_cap(clock):
+    store = MemoryTokenBucketStore(max_keys=100)
+    consume(store, "old")
+    clock.now += 10
+    consume(store, "new")
+
+    assert list(store.buckets) == ["new"]
+
+
+def limited_app():
+    app = FastAPI()
+
+    @app.post("/api/login")
+    def login():
+        return {"ok": True}
+
+    return RateLimitMiddleware(app, rules=parse_rate_limits("POST /api/login=1/minute"), store=MemoryTokenBucketStore())
+
+
+def test_anonymous_clients_get_a_bucket_per_ip():
+    app = limited_app()
+    first = TestClient(app, client=("203.0.113.1", 5000))
+    second = TestClient(app, client=("203.0.113.2", 5000))
+
+    assert first.post("/api/login").status_code == 200
+    assert first.post("/api/login").status_code == 429
+    assert second.post("/api/login").status_code == 200
+
+
+def test_forwarded_clients_behind_trusted_proxy_get_separate_buckets():
+    proxy_headers = pytest.importorskip("uvicorn.middleware.proxy_headers")
+    app = proxy_headers.ProxyHeadersMiddleware(limited_app(), trusted_hosts="10.0.1.5")
+    proxy = TestClient(app, client=("10.0.1.5", 5000))
+
+    assert proxy.post("/api/login", headers={"X-Forwarded-For": "198.51.100.1"}).status_code == 200
+    assert proxy.post("/api/login", headers={"X-Forwarded-For": "198.51.100.1"}).status_code == 429
+    assert proxy.post("/api/login", headers={"X-Forwarded-For": "198.51.100.2"}).status_code == 200
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models.database import SearchHistory, SearchHistoryDaily, User
+from app.models.pokemon import SearchHistoryBatchItem
+from app.service.pokemon import track_pokemon_searches
+from app.service.retention import _ROW_COLUMNS, _roll_up_and_delete, compact_search_history
+
+OLD = datetime(2020, 3, 1, 10, 0, 0)
+
+
+def add_history(db, user_id, pokemon_id, search_count, last_searched):
+    db.add(SearchHistory(user_id=user_id, pokemon_id=pokemon_id, pokemon_name=f"p{pokemon_id}",
+                         search_count=search_count, last_searched=last_searched))
+    db.commit()
+
+
+def rollups(db):
+    return db.execute(select(
+        SearchHistoryDaily.day, SearchHistoryDaily.pokemon_id,
+        SearchHistoryDaily.search_count, SearchHistoryDaily.unique_users
+    ).order_by(SearchHistoryDaily.pokemon_id)).all()
+
+
+def test_expired_rows_are_rolled_up_per_day_and_pokemon(db, user):
+    other = User(email="misty@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    add_history(db, user.id, 1, 3, OLD)
+    add_history(db, other.id, 1, 2, OLD + timedelta(hours=2))
+    add_history(db, user.id, 2, 5, datetime.utcnow())
+
+    stats = compact_search_history(db, retention_days=30, max_per_user=0, pause_seconds=0)
+
+    assert stats["expired_rows"] == 2 and stats["rollup_rows"] == 1
+    assert rollups(db) == [(OLD.date(), 1, 5, 2)]
+    assert [row.pokemon_id for row in db.query(SearchHistory)] == [2]
+
+    # Una segunda pasada del mismo día suma sobre el agregado existente
+    add_history(db, user.id, 1, 4, OLD)
+    compact_search_history(db, retention_days=30, max_per_user=0, pause_seconds=0)
+    assert rollups(db) == [(OLD.date(), 1, 9, 3)]
+
+
+def test_overflow_keeps_the_top_rows_per_user(db, user):
+    now = datetime.utcnow().replace(microsecond=0)
+    for pokemon_id in range(1, 6):
+        add_history(db, user.id, pokemon_id, pokemon_id, now)
+
+    stats = compact_search_history(db, retention_days=0, max_per_user=3, pause_seconds=0)
+
+    assert stats["overflow_rows"] == 2
+    assert sorted(row.pokemon_id for row in db.query(SearchHistory)) == [3, 4, 5]
+    assert sum(row[2] for row in rollups(db)) == 1 + 2
+
+
+def test_row_refreshed_after_the_read_is_kept(db, user):
+    add_history(db, user.id, 1, 3, OLD)
+    add_history(db, user.id, 2, 1, OLD)
+    rows = db.execute(select(*_ROW_COLUMNS).order_by(SearchHistory.id)).all()
+    db.commit()
+
+    # Búsqueda concurrente entre la lectura y el DELETE
+    track_pokemon_searches(user.id, [SearchHistoryBatchItem(pokemon_id=1, pokemon_name="p1")], db)
+    _roll_up_and_delete(db, rows)
+
+    kept = db.query(SearchHistory).one()
+    assert (kept.pokemon_id, kept.search_count) == (1, 4)
+    assert rollups(db) == [(OLD.date(), 2, 1, 1)]
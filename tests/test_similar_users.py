@@ -0,0 +1,48 @@
+from app.models.database import SearchHistory, SimilarUserSuggestion, User
+from app.models.pokemon import SearchHistoryBatchItem
+from app.service.pokemon import track_pokemon_searches
+from app.service.similar_users import get_similar_user_favorites, rebuild_similar_users
+
+
+def search(db, user_id, *pokemon_ids):
+    track_pokemon_searches(user_id, [
+        SearchHistoryBatchItem(pokemon_id=pokemon_id, pokemon_name=f"p{pokemon_id}") for pokemon_id in pokemon_ids
+    ], db)
+
+
+def test_rebuild_suggests_what_neighbors_searched(db, user):
+    other = User(email="misty@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    search(db, user.id, 1, 2)
+    search(db, other.id, 1, 2, 3)
+
+    stats = rebuild_similar_users(db)
+
+    assert stats["users"] == 2
+    assert stats["with_suggestions"] == 1
+    suggestions = get_similar_user_favorites(user.id, 5, db)
+    assert [s.pokemon_id for s in suggestions] == [3]
+    assert suggestions[0].source == "similar_users"
+    assert get_similar_user_favorites(other.id, 5, db) == []
+
+
+def test_rebuild_keeps_its_own_rows_and_drops_stale_ones(db, user):
+    other = User(email="misty@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    search(db, user.id, 1, 2)
+    search(db, other.id, 1, 2, 3)
+    rebuild_similar_users(db)
+
+    # Segundos enteros: el DELETE final por built_at no puede alcanzar las filas recién escritas
+    rebuild_similar_users(db)
+    row = db.get(SimilarUserSuggestion, user.id)
+    assert row is not None and row.built_at.microsecond == 0
+
+    db.query(SearchHistory).filter(SearchHistory.user_id == other.id).delete()
+    db.commit()
+    db.query(SimilarUserSuggestion).update({"built_at": row.built_at.replace(year=2000)})
+    db.commit()
+    rebuild_similar_users(db)
+    assert db.query(SimilarUserSuggestion).count() == 0
@@ -0,0 +1,64 @@
+import pytest
+
+from app.models.pokemon import PokemonTeamMemberCreate
+from app.service.team_snapshots import decode_team, encode_team, snapshot_id
+
+EVS = {"hp": 252, "attack": 0, "defense": 4, "special-attack": 0, "special-defense": 0, "speed": 252}
+IVS = {"hp": 31, "attack": 0, "defense": 31, "special-attack": 31, "special-defense": 30, "speed": 31}
+
+
+def member(position, **values):
+    return PokemonTeamMemberCreate(**{"pokemon_id": 25, "pokemon_name": "pikachu", "position": position, **values})
+
+
+def test_round_trip_keeps_every_field():
+    members = [
+        member(1, pokemon_sprite="25.png", pokemon_types=["electric"], nickname="Sparky", level=100,
+               selected_ability="static", move_1="thunderbolt", move_2="quick-attack", move_3="iron-tail",
+               move_4="thunder", held_item="light-ball", nature="timid", evs=EVS, ivs=IVS),
+        # Mismos textos que el primero: van una sola vez en la tabla de cadenas
+        member(2, pokemon_id=26, pokemon_name="raichu", move_1="thunderbolt", nature="nature-de-mod"),
+    ]
+
+    team_name, description, decoded = decode_team(encode_team("Equipo", "Con ñ y emojis ⚡", members))
+
+    assert (team_name, description) == ("Equipo", "Con ñ y emojis ⚡")
+    assert decoded == members
+
+
+def test_members_are_stored_by_position():
+    first, second = member(1), member(2, pokemon_id=26, pokemon_name="raichu")
+
+    assert encode_team("t", None, [second, first]) == encode_team("t", None, [first, second])
+    assert [m.position for m in decode_team(encode_team("t", None, [second, first]))[2]] == [1, 2]
+    assert snapshot_id(encode_team("t", None, [first])) != snapshot_id(encode_team("t", None, [second]))
+
+
+def test_unknown_types_are_dropped():
+    _, _, (decoded,) = decode_team(encode_team("t", None, [member(1, pokemon_types=["electric", "shadow"])]))
+
+    assert decoded.pokemon_types is None
+
+
+@pytest.mark.parametrize("members", [
+    [],
+    [member(position) for position in range(1, 8)],
+    [member(1, pokemon_id=0x10000)],
+    [member(1, level=256)],
+    [member(7)],
+    [member(1, evs={"hp": 256})],
+    [member(1, ivs={"speed": 32})],
+    [member(1, ivs={"speed": -1})],
+])
+def test_values_outside_the_format_are_rejected(members):
+    with pytest.raises(ValueError):
+        encode_team("t", None, members)
+
+
+def test_foreign_payload_is_rejected():
+    payload = encode_team("t", None, [member(1)])
+
+    with pytest.raises(ValueError):
+        decode_team(b"XXXX" + payload[4:])
+    with pytest.raises(ValueError):
+        decode_team(payload[:4] + bytes([2]) + payload[5:])
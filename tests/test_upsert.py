@@ -0,0 +1,139 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql, postgresql
+
+from app.models.database import PokemonSpecies, SearchHistory, TrainingSession
+from app.utils.upsert import insert_ignore, insert_or_get, upsert_accumulate
+
+
+class OtherEngine:
+    """Sesión real que se presenta como un motor sin upsert nativo (rama de savepoints)."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def execute(self, *args, **kwargs):
+        # SQLite no tiene GREATEST, que es lo que usa esta rama
+        self._db.connection().connection.driver_connection.create_function("greatest", 2, max)
+        return self._db.execute(*args, **kwargs)
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="other"))
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+class Recorder:
+    """Sesión falsa que solo guarda las sentencias para compilarlas con otro dialecto."""
+
+    def __init__(self, name, rowcount=0):
+        self.name, self.rowcount, self.statements = name, rowcount, []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name=self.name))
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return Result(self.rowcount)
+
+    def get(self, *args, **kwargs):
+        return None
+
+
+class Result(list):
+    """Resultado vacío con lo que leen los helpers (RETURNING, rowcount, lastrowid)."""
+
+    def __init__(self, rowcount):
+        super().__init__()
+        self.rowcount, self.lastrowid = rowcount, 1
+
+    def scalars(self):
+        return self
+
+
+@pytest.fixture(params=["sqlite", "other"])
+def session(request, db):
+    return db if request.param == "sqlite" else OtherEngine(db)
+
+
+def search(user, count, when):
+    return {"user_id": user.id, "pokemon_id": 25, "pokemon_name": "pikachu",
+            "search_count": count, "last_searched": when}
+
+
+def test_upsert_accumulate_adds_keeps_greatest_and_counts_existing(session, user):
+    assert upsert_accumulate(session, SearchHistory, [search(user, 2, datetime(2024, 1, 2))],
+                             ["user_id", "pokemon_id"], add=["search_count"], greatest=["last_searched"]) == 0
+    assert upsert_accumulate(session, SearchHistory, [search(user, 3, datetime(2024, 1, 1))],
+                             ["user_id", "pokemon_id"], add=["search_count"], greatest=["last_searched"]) == 1
+    session.commit()
+
+    row = session.query(SearchHistory).one()
+    assert (row.search_count, row.last_searched) == (5, datetime(2024, 1, 2))
+
+
+def test_insert_ignore_reports_only_new_keys(session):
+    species = [{"pokemon_id": 1, "pokemon_name": "bulbasaur"}, {"pokemon_id": 4, "pokemon_name": "charmander"}]
+
+    assert insert_ignore(session, PokemonSpecies, species[:1], ["pokemon_id"]) == {1}
+    assert insert_ignore(session, PokemonSpecies, species, ["pokemon_id"]) == {4}
+    assert insert_ignore(session, PokemonSpecies, [], ["pokemon_id"]) == set()
+    assert session.query(PokemonSpecies).count() == 2
+
+
+def test_insert_or_get_returns_the_existing_row_untouched(session, user):
+    values = {"user_id": user.id, "pokemon_id": 25, "pokemon_name": "pikachu"}
+    first = insert_or_get(session, TrainingSession, values, ["user_id", "pokemon_id"])
+    session.commit()
+    again = insert_or_get(session, TrainingSession, {**values, "pokemon_name": "otro"}, ["user_id", "pokemon_id"])
+
+    assert again.id == first.id and again.pokemon_name == "pikachu"
+    assert session.query(TrainingSession).count() == 1
+
+
+def test_mysql_accumulates_in_one_statement_and_counts_updated_rows(user):
+    db = Recorder("mysql", rowcount=3)
+    rows = [search(user, 1, datetime(2024, 1, 1)), {**search(user, 1, datetime(2024, 1, 1)), "pokemon_id": 26}]
+
+    # 1 fila afectada por inserción y 2 por actualización: 3 - 2 = 1 existente
+    assert upsert_accumulate(db, SearchHistory, rows, ["user_id", "pokemon_id"],
+                             add=["search_count"], greatest=["last_searched"]) == 1
+    sql = str(db.statements[0].compile(dialect=mysql.dialect()))
+    assert len(db.statements) == 1
+    assert "ON DUPLICATE KEY UPDATE search_count = (search_history.search_count + VALUES(search_count))" in sql
+    assert "greatest(coalesce(search_history.last_searched, VALUES(last_searched)), VALUES(last_searched))" in sql
+
+
+def test_mysql_insert_ignore_keeps_existing_rows():
+    db = Recorder("mysql")
+
+    assert insert_ignore(db, PokemonSpecies, [{"pokemon_id": 1, "pokemon_name": "bulbasaur"}], ["pokemon_id"]) is None
+    sql = str(db.statements[0].compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE pokemon_id = pokemon_species.pokemon_id" in sql
+
+
+def test_mysql_insert_or_get_reads_back_the_existing_id():
+    db = Recorder("mysql")
+
+    insert_or_get(db, TrainingSession, {"user_id": 1, "pokemon_id": 25, "pokemon_name": "pikachu"},
+                  ["user_id", "pokemon_id"])
+    sql = str(db.statements[0].compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE id = last_insert_id(training_sessions.id)" in sql
+
+
+def test_postgresql_statements_use_on_conflict():
+    db = Recorder("postgresql")
+
+    insert_ignore(db, PokemonSpecies, [{"pokemon_id": 1, "pokemon_name": "bulbasaur"}], ["pokemon_id"])
+    upsert_accumulate(db, SearchHistory, [search(SimpleNamespace(id=1), 1, datetime(2024, 1, 1))],
+                      ["user_id", "pokemon_id"], add=["search_count"], greatest=["last_searched"])
+    ignore, accumulate = (str(s.compile(dialect=postgresql.dialect())) for s in db.statements)
+
+    assert "ON CONFLICT (pokemon_id) DO NOTHING RETURNING pokemon_species.pokemon_id" in ignore
+    assert "ON CONFLICT (user_id, pokemon_id) DO UPDATE SET search_count = " \
+           "(search_history.search_count + excluded.search_count)" in accumulate
+    assert "greatest(coalesce(search_history.last_searched, excluded.last_searched), " \
+           "excluded.last_searched)" in accumulate